@@ -0,0 +1,43 @@
+"""
+Benchmarks of colorview2d.
+
+The benchmarks follow the conventions of airspeed velocity (asv):
+a benchmark class provides ``time_<name>`` methods, whose run time is
+measured, and ``peakmem_<name>`` methods, whose peak memory allocation
+is measured. ``setup`` and ``teardown`` are called around each benchmark,
+``params`` and ``param_names`` parametrize the benchmarks of a class.
+A ``setup`` raising :class:`NotImplementedError` skips a combination of parameters.
+
+The benchmarks can be run with asv or with the runner in this package.
+The runner writes the results to a JSON file if requested, two such
+files are compared with :mod:`benchmarks.compare`::
+
+    python -m benchmarks.run
+    python -m benchmarks.run view_bench
+    python -m benchmarks.run --json results-0.6.1.json
+    python -m benchmarks.compare results-0.6.0.json results-0.6.1.json
+
+The data is random with a fixed seed. The array sizes of the
+benchmarks are given by ``SIZES``, they can be
+restricted with the environment variable ``CV2D_BENCH_SIZES``,
+e.g. ``CV2D_BENCH_SIZES=256,1024`` for a quick run.
+
+"""
+import os
+
+import numpy as np
+
+import colorview2d
+
+# The seed of the random data
+SEED = 0
+
+# The width and height of the arrays of the size-parametrized benchmarks
+SIZES = [int(size) for size in
+         os.environ.get('CV2D_BENCH_SIZES', '256,1024,4096,8192').split(',')]
+
+
+def random_data(size, seed=SEED):
+    """A :class:`colorview2d.Data` of size x size random values on the unit square."""
+    return colorview2d.Data(np.random.RandomState(seed).random_sample((size, size)),
+                            ((0., 1.), (0., 1.)))
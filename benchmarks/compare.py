@@ -0,0 +1,85 @@
+"""
+compare
+-------
+
+Compare two result files of :mod:`benchmarks.run`, e.g. of two releases.
+
+Usage::
+
+    python -m benchmarks.compare [--factor F] OLD.json NEW.json
+
+For each benchmark found in both files the ratio new/old is printed.
+Benchmarks that became slower (or use more memory) by more than the factor
+(default 1.5) are marked as regressions, the exit status is then 1.
+"""
+import argparse
+import json
+import sys
+
+# The default ratio new/old above which a benchmark counts as a regression
+FACTOR = 1.5
+
+
+def load_results(path):
+    """Load a result file.
+
+    Returns:
+        A tuple of the environment dictionary and a dictionary mapping
+        (name, parameters) to the result dictionaries.
+    """
+    with open(path) as fhand:
+        report = json.load(fhand)
+    results = dict(((result['name'], json.dumps(result['params'], sort_keys=True)), result)
+                   for result in report.pop('results'))
+    return (report, results)
+
+
+def compare(old, new, factor=FACTOR):
+    """Compare the results found in both result dictionaries.
+
+    Args:
+        old (dict): The old results, see :func:`load_results`.
+        new (dict): The new results.
+        factor (float): The ratio new/old above which a result counts as a regression.
+
+    Returns:
+        A list of (name, parameters, old value, new value, ratio, regression) tuples,
+        the largest ratios first.
+    """
+    rows = []
+    for key in sorted(set(old) & set(new)):
+        old_value, new_value = old[key]['value'], new[key]['value']
+        ratio = new_value / old_value if old_value > 0 else float('inf')
+        rows.append((key[0], key[1], old_value, new_value, ratio, ratio > factor))
+    return sorted(rows, key=lambda row: -row[4])
+
+
+def main(argv=None):
+    """Compare the result files given on the command line."""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.compare',
+                                     description='Compare two benchmark result files.')
+    parser.add_argument('old', help='the result file of the reference')
+    parser.add_argument('new', help='the result file to check')
+    parser.add_argument('--factor', type=float, default=FACTOR,
+                        help='ratio new/old counted as a regression (default %.1f)' % FACTOR)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    (old_env, old) = load_results(args.old)
+    (new_env, new) = load_results(args.new)
+    print('old: %s (%s), new: %s (%s)' % (old_env.get('version'), old_env.get('commit'),
+                                          new_env.get('version'), new_env.get('commit')))
+
+    rows = compare(old, new, args.factor)
+    for (name, params, old_value, new_value, ratio, regression) in rows:
+        print('%-1s %-50s %-40s %12.4g %12.4g %8.2f' % (
+            '!' if regression else '', name, params, old_value, new_value, ratio))
+
+    missing = sorted(set(name for name, _ in old) - set(name for name, _ in new))
+    for name in missing:
+        print('missing in %s: %s' % (args.new, name))
+
+    return 1 if any(row[5] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
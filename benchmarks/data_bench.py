@@ -0,0 +1,75 @@
+"""
+data_bench
+----------
+
+Benchmarks of the operations of :class:`colorview2d.Data`:
+copies, geometric operations, statistics and linetraces.
+"""
+import numpy as np
+
+from . import SIZES, random_data
+
+
+class DataOperations(object):
+    """Time and memory of the copies and the operations on the array."""
+    params = SIZES
+    param_names = ['size']
+
+    def setup(self, size):
+        """Create the data."""
+        self.data = random_data(size)
+
+    def time_deep_copy(self, size):
+        """Copy the data and the array."""
+        self.data.deep_copy()
+
+    def peakmem_deep_copy(self, size):
+        """Copy the data and the array."""
+        return self.data.deep_copy()
+
+    def time_shallow_copy(self, size):
+        """Copy the data, sharing the array."""
+        self.data.shallow_copy()
+
+    def time_rotate_crop(self, size):
+        """Rotate and crop a copy of the data (views of the array)."""
+        data = self.data.shallow_copy()
+        data.rotate_cw()
+        data.crop((0.25, 0.75, 0.25, 0.75))
+
+    def time_statistics(self, size):
+        """Compute the statistics of the array, the cached values are discarded first."""
+        data = self.data.shallow_copy()
+        data.zdata = self.data.zdata
+        data.statistics
+
+    def time_resize(self, size):
+        """Shrink the array by a factor of 4 (binning)."""
+        self.data.shallow_copy().resize(size // 4, size // 4)
+
+
+class Linetraces(object):
+    """Time of the extraction of linetraces."""
+    params = SIZES
+    param_names = ['size']
+
+    def setup(self, size):
+        """Create the data and 100 random segments."""
+        self.data = random_data(size)
+        self.segments = np.random.RandomState(1).random_sample((100, 2, 2))
+
+    def time_ylinetrace(self, size):
+        """A single linetrace along the y-axis."""
+        self.data.extract_ylinetrace(0.5, 0., 1.)
+
+    def time_xlinetrace_series(self, size):
+        """100 linetraces along the x-axis."""
+        self.data.extract_xlinetrace_series(0., 0.99, 0.01, 0., 1.)
+
+    def time_arbitrary_nearest(self, size):
+        """100 linetraces along arbitrary segments, nearest neighbour."""
+        self.data.extract_arbitrary_linetraces(self.segments)
+
+    def time_arbitrary_bilinear(self, size):
+        """100 linetraces along arbitrary segments, bilinear interpolation."""
+        self.data.extract_arbitrary_linetraces(self.segments, interpolation='bilinear')
@@ -0,0 +1,74 @@
+"""
+loaders_bench
+-------------
+
+Benchmarks of loading and saving data files.
+"""
+import os
+import shutil
+import tempfile
+
+import colorview2d.fileloaders as fileloaders
+
+from . import SIZES, random_data
+
+# The gnuplot text files grow to gigabytes for the largest sizes
+GP_SIZES = [size for size in SIZES if size <= 2048]
+
+
+class GnuplotFile(object):
+    """Time and memory of the gnuplot-style text files."""
+    params = GP_SIZES
+    param_names = ['size']
+
+    def setup(self, size):
+        """Save the data to a temporary file."""
+        self.data = random_data(size)
+        self.dirname = tempfile.mkdtemp()
+        self.fname = os.path.join(self.dirname, 'data.dat')
+        fileloaders.save_gpfile(self.fname, self.data)
+
+    def teardown(self, size):
+        """Remove the file."""
+        shutil.rmtree(self.dirname)
+
+    def time_load_gpfile(self, size):
+        """Parse the text file."""
+        fileloaders.load_gpfile(self.fname)
+
+    def peakmem_load_gpfile(self, size):
+        """Parse the text file."""
+        return fileloaders.load_gpfile(self.fname)
+
+    def time_save_gpfile(self, size):
+        """Write the text file."""
+        fileloaders.save_gpfile(os.path.join(self.dirname, 'saved.dat'), self.data)
+
+
+class Cv2dFile(object):
+    """Time of the binary colorview2d data files."""
+    params = SIZES
+    param_names = ['size']
+
+    def setup(self, size):
+        """Save the data to a temporary file."""
+        self.data = random_data(size)
+        self.dirname = tempfile.mkdtemp()
+        self.fname = os.path.join(self.dirname, 'data.cv2d')
+        fileloaders.save_cv2dfile(self.fname, self.data)
+
+    def teardown(self, size):
+        """Remove the file."""
+        shutil.rmtree(self.dirname)
+
+    def time_load(self, size):
+        """Read the whole array."""
+        fileloaders.load_cv2dfile(self.fname, mmap_mode=None)
+
+    def time_load_memmap(self, size):
+        """Open the array memory-mapped and compute its maximum."""
+        fileloaders.load_cv2dfile(self.fname).zmax
+
+    def time_save(self, size):
+        """Write the file."""
+        fileloaders.save_cv2dfile(os.path.join(self.dirname, 'saved.cv2d'), self.data)
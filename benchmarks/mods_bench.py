@@ -0,0 +1,217 @@
+"""
+mods_bench
+----------
+
+Benchmarks of the application of the mod pipeline.
+"""
+import os
+
+import scipy.ndimage
+
+import colorview2d
+from colorview2d.gaussian import gaussian_filter
+from colorview2d.rankfilter import median_filter
+
+from . import SIZES, random_data
+
+# The arguments of the mods in ModApply, other mods use their default arguments
+MOD_ARGS = {
+    'Adaptive_Threshold': (15, 0.1),
+    'Bin': (4, 4),
+    'Crop': (0.25, 0.75, 0.25, 0.75),
+    'Derive': (),
+    'Flip': True,
+    'Median': (3, 3),
+    'Rotate': True,
+    'Scale': 2.,
+    'Smooth': (2., 2.),
+}
+
+# The direct gaussian filter is skipped if the width times the array size exceeds this
+DIRECT_SMOOTH_LIMIT = 10**6
+
+
+class ModApply(object):
+    """Time of every mod in colorview2d/mods applied to arrays of growing size."""
+    params = [sorted(colorview2d.View._modlist.keys()), SIZES]
+    param_names = ['mod', 'size']
+
+    def setup(self, mod, size):
+        """Create the data and get the mod and its arguments."""
+        self.data = random_data(size)
+        self.mod = colorview2d.View._modlist[mod]
+        self.modargs = MOD_ARGS.get(mod, self.mod.default_args)
+
+    def time_apply(self, mod, size):
+        """Apply the mod to a copy of the data."""
+        self.mod.apply(self.data.shallow_copy(), self.modargs)
+
+
+class ApplyPipeline(object):
+    """Time of View._apply_pipeline for a typical pipeline, without cached stages."""
+    params = SIZES
+    param_names = ['size']
+
+    def setup(self, size):
+        """Create a headless view with the pipeline."""
+        self.view = colorview2d.View(random_data(size), headless=True, pipeline=[
+            ('Smooth', (2., 2.)), ('Derive', ()), ('Scale', 2.), ('Absolute', ())])
+
+    def time_apply_pipeline(self, size):
+        """Apply the whole pipeline."""
+        self.view.stage_cache.clear()
+        self.view._apply_pipeline()
+
+
+class ElementwiseRun(object):
+    """Time and memory of a pipeline of elementwise mods (Scale, Absolute, Log)."""
+    params = SIZES
+    param_names = ['size']
+
+    def setup(self, size):
+        """Create a headless view of a square array."""
+        data = random_data(size)
+        data.zdata = data.zdata - 0.5
+        self.view = colorview2d.View(data, headless=True)
+        self.pipeline = [('Scale', 2.), ('Absolute', ()), ('Log', ())]
+
+    def apply(self):
+        """Apply the pipeline without using cached stages."""
+        self.view.stage_cache.clear()
+        self.view.pipeline = self.pipeline
+
+    def time_fused(self, size):
+        """Apply the mods in a single blockwise pass."""
+        self.apply()
+
+    def peakmem_fused(self, size):
+        """Memory of the fused pass."""
+        self.apply()
+
+
+class TiledFilters(object):
+    """Time of the neighbourhood filters applied to strips on a thread pool."""
+    params = [['Smooth', 'Median'], [1, None], SIZES]
+    param_names = ['mod', 'workers', 'size']
+
+    def setup(self, mod, workers, size):
+        """Create a headless view."""
+        self.view = colorview2d.View(random_data(size), headless=True)
+        self.view.executor.max_workers = workers or os.cpu_count() or 1
+        self.pipeline = [(mod, (5, 5))]
+
+    def time_filter(self, mod, workers, size):
+        """Apply the filter, one worker disables the tiling."""
+        self.view.stage_cache.clear()
+        self.view.pipeline = self.pipeline
+
+
+class MedianWindow(object):
+    """Time of the median filter with growing windows."""
+    params = [[5, 31, 61], SIZES]
+    param_names = ['window', 'size']
+
+    def setup(self, window, size):
+        """Create the array."""
+        self.zdata = random_data(size).zdata
+
+    def time_median(self, window, size):
+        """Median filter with a square window."""
+        median_filter(self.zdata, (window, window))
+
+    def time_median_line(self, window, size):
+        """Median filter with a window along the rows."""
+        median_filter(self.zdata, (1, window))
+
+
+class SmoothSigma(object):
+    """Time of the gaussian filter with growing standard deviations."""
+    params = [[2., 20., 200.], ['auto', 'direct'], SIZES]
+    param_names = ['sigma', 'backend', 'size']
+
+    def setup(self, sigma, backend, size):
+        """Create the array. The direct filter of the largest widths is skipped
+        for the largest arrays, it takes minutes."""
+        if backend == 'direct' and sigma * size > DIRECT_SMOOTH_LIMIT:
+            raise NotImplementedError('direct filter too slow')
+        self.zdata = random_data(size).zdata
+
+    def time_smooth(self, sigma, backend, size):
+        """Gaussian filter with the automatically chosen or the direct backend."""
+        if backend == 'direct':
+            scipy.ndimage.gaussian_filter(self.zdata, (sigma, sigma))
+        else:
+            gaussian_filter(self.zdata, (sigma, sigma))
+
+
+class AdaptiveThreshold(object):
+    """Time of the adaptive threshold with growing blocks."""
+    params = [[3, 31, 101], ['mean', 'gaussian'], SIZES]
+    param_names = ['blocksize', 'method', 'size']
+
+    def setup(self, blocksize, method, size):
+        """Create the data and get the mod."""
+        self.data = random_data(size)
+        self.mod = colorview2d.View._modlist['Adaptive_Threshold']
+
+    def time_threshold(self, blocksize, method, size):
+        """Apply the threshold to the data."""
+        self.mod.apply(self.data.shallow_copy(), (blocksize, 0.1, method))
+
+
+class DeriveModes(object):
+    """Time of the derivative along x: a chain of mods versus a single mod."""
+    params = SIZES
+    param_names = ['size']
+
+    def setup(self, size):
+        """Create a headless view."""
+        self.view = colorview2d.View(random_data(size), headless=True)
+
+    def apply(self, pipeline):
+        """Apply a pipeline without using cached stages."""
+        self.view.stage_cache.clear()
+        self.view.pipeline = pipeline
+
+    def time_chain(self, size):
+        """Smooth, rotate and take differences along y."""
+        self.apply([('Smooth', (1., 1.)), ('Rotate', ()), ('Derive', ()), ('Rotate', ()),
+                    ('Rotate', ()), ('Rotate', ())])
+
+    def time_savgol(self, size):
+        """Smoothed derivative along x in one mod."""
+        self.apply([('Derive', ('x', 7, 2))])
+
+    def time_curvature(self, size):
+        """2d curvature in one mod."""
+        self.apply([('Derive', ('curvature',))])
+
+
+class Downsample(object):
+    """Time and memory needed to shrink an array by integer factors:
+    block binning versus spline interpolation."""
+    params = [[4, 8], SIZES]
+    param_names = ['factor', 'size']
+
+    def setup(self, factor, size):
+        """Create the data."""
+        self.zdata = random_data(size).zdata
+
+    def time_bin(self, factor, size):
+        """Average the blocks with Data.resize."""
+        data = colorview2d.Data(self.zdata, ((0., 1.), (0., 1.)))
+        data.resize(size // factor, size // factor)
+
+    def time_zoom(self, factor, size):
+        """Linear spline interpolation, the general path of Data.resize."""
+        scipy.ndimage.zoom(self.zdata, 1. / factor, order=1)
+
+    def peakmem_bin(self, factor, size):
+        """Average the blocks with Data.resize."""
+        data = colorview2d.Data(self.zdata, ((0., 1.), (0., 1.)))
+        data.resize(size // factor, size // factor)
+        return data
+
+    def peakmem_zoom(self, factor, size):
+        """Linear spline interpolation, the general path of Data.resize."""
+        return scipy.ndimage.zoom(self.zdata, 1. / factor, order=1)
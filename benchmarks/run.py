@@ -0,0 +1,182 @@
+"""
+run
+---
+
+A minimal runner for the benchmarks in this package,
+for environments without airspeed velocity (asv).
+
+Usage::
+
+    python -m benchmarks.run [--json FILE] [--repeat N] [module_or_benchmark_prefix ...]
+
+For each ``time_*`` benchmark the best wall time of several repeats is
+reported, for each ``peakmem_*`` benchmark the peak of the memory
+allocated by Python and numpy during the call (see :mod:`tracemalloc`).
+
+With ``--json``, the results are also written to a file::
+
+    {"version": "0.6.1", "commit": "...", "date": "...", "python": "...",
+     "numpy": "...", "platform": "...",
+     "results": [{"name": "mods_bench.ModApply.time_apply",
+                  "params": {"mod": "Smooth", "size": 1024},
+                  "kind": "time", "value": 0.012, "unit": "s"}, ...]}
+
+The unit of the peak memory is bytes.
+"""
+import argparse
+import datetime
+import glob
+import importlib
+import inspect
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+import colorview2d
+
+# The number of repeats of a timing, the best run is reported.
+REPEAT = 3
+
+
+def find_benchmarks(prefixes=None):
+    """Find the benchmark methods of the benchmark classes in this package.
+
+    Args:
+        prefixes (list): Only return benchmarks whose name
+            (``module.Class.method``) starts with one of the prefixes.
+
+    Returns:
+        A list of (name, class, method name) tuples.
+    """
+    benchmarks = []
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(directory, '*_bench.py'))):
+        modname = os.path.splitext(os.path.basename(path))[0]
+        module = importlib.import_module('%s.%s' % (__package__ or 'benchmarks', modname))
+        for classname, benchclass in inspect.getmembers(module, inspect.isclass):
+            if benchclass.__module__ != module.__name__:
+                continue
+            for methodname in sorted(dir(benchclass)):
+                if not methodname.startswith(('time_', 'peakmem_')):
+                    continue
+                name = '%s.%s.%s' % (modname, classname, methodname)
+                if prefixes and not name.startswith(tuple(prefixes)):
+                    continue
+                benchmarks.append((name, benchclass, methodname))
+    return benchmarks
+
+
+def parameter_sets(benchclass):
+    """Return the combinations of the parameters of a benchmark class."""
+    params = getattr(benchclass, 'params', [])
+    if not params:
+        return [()]
+    # A single parameter can be given as a plain list (as in asv)
+    if not isinstance(params[0], (list, tuple)):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def parameter_names(benchclass):
+    """Return the names of the parameters of a benchmark class."""
+    params = getattr(benchclass, 'params', [])
+    if params and not isinstance(params[0], (list, tuple)):
+        params = [params]
+    names = list(getattr(benchclass, 'param_names', []))
+    return names + ['param%d' % index for index in range(len(names) + 1, len(params) + 1)]
+
+
+def run_benchmark(benchclass, methodname, params, repeat=REPEAT):
+    """Run a single benchmark.
+
+    Returns:
+        The best time in seconds or the peak memory in bytes.
+
+    Raises:
+        NotImplementedError: The setup skips the parameter combination (as in asv).
+    """
+    bench = benchclass()
+    if hasattr(bench, 'setup'):
+        bench.setup(*params)
+    try:
+        method = getattr(bench, methodname)
+        if methodname.startswith('peakmem_'):
+            tracemalloc.start()
+            try:
+                method(*params)
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        return min(timeit.repeat(lambda: method(*params), repeat=repeat, number=1))
+    finally:
+        if hasattr(bench, 'teardown'):
+            bench.teardown(*params)
+
+
+def environment():
+    """Describe the version of colorview2d and the machine the benchmarks run on."""
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'version': colorview2d.__version__,
+            'commit': commit,
+            'date': datetime.datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()}
+
+
+def main(argv=None):
+    """Run the benchmarks selected by the command line arguments."""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run',
+                                     description='Run the colorview2d benchmarks.')
+    parser.add_argument('prefixes', nargs='*',
+                        help='only run the benchmarks whose name starts with a prefix')
+    parser.add_argument('--json', help='write the results to a JSON file')
+    parser.add_argument('--repeat', type=int, default=REPEAT,
+                        help='the number of repeats of a timing (default %d)' % REPEAT)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    results = []
+    for name, benchclass, methodname in find_benchmarks(args.prefixes):
+        names = parameter_names(benchclass)
+        for params in parameter_sets(benchclass):
+            try:
+                result = run_benchmark(benchclass, methodname, params, args.repeat)
+            except NotImplementedError:
+                print('%-50s %-20s skipped' % (name, params))
+                continue
+            if methodname.startswith('peakmem_'):
+                value = '%.1f KiB' % (result / 1024.)
+            else:
+                value = '%.3f ms' % (result * 1e3)
+            print('%-50s %-20s %s' % (name, params, value))
+            sys.stdout.flush()
+
+            peakmem = methodname.startswith('peakmem_')
+            results.append({'name': name,
+                            'params': dict(zip(names, params)),
+                            'kind': 'peakmem' if peakmem else 'time',
+                            'value': result,
+                            'unit': 'bytes' if peakmem else 's'})
+
+    if args.json:
+        report = environment()
+        report['results'] = results
+        with open(args.json, 'w') as fhand:
+            json.dump(report, fhand, indent=1)
+
+
+if __name__ == '__main__':
+    main()
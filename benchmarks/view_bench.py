@@ -0,0 +1,192 @@
+"""
+view_bench
+----------
+
+Benchmarks of the construction of :class:`colorview2d.View` objects
+and of the plot export.
+"""
+import os
+import shutil
+import tempfile
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+import colorview2d
+import colorview2d.instrument
+
+from . import SIZES, random_data
+
+
+class ViewConstruction(object):
+    """Time and memory needed to create views of small arrays."""
+    params = [1, 100]
+    param_names = ['views']
+
+    def setup(self, views):
+        """Create the data and make sure the mod registry is populated."""
+        self.data = colorview2d.Data(np.random.RandomState(0).random_sample((64, 64)),
+                                     ((0., 1.), (0., 1.)))
+        colorview2d.View(self.data)
+        plt.close('all')
+
+    def teardown(self, views):
+        """Close the figures created by the views."""
+        plt.close('all')
+
+    def time_view(self, views):
+        """Create views of the same data."""
+        for _ in range(views):
+            colorview2d.View(self.data)
+
+    def time_view_mods(self, views):
+        """Create views and add a mod to each via the generated methods."""
+        for _ in range(views):
+            view = colorview2d.View(self.data)
+            view.add_Scale(2.)
+
+    def time_view_headless(self, views):
+        """Create headless views of the same data."""
+        for _ in range(views):
+            colorview2d.View(self.data, headless=True)
+
+    def peakmem_view(self, views):
+        """Keep the views alive to measure the memory of each instance."""
+        keep = [colorview2d.View(self.data) for _ in range(views)]
+        return keep
+
+    def peakmem_view_headless(self, views):
+        """Keep headless views alive to measure the memory of each instance."""
+        keep = [colorview2d.View(self.data, headless=True) for _ in range(views)]
+        return keep
+
+
+class PlotPdf(object):
+    """Time needed to export a plot to pdf."""
+    params = [[False, True], SIZES]
+    param_names = ['headless', 'size']
+
+    def setup(self, headless, size):
+        """Create a view of a square array."""
+        self.view = colorview2d.View(random_data(size), headless=headless)
+        handle, self.filename = tempfile.mkstemp(suffix='.pdf')
+        os.close(handle)
+
+    def teardown(self, headless, size):
+        """Remove the pdf and close the figures."""
+        os.remove(self.filename)
+        plt.close('all')
+
+    def time_plot_pdf(self, headless, size):
+        """Draw the plot and save it to pdf."""
+        self.view.plot_pdf(self.filename)
+
+
+class PlotPng(object):
+    """Time needed to export the colored data to png, without matplotlib figures."""
+    params = SIZES
+    param_names = ['size']
+
+    def setup(self, size):
+        """Create a headless view of a smooth array."""
+        y, x = np.mgrid[0:1:size * 1j, 0:1:size * 1j]
+        data = colorview2d.Data(np.sin(10 * x) * np.cos(7 * y), ((0., 1.), (0., 1.)))
+        self.view = colorview2d.View(data, headless=True)
+        self.dirname = tempfile.mkdtemp()
+
+    def teardown(self, size):
+        """Remove the png files."""
+        shutil.rmtree(self.dirname)
+
+    def time_plot_png(self, size):
+        """Color the data and write a single png."""
+        self.view.plot_png(os.path.join(self.dirname, 'plot.png'))
+
+    def time_plot_png_tiles(self, size):
+        """Color the data and write 256x256 png tiles."""
+        self.view.plot_png_tiles(self.dirname)
+
+
+class OutOfCorePipeline(object):
+    """Time and memory needed to apply a pipeline to a memory-mapped array,
+    in memory and out-of-core with a budget of an eighth of the array."""
+    params = [['in-memory', 'out-of-core'], SIZES]
+    param_names = ['mode', 'size']
+
+    def setup(self, mode, size):
+        """Save the array to a binary file."""
+        self.tempdir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.tempdir, 'outofcore.cv2d')
+        data = random_data(size)
+        colorview2d.fileloaders.save_cv2dfile(self.fname, data)
+        self.memory_budget = data.zdata.nbytes // 8 if mode == 'out-of-core' else None
+        self.pipeline = [('Rotate', True), ('Scale', 2.), ('Smooth', (2., 2.))]
+
+    def teardown(self, mode, size):
+        """Remove the file."""
+        shutil.rmtree(self.tempdir)
+
+    def run(self):
+        """Open the file memory-mapped and apply the pipeline."""
+        view = colorview2d.View(colorview2d.fileloaders.load_cv2dfile(self.fname),
+                                headless=True, memory_budget=self.memory_budget)
+        view.executor.tempdir = self.tempdir
+        view.pipeline = self.pipeline
+        return view
+
+    def time_pipeline(self, mode, size):
+        """Apply the pipeline."""
+        self.run()
+
+    def peakmem_pipeline(self, mode, size):
+        """Apply the pipeline and keep the result."""
+        return self.run()
+
+
+class DiskCacheReopen(object):
+    """Time needed to reopen an array with a median filter in the pipeline,
+    with and without the persistent cache."""
+    params = SIZES
+    param_names = ['size']
+
+    def setup(self, size):
+        """Fill the cache directory."""
+        self.tempdir = tempfile.mkdtemp()
+        self.data = random_data(size)
+        self.pipeline = [('Median', (15, 15)), ('Scale', 2.)]
+        colorview2d.View(self.data, pipeline=self.pipeline, headless=True, cache_dir=self.tempdir)
+
+    def teardown(self, size):
+        """Remove the cache directory."""
+        shutil.rmtree(self.tempdir)
+
+    def time_reopen(self, size):
+        """Create a view, the result is read from the cache."""
+        colorview2d.View(self.data, pipeline=self.pipeline, headless=True, cache_dir=self.tempdir)
+
+    def time_recompute(self, size):
+        """Create a view without the cache."""
+        colorview2d.View(self.data, pipeline=self.pipeline, headless=True)
+
+
+class InstrumentationOverhead(object):
+    """Time of a short pipeline without instrumentation,
+    with timing only and with memory tracing."""
+    params = [['off', 'time', 'memory'], SIZES]
+    param_names = ['instrumentation', 'size']
+
+    def setup(self, instrumentation, size):
+        """Create a headless view."""
+        data = random_data(size)
+        data.zdata = data.zdata + 0.1
+        self.view = colorview2d.View(data, headless=True)
+        if instrumentation != 'off':
+            self.view.instrumentation = colorview2d.instrument.Instrumentation(
+                trace_memory=instrumentation == 'memory')
+
+    def time_pipeline(self, instrumentation, size):
+        """Apply the pipeline without using cached stages."""
+        self.view.stage_cache.clear()
+        self.view.pipeline = [('Scale', 2.), ('Log', ()), ('Smooth', (1., 1.)), ('Derive', ())]
@@ -3,11 +3,11 @@
 scientific data (with dimensionful axes)
 with an easily extendable data modification (or filtering) toolbox.
 
-Tested with Python 2.7 and Python 3.
+Requires Python 3.9 or later.
 
 Dependencies
 ------------
-numpy, scipy, matplotlib, pyyaml, scikit.image
+numpy, scipy, matplotlib, pyyaml
 
 Homepage
 --------
@@ -21,7 +21,7 @@ __license__ = "GNU GPLv3"
 __version__ = "0.6.1"
 __all__ = ["data", "view", "fileloaders"]
 
-from colorview2d.data import Data
+from colorview2d.data import Data, LazyData
 from colorview2d.view import View
 from colorview2d.imod import IMod
 import colorview2d.fileloaders
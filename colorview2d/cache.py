@@ -0,0 +1,359 @@
+"""
+Caches for the results of the mod pipeline.
+
+The :class:`StageCache` keeps the intermediate :class:`colorview2d.Data`
+after each stage of the pipeline of a :class:`colorview2d.View`.
+The stages are keyed by the pipeline prefix, i.e., the list of
+``(modname, modargs)`` tuples up to and including the stage.
+If the pipeline is edited, only the stages downstream of the
+longest cached prefix have to be re-evaluated.
+
+The :class:`DiskCache` keeps the results of whole pipelines in a
+directory, across sessions. The results are keyed by a fingerprint of
+the original data (see :func:`fingerprint`), the pipeline and the versions
+of the mods. They are stored as binary colorview2d data files and opened
+memory-mapped.
+
+Example
+-------
+::
+
+    cache = StageCache(max_bytes=512 * 1024**2)
+    cache.put(StageCache.key([('Smooth', (2, 2))]), data)
+    data = cache.get(StageCache.key([('Smooth', (2, 2))]))
+
+    disk_cache = DiskCache('~/.cache/colorview2d')
+    key = DiskCache.key(fingerprint(original), [('Smooth', (2, 2))], [0])
+    disk_cache.put(key, data)
+
+"""
+import collections
+import glob
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+import colorview2d
+import colorview2d.fileloaders as fileloaders
+
+# The default memory budget of a stage cache in bytes (512 MiB).
+DEFAULT_MAX_BYTES = 512 * 1024**2
+
+# The default budget of a stage cache for memory-mapped results in bytes (4 GiB).
+DEFAULT_MAX_DISK_BYTES = 4 * 1024**3
+
+# The default size limit of a disk cache in bytes (4 GiB).
+DEFAULT_DISK_MAX_BYTES = 4 * 1024**3
+
+# The number of bytes of the array hashed at once by fingerprint
+FINGERPRINT_CHUNK_BYTES = 2**24
+
+
+class StageCache(object):
+    """
+    A least-recently-used cache for intermediate pipeline results.
+
+    The memory used by the cache is estimated from the size of the
+    cached 2d arrays. Memory-mapped arrays (e.g. the out-of-core results of
+    the executor, backed by temporary files) count against a separate disk budget.
+    If a new entry exceeds one of the budgets, the least recently used
+    entries are evicted. A budget of zero disables the cache for the
+    respective kind of arrays.
+
+    Args:
+        max_bytes (int): The memory budget of the cache in bytes.
+        max_disk_bytes (int): The budget for memory-mapped arrays in bytes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self._entries = collections.OrderedDict()
+        self._nbytes = 0
+        self._disk_nbytes = 0
+        self._max_bytes = max_bytes
+        self._max_disk_bytes = max_disk_bytes
+
+    @staticmethod
+    def key(pipeline):
+        """Create a cache key for a pipeline prefix.
+
+        Args:
+            pipeline (list): A list of (modname, modargs) tuples.
+
+        Returns:
+            A hashable representation of the pipeline.
+        """
+        # The mod arguments are not necessarily hashable (lists),
+        # the representation of the pipeline is.
+        return repr([tuple(modtuple) for modtuple in pipeline])
+
+    @property
+    def max_bytes(self):
+        """The memory budget of the cache in bytes."""
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes):
+        """Set a new memory budget and evict entries if necessary."""
+        self._max_bytes = max_bytes
+        self._evict((0, 0))
+
+    @property
+    def max_disk_bytes(self):
+        """The budget of the cache for memory-mapped arrays in bytes."""
+        return self._max_disk_bytes
+
+    @max_disk_bytes.setter
+    def max_disk_bytes(self, max_disk_bytes):
+        """Set a new budget for memory-mapped arrays and evict entries if necessary."""
+        self._max_disk_bytes = max_disk_bytes
+        self._evict((0, 0))
+
+    @property
+    def nbytes(self):
+        """The estimated memory used by the cached arrays in bytes."""
+        return self._nbytes
+
+    @property
+    def disk_nbytes(self):
+        """The size of the cached memory-mapped arrays in bytes."""
+        return self._disk_nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """Return the cached :class:`colorview2d.Data` for a key or None.
+
+        The entry is marked as the most recently used one.
+        """
+        try:
+            data = self._entries.pop(key)
+        except KeyError:
+            return None
+        self._entries[key] = data
+        return data
+
+    def put(self, key, data):
+        """Add a :class:`colorview2d.Data` to the cache.
+
+        Args:
+            key (string): The key of the pipeline prefix. See :meth:`StageCache.key`.
+            data (colorview2d.Data): The result of the pipeline prefix.
+                Note that the data is not copied.
+        """
+        if key in self._entries:
+            self._remove(self._entries.pop(key))
+
+        sizes = _sizes(data)
+        if sizes[0] > self._max_bytes or sizes[1] > self._max_disk_bytes:
+            logging.info('Stage result of %d bytes exceeds the cache budget.', sum(sizes))
+            return
+
+        self._evict(sizes)
+        self._entries[key] = data
+        self._nbytes += sizes[0]
+        self._disk_nbytes += sizes[1]
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        self._entries.clear()
+        self._nbytes = 0
+        self._disk_nbytes = 0
+
+    def _evict(self, sizes):
+        """Evict the least recently used entries until an entry of
+        (memory, disk) sizes fits into the budgets.
+        Only entries of the kind exceeding its budget are evicted."""
+        for key in list(self._entries):
+            memory_exceeded = self._nbytes + sizes[0] > self._max_bytes
+            disk_exceeded = self._disk_nbytes + sizes[1] > self._max_disk_bytes
+            if not (memory_exceeded or disk_exceeded):
+                break
+            (nbytes, disk_nbytes) = _sizes(self._entries[key])
+            if (memory_exceeded and nbytes) or (disk_exceeded and disk_nbytes):
+                self._remove(self._entries.pop(key))
+
+    def _remove(self, data):
+        """Subtract the sizes of a removed entry."""
+        (nbytes, disk_nbytes) = _sizes(data)
+        self._nbytes -= nbytes
+        self._disk_nbytes -= disk_nbytes
+
+
+def _sizes(data):
+    """The sizes of the array of a :class:`colorview2d.Data` in memory and on disk in bytes.
+
+    Returns:
+        A tuple (memory, disk). Memory-mapped arrays count as disk.
+    """
+    if isinstance(data.zdata, np.memmap):
+        return (0, data.zdata.nbytes)
+    return (data.zdata.nbytes, 0)
+
+
+def fingerprint(data):
+    """A hash of the content of a :class:`colorview2d.Data`:
+    the array (type, shape and values) and the axes bounds.
+
+    The array is read in chunks of rows, memory-mapped arrays are not loaded.
+
+    Returns:
+        A hexadecimal string.
+    """
+    zdata = data.zdata
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((zdata.dtype.str, zdata.shape,
+                        tuple(data.yrange_bounds), tuple(data.xrange_bounds))).encode('utf-8'))
+    rows = max(1, FINGERPRINT_CHUNK_BYTES // max(1, zdata.itemsize * zdata.shape[1]))
+    for start in range(0, zdata.shape[0], rows):
+        digest.update(np.ascontiguousarray(zdata[start:start + rows]).data)
+    return digest.hexdigest()
+
+
+class DiskCache(object):
+    """
+    A persistent least-recently-used cache for pipeline results.
+
+    The entries are binary colorview2d data files in a directory, see
+    :func:`colorview2d.fileloaders.save_cv2dfile`. They are returned
+    memory-mapped (read-only). The modification time of a file marks its
+    last use. If a new entry exceeds the size limit, the least recently
+    used files are removed. Several views and processes can share the
+    directory, files are written to a temporary name and renamed.
+
+    Args:
+        path (string): The cache directory. It is created if necessary.
+        max_bytes (int): The size limit of the cache in bytes.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_DISK_MAX_BYTES):
+        self._path = os.path.abspath(os.path.expanduser(path))
+        if not os.path.isdir(self._path):
+            os.makedirs(self._path)
+        self._max_bytes = max_bytes
+
+    @staticmethod
+    def key(data_fingerprint, pipeline, versions):
+        """Create a cache key for a pipeline applied to data.
+
+        Args:
+            data_fingerprint (string): The fingerprint of the original data, see :func:`fingerprint`.
+            pipeline (list): A list of (modname, modargs) tuples.
+            versions (list): The versions of the mods of the pipeline.
+
+        Returns:
+            A hexadecimal string.
+        """
+        description = repr((data_fingerprint, StageCache.key(pipeline),
+                            list(versions), colorview2d.__version__))
+        return hashlib.sha1(description.encode('utf-8')).hexdigest()
+
+    @property
+    def path(self):
+        """The cache directory."""
+        return self._path
+
+    @property
+    def max_bytes(self):
+        """The size limit of the cache in bytes."""
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes):
+        """Set a new size limit and remove entries if necessary."""
+        self._max_bytes = max_bytes
+        self._evict(0)
+
+    @property
+    def nbytes(self):
+        """The size of the cached files in bytes."""
+        return sum(size for _, size, _ in self._files())
+
+    def __len__(self):
+        return len(self._files())
+
+    def __contains__(self, key):
+        return os.path.exists(self._filename(key))
+
+    def get(self, key):
+        """Return the cached :class:`colorview2d.Data` for a key or None.
+
+        The array is memory-mapped, the entry is marked as the most recently used one.
+        """
+        filename = self._filename(key)
+        try:
+            data = fileloaders.load_cv2dfile(filename, mmap_mode='r')
+            os.utime(filename, None)
+        except (IOError, OSError):
+            return None
+        except (AssertionError, ValueError, KeyError):
+            logging.warning('Removing the unreadable cache file %s.', filename)
+            self._remove(filename)
+            return None
+        return data
+
+    def put(self, key, data):
+        """Write a :class:`colorview2d.Data` to the cache.
+
+        Args:
+            key (string): The key of the pipeline result. See :meth:`DiskCache.key`.
+            data (colorview2d.Data): The result of the pipeline.
+        """
+        nbytes = data.zdata.nbytes
+        if nbytes > self._max_bytes:
+            logging.info('Pipeline result of %d bytes exceeds the disk cache limit.', nbytes)
+            return
+
+        self._evict(nbytes)
+        filename = self._filename(key)
+        temporary = '%s.%d.tmp' % (filename, os.getpid())
+        try:
+            fileloaders.save_cv2dfile(temporary, data)
+            os.replace(temporary, filename)
+        except (IOError, OSError) as error:
+            logging.warning('Writing to the disk cache failed: %s', error)
+            self._remove(temporary)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        for filename, _, _ in self._files():
+            self._remove(filename)
+
+    def _filename(self, key):
+        """The file of an entry."""
+        return os.path.join(self._path, key + '.cv2d')
+
+    def _files(self):
+        """The (filename, size, modification time) of the entries, least recently used first."""
+        files = []
+        for filename in glob.glob(os.path.join(self._path, '*.cv2d')):
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                # removed by another process
+                continue
+            files.append((filename, stat.st_size, stat.st_mtime))
+        return sorted(files, key=lambda item: item[2])
+
+    def _evict(self, nbytes):
+        """Remove the least recently used entries until nbytes fit into the limit."""
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for filename, size, _ in files:
+            if total + nbytes <= self._max_bytes:
+                break
+            self._remove(filename)
+            total -= size
+
+    @staticmethod
+    def _remove(filename):
+        """Remove a file if it exists."""
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
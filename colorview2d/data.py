@@ -16,6 +16,12 @@ Example
     file.report()
     file.save('newdata.dat')
 
+colorview2d.LazyData defers reading the array until it is needed::
+
+    file = LazyData('largedata.cv2d')
+    print(file.shape, file.xrange_bounds)   # read from the file header
+    file.zmax                               # reads the array
+
 
 """
 
@@ -23,6 +29,26 @@ import copy
 import logging
 import numpy as np
 
+from colorview2d.pyramid import Pyramid
+
+# The spline orders used by Data.extract_arbitrary_linetraces.
+_INTERPOLATION_ORDERS = {'nearest': 0, 'bilinear': 1, 'cubic': 3}
+
+# The number of array elements processed at once by the statistics
+_STATS_CHUNK_SIZE = 2**18
+
+# The reductions of the blocks available in Data.bin
+BIN_METHODS = ('mean', 'sum', 'max', 'min')
+
+# The ufuncs that combine the values of a block
+_BIN_UFUNCS = {'mean': np.add, 'sum': np.add, 'max': np.maximum, 'min': np.minimum}
+
+# The treatment of the incomplete blocks at the edges in Data.bin
+BIN_EDGES = ('trim', 'partial')
+
+# The number of array elements processed at once by Data.bin
+_BIN_CHUNK_SIZE = 2**18
+
 class Data(object):
     """
     ``Data`` hosts, well, the data and its axes.
@@ -33,6 +59,10 @@ class Data(object):
     being the number of rows and columns, respectively.
 
     """
+    # The multi-resolution pyramid of the array, created on first access
+    _pyramid = None
+    # The cached statistics of the array, see Data.statistics
+    _stats = None
 
     def __init__(self, data, range_bounds=None):
         """Initialize a data object.
@@ -83,7 +113,7 @@ class Data(object):
     def dx(self):
         """Spacing of x-axis values."""
         return (self._xrange_bounds[1] - self._xrange_bounds[0]) /\
-            (self._zdata.shape[1] - 1)
+            (self.shape[1] - 1)
 
     @property
     def ytop(self):
@@ -109,7 +139,7 @@ class Data(object):
     def dy(self):
         """Spacing of y-axis values."""
         return (self._yrange_bounds[1] - self._yrange_bounds[0]) /\
-            (self._zdata.shape[0] - 1)
+            (self.shape[0] - 1)
 
     @property
     def zdata(self):
@@ -118,23 +148,86 @@ class Data(object):
 
     @property
     def zmin(self):
-        """Minimum value of the 2d :class:`numpy.ndarray`."""
-        return np.amin(self._zdata)
+        """Minimum value of the 2d :class:`numpy.ndarray`. NaN if the array contains NaN."""
+        return self.statistics['min']
 
     @property
     def zmax(self):
-        """Maximum value of the 2d :class:`numpy.ndarray`."""
-        return np.amax(self._zdata)
+        """Maximum value of the 2d :class:`numpy.ndarray`. NaN if the array contains NaN."""
+        return self.statistics['max']
+
+    @property
+    def zmean(self):
+        """Mean value of the 2d :class:`numpy.ndarray`. NaN if the array contains NaN."""
+        return self.statistics['mean']
+
+    @property
+    def znanmin(self):
+        """Minimum value of the 2d :class:`numpy.ndarray`, ignoring NaN."""
+        return self.statistics['nanmin']
+
+    @property
+    def znanmax(self):
+        """Maximum value of the 2d :class:`numpy.ndarray`, ignoring NaN."""
+        return self.statistics['nanmax']
+
+    @property
+    def znanmean(self):
+        """Mean value of the 2d :class:`numpy.ndarray`, ignoring NaN."""
+        return self.statistics['nanmean']
+
+    @property
+    def nan_count(self):
+        """Number of NaN values in the 2d :class:`numpy.ndarray`."""
+        return self.statistics['nan_count']
+
+    @property
+    def statistics(self):
+        """A dictionary with the min, max, mean (each also ignoring NaN,
+        e.g. ``nanmin``) and the number of NaN (``nan_count``) of the array.
+
+        The statistics are computed in a single pass over the array
+        on first access and kept until the array is replaced.
+        """
+        if self._stats is None:
+            self._stats = _array_statistics(self._zdata)
+        return self._stats
+
+    def zpercentile(self, percentile, ignore_nan=False):
+        """Percentiles of the values of the 2d :class:`numpy.ndarray`.
+        The results are kept until the array is replaced.
+
+        Args:
+            percentile (float or sequence of floats): Percentile(s) between 0 and 100.
+            ignore_nan (boolean): Ignore NaN values. Otherwise, the result is NaN
+                if the array contains NaN.
+
+        Returns:
+            A float or an array of floats.
+        """
+        key = ('percentile', ignore_nan) + tuple(np.ravel(percentile))
+        stats = self.statistics
+        if key not in stats:
+            if ignore_nan and stats['nan_count']:
+                stats[key] = np.nanpercentile(self._zdata, percentile)
+            else:
+                stats[key] = np.percentile(self._zdata, percentile)
+        return stats[key]
+
+    @property
+    def shape(self):
+        """Shape of the 2d :class:`numpy.ndarray`."""
+        return self._zdata.shape
 
     @property
     def xwidth(self):
         """Size of the array along the x-axis."""
-        return self._zdata.shape[1]
+        return self.shape[1]
 
     @property
     def ywidth(self):
         """Size of the array along the y-axis."""
-        return self._zdata.shape[0]
+        return self.shape[0]
 
     @zdata.setter
     def zdata(self, data):
@@ -143,18 +236,34 @@ class Data(object):
             'Not a numpy array. Please provide a numpy array for Data creation.'
         assert len(data.shape) == 2, 'Provide a two-dimensional array for Data creation.'
         self._zdata = data
+        self._clear_caches()
+
+    @property
+    def pyramid(self):
+        """A :class:`colorview2d.pyramid.Pyramid`, the multi-resolution
+        min/max/mean pyramid of the 2d :class:`numpy.ndarray`.
+        The levels are computed on demand and kept until the array is replaced."""
+        if self._pyramid is None:
+            self._pyramid = Pyramid(self._zdata)
+        return self._pyramid
+
+    def _clear_caches(self):
+        """Discard the quantities derived from the array.
+        Called when the array is replaced or modified."""
+        self._pyramid = None
+        self._stats = None
 
     @property
     def y_range(self):
         """A linear y-range array."""
         return np.linspace(
-            self._yrange_bounds[0], self._yrange_bounds[1], self.zdata.shape[0])
+            self._yrange_bounds[0], self._yrange_bounds[1], self.shape[0])
 
     @property
     def x_range(self):
         """A linear x-range array."""
         return np.linspace(
-            self._xrange_bounds[0], self._xrange_bounds[1], self.zdata.shape[1])
+            self._xrange_bounds[0], self._xrange_bounds[1], self.shape[1])
 
 
     @property
@@ -187,7 +296,7 @@ class Data(object):
 
         print(
             "There are {0} lines and {1} columns in the datafile.\n"
-            .format(self._zdata.shape[0], self._zdata.shape[1]))
+            .format(self.shape[0], self.shape[1]))
         print(
             "X-axis range from {0} to {1}".format(self.xleft, self.xright),
             "Y-axis range from {0} to {1}".format(self.ybottom, self.ytop))
@@ -200,15 +309,54 @@ class Data(object):
             A copy of the :class:`Colorview2d.Data` instance.
         """
 
-        tmp = copy.deepcopy(self)
+        tmp = copy.copy(self)
         tmp.zdata = np.copy(self._zdata)
 
         return tmp
 
+    def shallow_copy(self):
+        """
+        Copy the :class:`colorview2d.Data` object without copying the array.
+
+        The copy shares the array with the original (copy-on-write).
+        The shared array is marked read-only for both objects.
+        Modifications that replace the array, e.g. ``data.zdata = data.zdata * 2``,
+        or the geometric operations (``rotate_*``, ``flip_*``, ``crop``)
+        do not affect the other object.
+        To modify the array in-place, use :meth:`Data.writable_zdata`
+        which copies the array first if it is shared.
+
+        Returns:
+            A copy of the :class:`Colorview2d.Data` instance.
+        """
+        if self._zdata.flags.writeable:
+            self._zdata = self._zdata.view()
+            self._zdata.flags.writeable = False
+
+        return copy.copy(self)
+
+    def writable_zdata(self):
+        """
+        Obtain the 2d :class:`numpy.ndarray` for in-place modifications.
+
+        If the array is read-only, because it is shared with a copy
+        (see :meth:`Data.shallow_copy`) or memory-mapped, it is copied first.
+
+        Returns:
+            The writable 2d :class:`numpy.ndarray`.
+        """
+        if not self._zdata.flags.writeable:
+            self.zdata = np.array(self._zdata)
+        else:
+            # The array is about to be modified
+            self._clear_caches()
+
+        return self._zdata
 
     def rotate_cw(self):
         """
         Rotate the data clockwise. The axes are updated as well.
+        The array is a view of the original array, i.e., it is not copied.
         """
         self.zdata = np.rot90(self._zdata, k=1)
         old_xrange_boundaries = self._xrange_bounds
@@ -220,6 +368,7 @@ class Data(object):
     def rotate_ccw(self):
         """
         Rotate the data counter-clockwise. The axes are updated as well.
+        The array is a view of the original array, i.e., it is not copied.
         """
         self.zdata = np.rot90(self._zdata, k=3)
         old_xrange_boundaries = self._xrange_bounds
@@ -231,6 +380,7 @@ class Data(object):
     def flip_lr(self):
         """
         Flip the left and the right side of the data. The axes are updated as well.
+        The array is a view of the original array, i.e., it is not copied.
         """
         self.zdata = np.fliplr(self._zdata)
         self._xrange_bounds = self._xrange_bounds[::-1]
@@ -239,6 +389,7 @@ class Data(object):
     def flip_ud(self):
         """
         Flip the up and the down side of the data. The axes are updated as well.
+        The array is a view of the original array, i.e., it is not copied.
         """
         self.zdata = np.flipud(self._zdata)
         self._yrange_bounds = self._yrange_bounds[::-1]
@@ -272,6 +423,7 @@ class Data(object):
         """
         Crop the data to a subset of the array specifiying the corners of the subset in
         units of the axes ranges.
+        The array is a view of the original array, i.e., it is not copied.
 
         Args:
             boundaries (tuple): (bottom boundary, top boundary,
@@ -305,7 +457,7 @@ class Data(object):
             The closest index on the x axis range.
         """
         assert self.is_within_xbounds(value), 'Value %f out of xrange.' % value
-        return int(round(abs(self.xleft - value) / self.dx))
+        return int(round(abs(self.xleft - value) / abs(self.dx)))
 
     def y_range_idx_by_val(self, value):
         """
@@ -318,7 +470,7 @@ class Data(object):
             The closest index on the y axis range.
         """
         assert self.is_within_ybounds(value), 'Value %f out of yrange.' % value
-        return int(round(abs(self.ybottom - value) / self.dy))
+        return int(round(abs(self.ybottom - value) / abs(self.dy)))
 
     def idx_by_val_coordinate(self, coordinate):
         """Return the nearest index pair for a coordinate pair (y, x) along the
@@ -397,91 +549,119 @@ class Data(object):
             x_range = self.x_range[x_stop_idx:x_start_idx + 1]
             return np.vstack((data[::-1], x_range[::-1]))
 
-    def extract_ylinetrace_series(self, x_first, x_last, x_interval, ystart, ystop):
+    def extract_ylinetrace_series(self, x_first, x_last, x_interval, ystart, ystop, out=None):
         """Extract linetraces along a given y-axis range for
         values on the x axis within a given range and separated by
         a given interval.
 
+        The indices of all linetraces are computed at once and the
+        linetraces are obtained in a single gather operation.
+
         Args:
             x_first (float): value on the x-axis for the first line trace in the series.
             x_last (float): value on the x-axis for the last line trace in the series.
             x_interval (float): the (positive) interval between two linecuts on the x-axis.
             ystart (float): Start and ...
             ystop (float): stop value of the range along the y-axis.
+            out (numpy.ndarray): optional array of the shape and type of the result
+                                 to store the result in.
 
         Returns:
             a numpy array with n + 1 rows with the length equal to the y-dimensions of zdata.
             n is the number of linecuts, i.e., abs(x_last - x_first) / x_interval.
             The last row contains the y-axis range.
         """
+        y_slice = _linetrace_slice(
+            self.y_range_idx_by_val(ystart), self.y_range_idx_by_val(ystop), 'ylinetrace')
+        x_indices = self._linetrace_series_indices(
+            x_first, x_last, x_interval, self.x_range_idx_by_val, self.xleft, self.dx)
 
+        # The transposed array holds the linetraces along y in its rows.
+        return _gather_linetraces(
+            self._zdata[y_slice].T, x_indices, self.y_range[y_slice], out)
 
-        result_array = self.extract_ylinetrace(x_first, ystart, ystop)
-        if self.x_range_idx_by_val(x_first) == self.x_range_idx_by_val(x_last):
-            return result_array
-
-        result_range = result_array[1]
-        result_array = result_array[0]
-
-        x_sign = np.sign(x_last - x_first)
-        x_pos = x_first + x_interval * x_sign
-
-        while x_pos * x_sign <= x_last * x_sign:
-            result_array = np.vstack((result_array, self.extract_ylinetrace(x_pos, ystart, ystop)[0]))
-
-            x_pos += x_interval * x_sign
-
-        return np.vstack((result_array, result_range))
-
-    def extract_xlinetrace_series(self, y_first, y_last, y_interval, xstart, xstop):
+    def extract_xlinetrace_series(self, y_first, y_last, y_interval, xstart, xstop, out=None):
         """Extract linetraces along a given x-axis range for
         values on the y axis within a given range and separated by
         a given interval.
 
+        The indices of all linetraces are computed at once and the
+        linetraces are obtained in a single gather operation.
+
         Args:
             y_first (float): value on the y-axis for the first line trace in the series.
             y_last (float): value on the y-axis for the last line trace in the series.
             y_interval (float): the (positive) interval between two linecuts on the y-axis.
             xstart (float): Start and ...
             xstop (float): stop value of the range along the x-axis.
+            out (numpy.ndarray): optional array of the shape and type of the result
+                                 to store the result in.
 
         Returns:
             a numpy array with n + 1 rows with the length equal to the x-dimensions of zdata.
             n is the number of linecuts, i.e., abs(y_last - y_first) / y_interval.
             The last row contains the x-axis range.
         """
+        x_slice = _linetrace_slice(
+            self.x_range_idx_by_val(xstart), self.x_range_idx_by_val(xstop), 'xlinetrace')
+        y_indices = self._linetrace_series_indices(
+            y_first, y_last, y_interval, self.y_range_idx_by_val, self.ybottom, self.dy)
 
-        result_array = self.extract_xlinetrace(y_first, xstart, xstop)
-        if self.y_range_idx_by_val(y_first) == self.y_range_idx_by_val(y_last):
-            return result_array
+        return _gather_linetraces(
+            self._zdata[:, x_slice], y_indices, self.x_range[x_slice], out)
 
-        y_sign = np.sign(y_last - y_first)
-        y_pos = y_first + y_interval * y_sign
-        # For now we remove the range axis
-        result_range = result_array[1]
-        result_array = result_array[0]
+    @staticmethod
+    def _linetrace_series_indices(first, last, interval, idx_by_val, range_start, spacing):
+        """Compute the indices of a series of linetraces on one axis.
 
-        while y_pos * y_sign <= y_last * y_sign:
-            # add the next linetrace to the other linetraces
-            result_array = np.vstack((result_array, self.extract_xlinetrace(y_pos, xstart, xstop)[0]))
+        Args:
+            first (float): value on the axis of the first linetrace.
+            last (float): value on the axis of the last linetrace.
+            interval (float): the (positive) interval between two linetraces.
+            idx_by_val (function): the ``*_range_idx_by_val`` method of the axis.
+            range_start (float): the first value of the axis range.
+            spacing (float): the spacing of the axis values, negative for reversed axes.
 
-            y_pos += y_interval * y_sign
+        Returns:
+            An integer array with the indices.
+        """
+        if idx_by_val(first) == idx_by_val(last):
+            return np.array([idx_by_val(first)])
+
+        sign = np.sign(last - first)
+        # We allow for a small rounding error in the number of intervals
+        number = int(np.floor(abs(last - first) / interval + 1e-9)) + 1
+        values = first + np.arange(number) * interval * sign
 
-        return np.vstack((result_array, result_range))
+        return np.rint(np.abs(range_start - values) / abs(spacing)).astype(int)
 
-    def extract_arbitrary_linetrace(self, coordinate_one, coordinate_two):
+    def extract_arbitrary_linetrace(self, coordinate_one, coordinate_two,
+                                    num=None, interpolation='nearest', width=1):
         """Extract a linetrace between two arbitrary points.
 
+        With the default arguments, the linetrace runs between the grid points closest
+        to the two coordinates and contains the closest grid point for each step along
+        the longer (primary) axis.
+        Otherwise, the linetrace is sampled by
+        :meth:`Data.extract_arbitrary_linetraces`.
+
         Args:
             coordinate_one (tuple): coordinate in the coordinate system of the axis.
                 The order is (yval, xval)!
             coordinate_two (tuple): coordinates in the coordinate system of the
                 x and y axes. The order is (yval, xval)!
+            num (int): number of samples along the linetrace.
+            interpolation (string): 'nearest', 'bilinear' or 'cubic'.
+            width (float): width of the linetrace in pixels. The samples are averaged
+                perpendicular to the linetrace.
 
         Returns:
             Array with the linetrace. No axis range is supplied since it does not make sense
             along any arbitrary direction.
         """
+        if num is not None or interpolation != 'nearest' or width > 1:
+            return self.extract_arbitrary_linetraces(
+                [(coordinate_one, coordinate_two)], num, interpolation, width)[0]
 
         # we transform to the grid
         idx_one = self.idx_by_val_coordinate(coordinate_one)
@@ -491,17 +671,6 @@ class Data(object):
             'Coordinate one and two are equal: (y=%d, x=%d).' % (idx_one[0], idx_one[1]),\
             'Can not extract linetrace of zero length.')
 
-        # if one of the two coordinate axis has zero difference,
-        # we call the orthogonal version
-        # y axis difference is zero:
-        if idx_one[0] == idx_two[0]:
-            return self.extract_xlinetrace(
-                coordinate_one[0], coordinate_one[1], coordinate_two[1])[0]
-        # x axis difference is zero:
-        elif idx_one[1] == idx_two[1]:
-            return self.extract_ylinetrace(
-                coordinate_one[1], coordinate_one[0], coordinate_two[0])[0]
-
         # which is the primary axis of the linetrace?
         if abs(idx_one[0] - idx_two[0]) > abs(idx_one[1] - idx_two[1]):
             primary_axis_index, secondary_axis_index = (0, 1)
@@ -514,23 +683,137 @@ class Data(object):
         linetrace_size = abs(idx_two[primary_axis_index] - idx_one[primary_axis_index]) + 1
         axis_sign = np.sign(idx_two[primary_axis_index] - idx_one[primary_axis_index])
 
-        # go along primary axis and extract closest point
-        # if the primary axis is y-axis
-        if primary_axis_index == 0:
-            # dy and dx are positive: increment on both axis postive (trivial case)
-            # dy > 0, dx < 0: increment on first axis positive, slope negative -> increment
-            # on second axis negative.
-            # dy < 0, dx > 0: increment on y negative, slope negative -> dx positive
-            # dy < 0, dx < 0: increment negative, slope positive -> dx negative
-            linetrace = np.array(
-                [self.zdata[yidx + idx_one[0], int(round(yidx * linetrace_slope + idx_one[1]))]
-                 for yidx in np.arange(linetrace_size) * axis_sign])
+        # go along primary axis and take the closest point on the secondary axis
+        steps = np.arange(linetrace_size) * axis_sign
+        indices = [None, None]
+        indices[primary_axis_index] = steps + idx_one[primary_axis_index]
+        indices[secondary_axis_index] = np.rint(
+            steps * linetrace_slope + idx_one[secondary_axis_index]).astype(int)
+
+        return self._zdata[indices[0], indices[1]]
+
+    def extract_arbitrary_linetraces(self, segments, num=None, interpolation='nearest', width=1):
+        """Extract linetraces along many line segments at once.
+
+        The sample coordinates of all segments are computed as arrays and
+        the data is sampled in one pass. With 'bilinear' or 'cubic' interpolation,
+        ``scipy.ndimage.map_coordinates`` is used. Samples outside the data
+        take the value of the closest edge.
+
+        To extract a polyline through the points p0, p1, ..., pn use the
+        segments (p0, p1), (p1, p2), ..., (pn-1, pn).
+
+        Args:
+            segments (list): a sequence of segments, each given by two coordinates
+                ((yval_one, xval_one), (yval_two, xval_two)) in the coordinate system
+                of the axes.
+            num (int): number of samples along each segment, the start and end points
+                included. Default is one sample per pixel along the
+                longest extent of all segments.
+            interpolation (string): 'nearest', 'bilinear' or 'cubic'.
+            width (float): width of the linetraces in pixels. For a width larger than one,
+                about one sample per pixel is taken perpendicular to the segment
+                and the samples are averaged.
+
+        Returns:
+            A 2d array with one linetrace per row.
+        """
+        assert interpolation in _INTERPOLATION_ORDERS, \
+            'Interpolation %s not supported. Use one of %s.' % (
+                interpolation, ', '.join(sorted(_INTERPOLATION_ORDERS)))
+
+        segments = np.asarray(segments, dtype=float)
+        assert segments.ndim == 3 and segments.shape[1:] == (2, 2), \
+            'Provide segments as a sequence of coordinate pairs ((y1, x1), (y2, x2)).'
+
+        # fractional indices of the start and end points
+        # shape: (segment, axis, point)
+        points = np.empty((segments.shape[0], 2, 2))
+        points[:, 0] = ((segments[:, :, 0] - self.ybottom) / self.dy)
+        points[:, 1] = ((segments[:, :, 1] - self.xleft) / self.dx)
+        delta = points[:, :, 1] - points[:, :, 0]
+        length = np.hypot(delta[:, 0], delta[:, 1])
+        assert np.all(length > 0), 'Can not extract linetrace of zero length.'
+
+        if num is None:
+            num = int(np.ceil(np.abs(delta).max())) + 1
+
+        # the unit vector perpendicular to the segments
+        normal = np.vstack((delta[:, 1], -delta[:, 0])) / length
+        nwidth = max(1, int(round(width)))
+        offsets = np.linspace(-(width - 1) / 2., (width - 1) / 2., nwidth)
+
+        # coordinates with shape (axis, segment, offset, sample)
+        coordinates = (points[:, :, 0].T[:, :, np.newaxis, np.newaxis] +
+                       delta.T[:, :, np.newaxis, np.newaxis] *
+                       np.linspace(0., 1., num)[np.newaxis, np.newaxis, np.newaxis, :] +
+                       normal[:, :, np.newaxis, np.newaxis] *
+                       offsets[np.newaxis, np.newaxis, :, np.newaxis])
+
+        order = _INTERPOLATION_ORDERS[interpolation]
+        if order == 0:
+            yidx = np.clip(np.rint(coordinates[0]), 0, self.ywidth - 1).astype(int)
+            xidx = np.clip(np.rint(coordinates[1]), 0, self.xwidth - 1).astype(int)
+            samples = self._zdata[yidx, xidx]
         else:
-            linetrace = np.array(
-                [self.zdata[int(round(xidx * linetrace_slope + idx_one[0])), xidx + idx_one[1]]
-                 for xidx in np.arange(linetrace_size) * axis_sign])
+            from scipy.ndimage import map_coordinates
 
-        return linetrace
+            dtype = self._zdata.dtype
+            if not np.issubdtype(dtype, np.inexact):
+                dtype = np.float64
+            samples = map_coordinates(
+                self._zdata, coordinates, output=dtype, order=order, mode='nearest')
+
+        return samples.mean(axis=1) if nwidth > 1 else samples[:, 0]
+
+    def bin(self, yfactor, xfactor, method='mean', edge='trim'):
+        """Reduce the size of the array by combining blocks of values.
+
+        Each block of yfactor x xfactor values is replaced by its mean, sum,
+        maximum or minimum. The axes bounds are set to the centers of the
+        first and the last block. The array is processed in chunks of rows.
+
+        Args:
+            yfactor (int): The size of the blocks along the y-axis.
+            xfactor (int): The size of the blocks along the x-axis.
+            method (string): The reduction of the blocks, one of ``BIN_METHODS``.
+            edge (string): The incomplete blocks at the edges are dropped ('trim')
+                or reduced from the values available ('partial'). The
+                incomplete blocks are placed on the grid of the complete blocks.
+        """
+        yfactor, xfactor = int(yfactor), int(xfactor)
+        if yfactor < 1 or xfactor < 1:
+            raise ValueError('Invalid block size %s x %s.' % (yfactor, xfactor))
+        if method not in BIN_METHODS or edge not in BIN_EDGES:
+            raise ValueError('Unknown method %s or edge %s of the binning.' % (method, edge))
+        partial = edge == 'partial'
+
+        (height, width) = self.shape
+        shape = (_bin_count(height, yfactor, partial), _bin_count(width, xfactor, partial))
+        if 0 in shape:
+            raise ValueError('The data is smaller than the block size.')
+        if (height % yfactor or width % xfactor) and not partial:
+            logging.info('Binning drops %d rows and %d columns at the edges.',
+                         height % yfactor, width % xfactor)
+
+        # The type of the result is the type of the numpy reduction
+        probe = self._zdata[:1, :1]
+        dtype = {'mean': np.mean, 'sum': np.sum}.get(method, np.asarray)(probe).dtype
+        zdata = self._zdata[:height if partial else shape[0] * yfactor,
+                            :width if partial else shape[1] * xfactor]
+        rows = max(1, _BIN_CHUNK_SIZE // max(1, width * yfactor)) * yfactor
+
+        result = None
+        for start in range(0, zdata.shape[0], rows):
+            block = _bin_axis(zdata[start:start + rows], yfactor, 0, method, dtype)
+            block = _bin_axis(block, xfactor, 1, method, dtype)
+            if result is None:
+                result = np.empty(shape, dtype=dtype)
+            result[start // yfactor:start // yfactor + block.shape[0]] = block
+
+        self._yrange_bounds = _bin_bounds(self._yrange_bounds, height, yfactor, shape[0])
+        self._xrange_bounds = _bin_bounds(self._xrange_bounds, width, xfactor, shape[1])
+        self.zdata = result
 
     def resize(self, new_ywidth, new_xwidth, order=1):
         """Interpolate the array to a new, larger size.
@@ -538,11 +821,21 @@ class Data(object):
         Uses scipy.misc.imresize.
         The ranges are interpolated accordingly.
 
+        If the array is shrunk by integer factors, the blocks of values are
+        averaged instead, see :meth:`Data.bin`. The axes bounds are set to
+        the centers of the blocks.
+
         Args:
             new_ywidth (int): new dimensions along the y-axis.
             new_xwidth (int): new dimensions along the x-axis.
             order (int): order of the interpolation. See ``scipy.misc.imresize()``
         """
+        if (0 < new_ywidth <= self.ywidth and 0 < new_xwidth <= self.xwidth
+                and self.ywidth % new_ywidth == 0 and self.xwidth % new_xwidth == 0
+                and (new_ywidth, new_xwidth) != self.shape):
+            self.bin(self.ywidth // new_ywidth, self.xwidth // new_xwidth)
+            return
+
         # Check if scipy is available
         try:
             from scipy.ndimage import zoom
@@ -553,4 +846,270 @@ class Data(object):
 
         xfactor = float(new_xwidth) / self.xwidth
         yfactor = float(new_ywidth) / self.ywidth
-        self._zdata = zoom(self._zdata, (yfactor, xfactor), order=order)
+        self.zdata = zoom(self._zdata, (yfactor, xfactor), order=order)
+
+
+def _bin_count(size, factor, partial):
+    """The number of blocks along an axis."""
+    return -(-size // factor) if partial else size // factor
+
+
+def _bin_axis(zdata, factor, axis, method, dtype):
+    """Reduce the blocks of factor rows (axis 0) or columns (axis 1).
+
+    The i-th values of all blocks are combined at once (strided slices),
+    an incomplete last block is reduced from the values available.
+    """
+    if factor == 1:
+        return zdata.astype(dtype, copy=False)
+
+    def part(index):
+        """The index-th values of the blocks."""
+        return zdata[index::factor] if axis == 0 else zdata[:, index::factor]
+
+    size = zdata.shape[axis]
+    ufunc = _BIN_UFUNCS[method]
+    result = part(0).astype(dtype)
+    for index in range(1, min(factor, size)):
+        values = part(index)
+        count = values.shape[axis]
+        target = result[:count] if axis == 0 else result[:, :count]
+        ufunc(target, values, out=target)
+
+    if method == 'mean':
+        counts = np.minimum(size - factor * np.arange(result.shape[axis]), factor)
+        result /= counts[:, np.newaxis] if axis == 0 else counts
+    return result
+
+
+def _bin_bounds(bounds, size, factor, count):
+    """The bounds of an axis after the binning: the centers of the first and the last block.
+
+    Args:
+        bounds (tuple): The bounds of the axis.
+        size (int): The number of values along the axis.
+        factor (int): The size of the blocks.
+        count (int): The number of blocks.
+
+    Returns:
+        A tuple of floats.
+    """
+    if size < 2:
+        return bounds
+    step = (bounds[1] - bounds[0]) / float(size - 1)
+    first = bounds[0] + step * (factor - 1) / 2.
+    return (first, first + step * factor * (count - 1))
+
+
+def _array_statistics(array):
+    """Compute the statistics of an array in a single pass.
+
+    The array is processed in chunks of rows, all quantities are computed
+    from a chunk while it is in the cache.
+
+    Returns:
+        A dictionary, see :attr:`Data.statistics`.
+    """
+    floating = array.dtype.kind in 'fc'
+    rows = max(1, _STATS_CHUNK_SIZE // max(1, array.shape[1]))
+
+    nanmins, nanmaxs, nansum, nan_count = [], [], 0., 0
+    for start in range(0, array.shape[0], rows):
+        block = array[start:start + rows]
+        if not block.size:
+            continue
+        block_nans = int(np.count_nonzero(np.isnan(block))) if floating else 0
+        if block_nans == block.size:
+            nan_count += block_nans
+            continue
+        if block_nans:
+            nanmins.append(np.nanmin(block))
+            nanmaxs.append(np.nanmax(block))
+            nansum += np.nansum(block, dtype=np.float64)
+        else:
+            nanmins.append(block.min())
+            nanmaxs.append(block.max())
+            nansum += block.sum(dtype=np.float64)
+        nan_count += block_nans
+
+    stats = {'nan_count': nan_count}
+    if nanmins:
+        stats['nanmin'] = min(nanmins)
+        stats['nanmax'] = max(nanmaxs)
+        stats['nanmean'] = nansum / (array.size - nan_count)
+    else:
+        # empty or all NaN
+        stats['nanmin'] = stats['nanmax'] = stats['nanmean'] = np.nan
+
+    for name in ['min', 'max', 'mean']:
+        stats[name] = np.nan if nan_count else stats['nan' + name]
+
+    return stats
+
+
+class LazyData(Data):
+    """
+    A :class:`colorview2d.Data` that reads its array when it is first needed.
+
+    The data is provided by a loader, a callable that returns a 2d
+    :class:`numpy.ndarray` or a :class:`colorview2d.Data`, or by the path to a
+    data file. For binary colorview2d data files (see
+    :func:`colorview2d.fileloaders.save_cv2dfile`), the shape and the axes
+    bounds are read from the header, the array is memory-mapped on first access.
+    Other files are loaded with :func:`colorview2d.fileloaders.load_gpfile`.
+
+    The shape and the axes bounds are available without loading the array
+    if they are known from the header or specified on creation.
+    Copies of an unloaded object share the loader and the array is read only once.
+    The loaded array is read-only, see :meth:`Data.writable_zdata`.
+    """
+
+    def __init__(self, source, shape=None, range_bounds=None):
+        """Initialize a lazy data object.
+
+        Args:
+            source (callable or string): a loader or the path to a data file.
+            shape (tuple): the shape of the array (y-dimension, x-dimension), if known.
+            range_bounds (tuple of tuples): y-range boundaries as a tuple (bottom, top),
+                                            x-range boundaries as a tuple (left, right)
+        """
+        if isinstance(source, str):
+            import colorview2d.fileloaders as fileloaders
+
+            path = source
+            if fileloaders.is_cv2dfile(path):
+                header = fileloaders.read_cv2dheader(path)
+                shape = header['shape']
+                if range_bounds is None:
+                    range_bounds = (header['yrange_bounds'], header['xrange_bounds'])
+                source = lambda: fileloaders.load_cv2dfile(path)
+            else:
+                source = lambda: fileloaders.load_gpfile(path)
+
+        self._source = _LazySource(source)
+        self._shape = tuple(shape) if shape is not None else None
+
+        if range_bounds is not None:
+            self.xrange_bounds = range_bounds[1]
+            self.yrange_bounds = range_bounds[0]
+
+    def __getattr__(self, name):
+        """Load the array when the array or the axes bounds are first accessed."""
+        if name in ('_zdata', '_xrange_bounds', '_yrange_bounds') and '_source' in self.__dict__:
+            self._load()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    @property
+    def loaded(self):
+        """Boolean. Has the array been read?"""
+        return '_zdata' in self.__dict__
+
+    @property
+    def shape(self):
+        """Shape of the 2d :class:`numpy.ndarray`. Read from the header if available."""
+        if not self.loaded and self._shape is not None:
+            return self._shape
+        return self._zdata.shape
+
+    def deep_copy(self):
+        """
+        Copy the :class:`colorview2d.LazyData` object and return the copy.
+        If the array is not loaded yet, the copy shares the loader.
+
+        Returns:
+            A copy of the :class:`Colorview2d.LazyData` instance.
+        """
+        if not self.loaded:
+            return copy.copy(self)
+        return Data.deep_copy(self)
+
+    def shallow_copy(self):
+        """
+        Copy the :class:`colorview2d.LazyData` object without copying the array.
+        If the array is not loaded yet, the copy shares the loader.
+
+        Returns:
+            A copy of the :class:`Colorview2d.LazyData` instance.
+        """
+        if not self.loaded:
+            return copy.copy(self)
+        return Data.shallow_copy(self)
+
+    def _load(self):
+        """Obtain the array from the loader."""
+        array, range_bounds = self._source.load()
+        assert self._shape is None or array.shape == self._shape, \
+            'Loaded array has shape %s, expected %s.' % (array.shape, self._shape)
+        self.zdata = array
+
+        if '_xrange_bounds' not in self.__dict__:
+            if range_bounds is None:
+                range_bounds = ((0., float(array.shape[0] - 1)),
+                                (0., float(array.shape[1] - 1)))
+            self.xrange_bounds = range_bounds[1]
+            self.yrange_bounds = range_bounds[0]
+
+
+class _LazySource(object):
+    """The loader of a :class:`colorview2d.LazyData`, shared between copies.
+    The loader is called once, its result is kept."""
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._result = None
+
+    def load(self):
+        """Return the read-only array and the axes bounds (or None) of the loader result."""
+        if self._result is None:
+            result = self._loader()
+            range_bounds = None
+            if isinstance(result, Data):
+                range_bounds = (result.yrange_bounds, result.xrange_bounds)
+                result = result.zdata
+            array = result.view()
+            array.flags.writeable = False
+            self._result = (array, range_bounds)
+            self._loader = None
+
+        return self._result
+
+
+def _linetrace_slice(start_idx, stop_idx, name):
+    """A slice from start_idx to stop_idx (including) in either direction.
+
+    Args:
+        start_idx (int): index of the first element.
+        stop_idx (int): index of the last element.
+        name (string): name of the linetrace for the error message.
+    """
+    assert start_idx != stop_idx,\
+        'Startindex and stopindex %d are equal for %s.' % (start_idx, name)
+
+    if stop_idx > start_idx:
+        return slice(start_idx, stop_idx + 1)
+    return slice(start_idx, stop_idx - 1 if stop_idx > 0 else None, -1)
+
+
+def _gather_linetraces(array, indices, axis_range, out=None):
+    """Gather the rows of array given by indices and append the axis range.
+
+    Args:
+        array (numpy.ndarray): 2d array with the linetraces in its rows.
+        indices (numpy.ndarray): the indices of the rows.
+        axis_range (numpy.ndarray): the axis range, the last row of the result.
+        out (numpy.ndarray): optional array to store the result in.
+
+    Returns:
+        a numpy array with the linetraces and the axis range in the last row.
+    """
+    shape = (indices.size + 1, array.shape[1])
+    if out is None:
+        out = np.empty(shape, dtype=np.result_type(array.dtype, axis_range.dtype))
+    assert out.shape == shape, \
+        'The out array has shape %s, expected %s.' % (out.shape, shape)
+
+    np.take(array, indices, axis=0, out=out[:-1])
+    out[-1] = axis_range
+
+    return out
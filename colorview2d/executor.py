@@ -0,0 +1,209 @@
+"""
+Execution of the mods of the pipeline.
+
+The :class:`Executor` of a :class:`colorview2d.View` applies mods that
+declare a capability (see :class:`colorview2d.IMod`) more efficiently
+than by calling their ``do_apply`` method on the whole array:
+
+- A run of consecutive *elementwise* mods (e.g. Scale, Absolute, Log) is
+  fused into a single pass over the array. The array is processed in
+  blocks that fit into the CPU cache; each mod writes its result into the
+  block of the output array (``out=``), so no full-size temporaries are
+  created. The peak memory is the input plus the output array.
+- A *tileable* mod (e.g. Smooth, Median) is applied to overlapping strips
+  of rows on a pool of threads. Each strip is extended by the halo of
+  the mod, i.e., the rows its result depends on, and only the inner rows
+  of the result are kept. The result is identical to the result of the
+  mod applied to the whole array. The filters of scipy.ndimage release
+  the GIL, so the strips are processed in parallel.
+
+Mods without such a capability are left to :meth:`colorview2d.IMod.apply`.
+
+Out-of-core execution
+---------------------
+
+If a memory budget is set, arrays larger than the budget are processed
+out-of-core: the results are written to memory-mapped temporary files,
+and the tiled execution uses strips (with halo) small enough that the
+strips processed at once fit into the budget. Elementwise mods need no
+halo. *Geometric* mods (Rotate, Flip, Crop) only remap the indices,
+their results are views of the (memory-mapped) array. Other mods load
+the whole array into memory, a warning is logged.
+
+Example
+-------
+::
+
+    executor = Executor()
+    if not executor.execute([(scale, (2.,)), (log, ())], data):
+        # apply the mods one by one
+        ...
+
+"""
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# The number of array elements in a block of the fused elementwise pass
+# (512 KiB of float64).
+BLOCK_SIZE = 2**16
+
+# The minimum number of array elements in a strip of the tiled execution.
+# Smaller arrays are not split.
+TILE_SIZE = 2**18
+
+# The memory needed by a neighbourhood filter applied out-of-core,
+# in units of the size of its input strip (the input, the result
+# and temporary arrays of the filter)
+FILTER_MEMORY_FACTOR = 4
+
+
+class Executor(object):
+    """
+    Applies runs of mods of the pipeline to the data.
+
+    Args:
+        block_size (int): The number of array elements processed at
+            once by the fused elementwise pass.
+        max_workers (int): The number of threads of the tiled execution.
+            Defaults to the number of CPUs. Use 1 to disable the tiling.
+        tile_size (int): The minimum number of array elements in a strip
+            of the tiled execution.
+        memory_budget (int): The memory (in bytes) available for the results
+            and the temporary arrays. Larger arrays are processed out-of-core.
+            None (default) for no limit.
+        tempdir (string): The directory of the memory-mapped results.
+            Defaults to the temporary directory of the system.
+    """
+
+    def __init__(self, block_size=BLOCK_SIZE, max_workers=None, tile_size=TILE_SIZE,
+                 memory_budget=None, tempdir=None):
+        self.block_size = block_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.tile_size = tile_size
+        self.memory_budget = memory_budget
+        self.tempdir = tempdir
+
+    def out_of_core(self, nbytes):
+        """Boolean. Is an array of nbytes bytes larger than the memory budget?"""
+        return self.memory_budget is not None and nbytes > self.memory_budget
+
+    def execute(self, run, data):
+        """Apply a run of mods to the data, if possible.
+
+        Args:
+            run (list): A list of (mod, modargs) tuples.
+            data (colorview2d.Data): The data, its array is replaced by the result.
+
+        Returns:
+            True if the mods are applied. False if the mods can not be handled by the
+            executor or failed, the data is unchanged in this case and the mods have
+            to be applied one by one (see :meth:`colorview2d.IMod.apply`).
+        """
+        if run and all(mod.elementwise for mod, _ in run):
+            return self._execute_elementwise(run, data)
+        if len(run) == 1 and run[0][0].tileable:
+            if self._execute_tiled(run[0][0], run[0][1], data):
+                return True
+        if self.out_of_core(data.zdata.nbytes) and not all(mod.geometric for mod, _ in run):
+            logging.warning('Mods %s can not be applied out-of-core, '
+                            'the array is loaded into memory.', [mod.title for mod, _ in run])
+        return False
+
+    def _allocate(self, shape, dtype):
+        """Return an array for a result. Memory-mapped if it exceeds the memory budget."""
+        dtype = np.dtype(dtype)
+        if not self.out_of_core(int(np.prod(shape)) * dtype.itemsize):
+            return np.empty(shape, dtype=dtype)
+        # The file is removed when the array is no longer used
+        logging.info('Writing a result of shape %s to a temporary file.', shape)
+        return np.memmap(tempfile.TemporaryFile(dir=self.tempdir), dtype=dtype,
+                         mode='w+', shape=shape)
+
+    def _execute_elementwise(self, run, data):
+        """Apply a run of elementwise mods in a single blockwise pass."""
+        zdata = data.zdata
+        try:
+            # The type of the result is found by applying the mods to a single element
+            probe = zdata[:1, :1]
+            for mod, modargs in run:
+                probe = mod.apply_array(probe, modargs)
+            out = self._allocate(zdata.shape, probe.dtype)
+
+            rows = max(1, self.block_size // max(1, zdata.shape[1]))
+            for start in range(0, zdata.shape[0], rows):
+                block = zdata[start:start + rows]
+                out_block = out[start:start + rows]
+                for mod, modargs in run:
+                    mod.apply_array(block, modargs, out=out_block)
+                    block = out_block
+        except (ValueError, TypeError, MemoryError) as error:
+            logging.info('Fused application of mods %s failed: %s',
+                         [mod.title for mod, _ in run], error)
+            return False
+
+        data.zdata = out
+        return True
+
+    def _strips(self, shape, halo, itemsize=8):
+        """Return the (start, stop) rows of the strips of an array and the number of threads.
+
+        Out-of-core, the strips extended by the halo fit into the memory budget.
+        Otherwise, there is a strip per thread and the list is empty
+        if the array is not worth splitting.
+        """
+        height, width = shape
+        if self.out_of_core(height * width * itemsize):
+            row_bytes = FILTER_MEMORY_FACTOR * width * max(itemsize, 8)
+            workers = max(1, min(self.max_workers,
+                                 self.memory_budget // (row_bytes * (1 + 2 * halo))))
+            rows = self.memory_budget // (row_bytes * workers) - 2 * halo
+            if rows < 1:
+                logging.warning('The memory budget is too small for the halo of %d rows.', halo)
+                rows = 1
+        else:
+            nstrips = min(self.max_workers, (height * width) // max(1, self.tile_size))
+            # Strips thinner than the halo would mostly compute the halo
+            nstrips = min(nstrips, height // max(1, halo))
+            if nstrips < 2:
+                return ([], 1)
+            rows = -(-height // nstrips)
+            workers = nstrips
+
+        strips = [(start, min(start + rows, height)) for start in range(0, height, rows)]
+        return (strips, min(workers, len(strips)))
+
+    def _execute_tiled(self, mod, modargs, data):
+        """Apply a tileable mod to overlapping strips of rows in parallel."""
+        zdata = data.zdata
+        try:
+            halo = mod.halo(modargs)
+            if halo is None:
+                return False
+            halo = int(halo[0])
+            strips, workers = self._strips(zdata.shape, halo, zdata.itemsize)
+            if not strips:
+                return False
+
+            # The type of the result is found by applying the mod to a single element
+            out = self._allocate(zdata.shape, mod.apply_array(zdata[:1, :1], modargs).dtype)
+
+            def apply_strip(strip):
+                """Apply the mod to a strip extended by the halo and keep the inner rows."""
+                start, stop = strip
+                first, last = max(0, start - halo), min(zdata.shape[0], stop + halo)
+                result = mod.apply_array(zdata[first:last], modargs)
+                out[start:stop] = result[start - first:stop - first]
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # result() re-raises the exceptions of the threads
+                for future in [pool.submit(apply_strip, strip) for strip in strips]:
+                    future.result()
+        except (ValueError, TypeError, MemoryError, RuntimeError) as error:
+            logging.info('Tiled application of mod %s failed: %s', mod.title, error)
+            return False
+
+        data.zdata = out
+        return True
@@ -13,8 +13,27 @@ A fileloader load_* method creates and returns a data object.
 A fileloader save_* method creates a file from a data object.
 """
 
+import os
+import logging
+import struct
+import warnings
 import numpy as np
+import yaml
 import colorview2d
+import colorview2d.utils as utils
+
+# Approximate number of bytes read from a gnuplot file at once.
+GP_CHUNK_BYTES = 2**24
+
+# The first bytes of a binary colorview2d data file.
+CV2D_MAGIC = b'CV2DDATA'
+# Version of the binary colorview2d data file format.
+CV2D_VERSION = 1
+# The array data in a binary colorview2d data file starts at a multiple of CV2D_ALIGN bytes.
+CV2D_ALIGN = 4096
+# Approximate number of bytes written to a binary colorview2d data file at once.
+CV2D_CHUNK_BYTES = 2**26
+
 
 def load_gpfile(path, columns=None):
     """
@@ -33,6 +52,12 @@ def load_gpfile(path, columns=None):
                Only the first and last block is used for the x-axis range and
                the first and the last line of the first block is used for the y-axis.
 
+    The file is streamed in chunks of about ``GP_CHUNK_BYTES``. The block size is
+    obtained from the first block, i.e., the lines before the first blank line
+    or, without blank lines, before the value in the first column changes.
+    The data is filled into a preallocated array block by block. Lines with
+    an unusable number of columns are skipped, an incomplete last block is dropped.
+
     Args:
         path (string): Path to the gnuplot-style datafile.
         columns (tuple): A triple of integers specifying the three columns to use.
@@ -42,49 +67,133 @@ def load_gpfile(path, columns=None):
     if columns is None:
         columns = (0, 1, 2)
 
-    data = np.genfromtxt(path, usecols=columns, invalid_raise=False)
+    with open(path) as fhand:
+        # The first block is the primer. We read it line by line
+        # until the first blank line, at most about GP_CHUNK_BYTES.
+        first_lines = []
+        nchars = 0
+        separated = False
+        while nchars < GP_CHUNK_BYTES:
+            line = fhand.readline()
+            if not line:
+                break
+            nchars += len(line)
+            if line.strip():
+                first_lines.append(line)
+            elif any(_gpline_content(first_line) for first_line in first_lines):
+                separated = True
+                break
+        nlines = len(first_lines)
+        pending = _parse_gplines(first_lines, columns)
+        del first_lines
 
-    # If the array only consists of a single line we reshape explicitly
-    # to 2d array
-    if len(data.shape) == 1:
-        data.shape = (1, 3)
+        # If the blocks are not separated by blank lines, the block
+        # ends where the value in the first column changes.
+        # We read on in chunks until the end of the first block is found.
+        changes = np.flatnonzero(pending[1:, 0] != pending[:-1, 0])
+        while not separated and not changes.size:
+            lines = fhand.readlines(GP_CHUNK_BYTES)
+            if not lines:
+                break
+            nchars += sum(len(line) for line in lines)
+            nlines += len(lines)
+            pending = np.concatenate((pending, _parse_gplines(lines, columns)))
+            changes = np.flatnonzero(pending[1:, 0] != pending[:-1, 0])
 
-    nlines = data.shape[0]
+        assert pending.shape[0] > 0, 'No data found in file %s.' % path
+        bsize = changes[0] + 1 if changes.size else pending.shape[0]
 
-    bsize = 1
+        # We estimate the number of blocks from the file size
+        # and grow the array if necessary.
+        lines_estimate = os.path.getsize(path) * nlines // max(nchars, 1)
+        zdata = np.empty((lines_estimate // bsize + 1, bsize))
+        first_block = pending[:bsize].copy()
+        bnum = 0
+        xright = first_block[0, 0]
 
-    # Note that the first block is the primer.
-    # If the data structure of the first block is not equal to
-    # the other blocks, we can not continue.
-    for i in range(1, data.shape[0]):
-        if data[i,0] != data[i-1,0]:
-            bsize = i
-            break
+        while True:
+            nblocks = pending.shape[0] // bsize
+            if nblocks:
+                blocks = pending[:nblocks * bsize].reshape(nblocks, bsize, 3)
+                _check_gpblocks(blocks, first_block, bnum, path)
 
-    bnum = nlines // bsize
-    lnum = bsize * bnum
-
-    # Check integrity
-    # first column, the same value has to appear within each block
-    for blocknum in range(1, bnum):
-        assert np.all(data[blocknum * bsize:(blocknum + 1) * bsize, 0] == data[blocknum * bsize, 0]), \
-            "First column of file %s is corrupt in block %d." % (path, blocknum)
-
-    # second column, the same range has to appear for each block
-    for blocknum in range(bnum):
-        assert np.all(data[blocknum * bsize:(blocknum + 1) * bsize, 1] == data[:bsize, 1]), \
-            "Second column of file %s is corrupt in block %d." % (path, blocknum)
+                if bnum + nblocks > zdata.shape[0]:
+                    zdata.resize((2 * (bnum + nblocks), bsize), refcheck=False)
+                zdata[bnum:bnum + nblocks] = blocks[:, :, 2]
+                xright = blocks[-1, 0, 0]
+                bnum += nblocks
+                pending = pending[nblocks * bsize:]
 
-    # Store the data
+            lines = fhand.readlines(GP_CHUNK_BYTES)
+            if not lines:
+                break
+            pending = np.concatenate((pending, _parse_gplines(lines, columns)))
 
-    zdata = np.resize(data[:lnum, 2], (bnum, bsize)).T
-    # xyrange = (data[bsize - 1::bsize, 0], data[:bsize, 1])
+    zdata.resize((bnum, bsize), refcheck=False)
 
     # the first and the last block define the x-range
-    xleft, xright = (data[0, 0], data[-1, 0])
+    xleft = first_block[0, 0]
     # the first and the last line of the first block in the second column define the y-range
-    ybottom, ytop = (data[0, 1], data[bsize-1, 1])
-    return colorview2d.Data(zdata, ((ybottom, ytop), (xleft, xright)))
+    ybottom, ytop = (first_block[0, 1], first_block[-1, 1])
+    return colorview2d.Data(zdata.T, ((ybottom, ytop), (xleft, xright)))
+
+
+def _gpline_content(line):
+    """Strip comments and whitespace from a line of a gnuplot file."""
+    return line.split('#', 1)[0].strip()
+
+
+def _parse_gplines(lines, columns):
+    """Parse lines of a gnuplot file into an array with three columns.
+
+    Blank lines and comments are ignored. Lines which do not contain
+    the requested columns are skipped.
+
+    Args:
+        lines (list): The lines of text.
+        columns (tuple): The three columns to use.
+
+    Returns:
+        A 2d :class:`numpy.ndarray` of shape (number of lines, 3).
+    """
+    try:
+        with warnings.catch_warnings():
+            # empty input is fine
+            warnings.simplefilter('ignore', UserWarning)
+            return np.loadtxt(lines, usecols=columns, ndmin=2).reshape(-1, 3)
+    except ValueError:
+        pass
+
+    # Some lines are broken, we parse line by line and skip them.
+    rows = []
+    for line in lines:
+        values = _gpline_content(line).split()
+        try:
+            rows.append([float(values[column]) for column in columns])
+        except (IndexError, ValueError):
+            if values:
+                logging.info('Skipping line "%s".', line.strip())
+    return np.array(rows, dtype=float).reshape(-1, 3)
+
+
+def _check_gpblocks(blocks, first_block, bnum, path):
+    """Check the integrity of consecutive blocks of a gnuplot file.
+
+    Args:
+        blocks (numpy.ndarray): array of shape (number of blocks, block size, 3).
+        first_block (numpy.ndarray): the first block of the file.
+        bnum (int): the number of the first block in the file.
+        path (string): the path to the file.
+    """
+    # first column, the same value has to appear within each block
+    corrupt = np.flatnonzero(np.any(blocks[:, :, 0] != blocks[:, :1, 0], axis=1))
+    assert corrupt.size == 0, \
+        "First column of file %s is corrupt in block %d." % (path, bnum + corrupt[0])
+
+    # second column, the same range has to appear for each block
+    corrupt = np.flatnonzero(np.any(blocks[:, :, 1] != first_block[:, 1], axis=1))
+    assert corrupt.size == 0, \
+        "Second column of file %s is corrupt in block %d." % (path, bnum + corrupt[0])
 
 
 def save_gpfile(fname, data, comment=""):
@@ -94,22 +203,143 @@ def save_gpfile(fname, data, comment=""):
     Args:
         fname (string): The filename of the ASCII file to contain the data.
         data (colorview2d.Data): The data.
-        comment (string): A comment on the data.
+        comment (string): A comment on the data. Written as comment lines (``#``)
+                          at the top of the file.
+    """
+    x_range, y_range = data.x_range, data.y_range
+    with open(fname, 'w') as fhand:
+        for line in comment.splitlines():
+            fhand.write('# %s\n' % line)
+
+        for i in range(data.xwidth):
+            np.savetxt(
+                fhand, np.vstack(
+                    (x_range[i] * np.ones(data.ywidth),
+                     y_range,
+                     data.zdata[:, i])).T)
+            fhand.write("\n")
+
+
+def save_cv2dfile(fname, data, config=None, pipeline=None):
+    """
+    Saves a data to a binary colorview2d data file.
+
+    The file starts with the magic bytes ``CV2DDATA``, followed by the
+    length of the header (unsigned 64 bit integer, little endian) and
+    the header itself, a YAML document containing the shape, the dtype
+    and the axes bounds of the data.
+    The raw array (C order) follows the header at an offset that is a
+    multiple of ``CV2D_ALIGN`` bytes.
+
+    Optionally, the configuration and the pipeline of a
+    :class:`colorview2d.View` are stored in the header. They are restored
+    when the file is given to ``View.load_config``.
+
+    Args:
+        fname (string): The filename of the binary file to contain the data.
+        data (colorview2d.Data): The data.
+        config (dict): The configuration of a view, e.g., ``myview.config.dict``.
+        pipeline (list): The pipeline of a view, e.g., ``myview.pipeline``.
     """
+    zdata = data.zdata
+    header = {'version': CV2D_VERSION,
+              'dtype': zdata.dtype.str,
+              'shape': list(zdata.shape),
+              'xrange_bounds': list(data.xrange_bounds),
+              'yrange_bounds': list(data.yrange_bounds)}
+    if config is not None:
+        # numpy scalars, e.g. colorbar limits set by the sliders, as Python values
+        header['config'] = utils.plain_values(config)
+    if pipeline is not None:
+        header['pipeline'] = repr(pipeline)
+
+    header_bytes = yaml.safe_dump(header).encode('utf-8')
+    offset = len(CV2D_MAGIC) + 8 + len(header_bytes)
+    offset += -offset % CV2D_ALIGN
 
-    fh = open(fname, 'wb')
+    with open(fname, 'wb') as fhand:
+        fhand.write(CV2D_MAGIC)
+        fhand.write(struct.pack('<Q', len(header_bytes)))
+        fhand.write(header_bytes)
+        fhand.write(b'\0' * (offset - fhand.tell()))
 
-    fh.write(comment + "\n")
+        # We write the array in chunks of rows to avoid a copy of
+        # non-contiguous (e.g. memory-mapped) arrays.
+        rows = max(1, CV2D_CHUNK_BYTES // max(zdata.itemsize * zdata.shape[1], 1))
+        for row in range(0, zdata.shape[0], rows):
+            fhand.write(np.ascontiguousarray(zdata[row:row + rows]).tobytes())
 
-    for i in range(data.xwidth):
-        np.savetxt(
-            fh, np.vstack(
-                (data.x_range[i] * np.ones(data.ywidth),
-                 data.y_range,
-                 data.zdata[:, i])).T)
-        fh.write("\n")
 
-    fh.close()
+def is_cv2dfile(path):
+    """Check if the file is a binary colorview2d data file.
+
+    Args:
+        path (string): Path to the file.
+
+    Returns:
+        a boolean.
+    """
+    with open(path, 'rb') as fhand:
+        return fhand.read(len(CV2D_MAGIC)) == CV2D_MAGIC
+
+
+def read_cv2dheader(path):
+    """
+    Read the header of a binary colorview2d data file.
+    The array data is not read.
 
+    Args:
+        path (string): Path to the binary colorview2d data file.
+
+    Returns:
+        The header dictionary with the keys ``shape``, ``dtype``,
+        ``xrange_bounds``, ``yrange_bounds`` and ``offset``.
+        If stored in the file, ``config`` contains the configuration dictionary and
+        ``pipeline`` the pipeline list.
+    """
+    from ast import literal_eval
+
+    with open(path, 'rb') as fhand:
+        assert fhand.read(len(CV2D_MAGIC)) == CV2D_MAGIC, \
+            'File %s is not a binary colorview2d data file.' % path
+        header_size = struct.unpack('<Q', fhand.read(8))[0]
+        header = yaml.safe_load(fhand.read(header_size).decode('utf-8'))
+
+    assert header['version'] <= CV2D_VERSION, \
+        'File %s has an unknown format version %d.' % (path, header['version'])
+
+    offset = len(CV2D_MAGIC) + 8 + header_size
+    header['offset'] = offset + (-offset % CV2D_ALIGN)
+    header['shape'] = tuple(header['shape'])
+    if 'pipeline' in header:
+        header['pipeline'] = literal_eval(header['pipeline'])
+
+    return header
+
+
+def load_cv2dfile(path, mmap_mode='r'):
+    """
+    Load a binary colorview2d data file.
+
+    The array is opened with :class:`numpy.memmap`, i.e., the file
+    is opened without reading the data and only the pages that are
+    accessed are read from disk.
+
+    Args:
+        path (string): Path to the binary colorview2d data file.
+        mmap_mode (string): The mode of the memory map, see :class:`numpy.memmap`.
+                            Use ``None`` to read the whole array into memory.
+    """
+    header = read_cv2dheader(path)
 
+    if mmap_mode is None:
+        with open(path, 'rb') as fhand:
+            fhand.seek(header['offset'])
+            zdata = np.fromfile(fhand, dtype=header['dtype'],
+                                count=int(np.prod(header['shape'])))
+        zdata = zdata.reshape(header['shape'])
+    else:
+        zdata = np.memmap(path, dtype=header['dtype'], mode=mmap_mode,
+                          offset=header['offset'], shape=header['shape'])
 
+    return colorview2d.Data(zdata, (header['yrange_bounds'], header['xrange_bounds']))
@@ -0,0 +1,107 @@
+"""
+Gaussian filter with an automatic choice of the backend.
+
+The cost of :func:`scipy.ndimage.gaussian_filter` grows with the width of
+the kernel, which is truncated at four standard deviations. For large
+standard deviations, :func:`gaussian_filter` convolves the array with the
+same kernel via FFT, at a cost independent of the width. The array is
+extended like in scipy (mode 'reflect'), the result agrees with scipy
+up to rounding errors. The spectra of the kernels are cached.
+
+Example
+-------
+::
+
+    from colorview2d.gaussian import gaussian_filter
+
+    background = gaussian_filter(zdata, (200., 200.))
+
+"""
+import functools
+import numpy as np
+import scipy.fft
+import scipy.ndimage
+
+# The minimum standard deviation (in pixels) for the FFT backend
+FFT_MIN_SIGMA = 10.
+
+# The number of array elements processed at once by the FFT backend
+CHUNK_SIZE = 2**22
+
+# The kernel is truncated at TRUNCATE standard deviations, as in scipy
+TRUNCATE = 4.
+
+
+def radius(sigma):
+    """The radius of the truncated kernel for a standard deviation."""
+    return int(TRUNCATE * float(sigma) + 0.5)
+
+
+def backend(sigma):
+    """The backend used for a standard deviation: 'direct' or 'fft'."""
+    return 'fft' if sigma >= FFT_MIN_SIGMA else 'direct'
+
+
+def gaussian_filter(zdata, sigma):
+    """Apply a gaussian filter to a 2d array.
+
+    The axes with a standard deviation of at least FFT_MIN_SIGMA
+    are filtered via FFT, the others by :func:`scipy.ndimage.gaussian_filter`.
+    Integer arrays are always left to scipy.
+
+    Args:
+        zdata (numpy.ndarray): The 2d array.
+        sigma (tuple): The standard deviations (rows, columns) or a single float.
+
+    Returns:
+        The filtered :class:`numpy.ndarray` of the type of zdata.
+    """
+    sigmas = np.broadcast_to(np.asarray(sigma, dtype=float), (2,))
+    if (zdata.ndim != 2 or zdata.dtype.kind != 'f'
+            or all(backend(item) == 'direct' for item in sigmas)):
+        return scipy.ndimage.gaussian_filter(zdata, sigma)
+
+    # scipy filters the axes one after another, in order
+    result = zdata
+    for axis, item in enumerate(sigmas):
+        if backend(item) == 'fft':
+            result = _fft_gaussian1d(result, item, axis)
+        elif item > 0:
+            result = scipy.ndimage.gaussian_filter1d(result, item, axis=axis)
+    return result
+
+
+def _fft_gaussian1d(zdata, sigma, axis):
+    """Convolve the array with a gaussian kernel along an axis via FFT."""
+    size = zdata.shape[axis]
+    kernel_radius = radius(sigma)
+    length = scipy.fft.next_fast_len(size + 4 * kernel_radius, real=True)
+    spectrum = _kernel_spectrum(sigma, length)
+
+    # the lines along the axis are processed in chunks
+    lines = zdata if axis == 1 else zdata.T
+    result = np.empty(lines.shape, dtype=zdata.dtype)
+    chunk = max(1, CHUNK_SIZE // max(1, length))
+    for start in range(0, lines.shape[0], chunk):
+        # 'symmetric' in numpy is the 'reflect' mode of scipy.ndimage
+        padded = np.pad(lines[start:start + chunk], ((0, 0), (kernel_radius, kernel_radius)),
+                        mode='symmetric')
+        convolved = scipy.fft.irfft(scipy.fft.rfft(padded, length, axis=1) * spectrum,
+                                    length, axis=1)
+        result[start:start + chunk] = convolved[:, 2 * kernel_radius:2 * kernel_radius + size]
+
+    return result if axis == 1 else result.T
+
+
+@functools.lru_cache(maxsize=16)
+def _kernel_spectrum(sigma, length):
+    """The spectrum of the truncated, normalized gaussian kernel (as in scipy)
+    for a transform of the given length. Read-only."""
+    kernel_radius = radius(sigma)
+    offsets = np.arange(-kernel_radius, kernel_radius + 1, dtype=float)
+    kernel = np.exp(-0.5 / sigma**2 * offsets**2)
+    kernel /= kernel.sum()
+
+    spectrum = scipy.fft.rfft(kernel, length)
+    spectrum.flags.writeable = False
+    return spectrum
@@ -16,12 +16,45 @@ class IMod(object):
     The interface class is an abstract base class.
     At present, none of the methods have to be overwritten, though.
 
+    A mod is instantiated once per process and the instance is shared
+    by all views. A mod should therefore not store any state
+    that depends on the data or the arguments it is applied with.
+
+    A mod can declare capabilities that allow the
+    :class:`colorview2d.executor.Executor` to apply it more efficiently:
+
+    - ``elementwise = True``: Each value of the result depends only on the
+      value at the same position of the array, the shape of the array and
+      the axes bounds are unchanged. The mod implements
+      :meth:`IMod.apply_array` with support for the ``out`` argument.
+    - ``tileable = True``: Each row of the result depends only on the rows of
+      the array within the distance returned by :meth:`IMod.halo`, the shape
+      of the array and the axes bounds are unchanged. The mod implements
+      :meth:`IMod.apply_array`. The result of the mod applied to a part of
+      the array must not depend on the size of the part.
+    - ``geometric = True``: The mod only changes the indexing of the array
+      (e.g. a rotation or a subset), the resulting array is a view and no
+      values are read. It can be applied to memory-mapped arrays as is.
+
+    The ``version`` of a mod is part of the keys of the persistent cache
+    (see :class:`colorview2d.cache.DiskCache`). Increase it when the
+    results of the mod change, cached results of older versions are not used.
+
     Args:
         title (string): Title string of the plugin. Usually equal to the
                   plugin/module name.
         default_args (tuple): A default set of arguments that works with the apply function.
     """
     __meta__ = abc.ABCMeta
+
+    # Capabilities of the mod, see above
+    elementwise = False
+    tileable = False
+    geometric = False
+
+    # The version of the results of the mod, see above
+    version = 0
+
     def __init__(self):
         """
         The init function should be called by the plugin implementation
@@ -33,10 +66,44 @@ class IMod(object):
         logging.info('Mod %s is initialized.' % self.title)
 
         
+    def apply_array(self, zdata, modargs, out=None):
+        """
+        Apply the mod to a 2d array. Has to be implemented by mods with
+        the elementwise or the tileable capability.
+
+        Args:
+            zdata (numpy.ndarray): The 2d array (or a block of it). Do not modify it.
+            modargs (tuple): the arguments required to apply the mod.
+            out (numpy.ndarray): An array for the result of the same shape as zdata.
+                It may be zdata itself. Only used by elementwise mods.
+
+        Returns:
+            The resulting array (out, if given).
+        """
+        raise NotImplementedError('Mod %s does not implement apply_array.' % self.title)
+
+    def halo(self, modargs):
+        """
+        The extent of the neighbourhood that determines a value of
+        the result of a tileable mod.
+
+        Args:
+            modargs (tuple): the arguments the mod is applied with.
+
+        Returns:
+            A tuple of the number of rows and columns. None if the mod can not be
+            tiled for these arguments.
+        """
+        return (0, 0)
+
     def apply(self, data, modargs):
         """
         This method provides a hook for do_apply which has to be
         overwritten by any mod implementation to provide some useful functionality.
+
+        Note that the array of the data is shared with the cached pipeline stages
+        and is read-only. A mod either replaces the array (``data.zdata = newarray``)
+        or modifies the array obtained by ``data.writable_zdata()`` in-place.
         
         ValueErrors and TypeErrors appearing in do_apply are caught and the View object
         is informed of the failure and deactivates the mod.
@@ -0,0 +1,190 @@
+"""
+Timing and memory instrumentation of the pipeline and the rendering.
+
+An :class:`Instrumentation` attached to a :class:`colorview2d.View`
+records a :class:`StageStats` for every stage of the pipeline that is
+applied (a single mod or a run of mods applied by the executor) and a
+:class:`RenderStats` for the steps of drawing and saving the plot
+(``imshow``, ``colorbar``, ``tight_layout`` and ``savefig``). The records
+of the last application of the pipeline and of the last rendering are
+collected in :attr:`colorview2d.View.last_run_stats`. Every record is also
+passed to the hooks as soon as it is complete.
+
+Without an instrumentation (the default), nothing is measured.
+
+The memory allocated by a stage is the peak of the memory traced by
+:mod:`tracemalloc` during the stage, relative to the memory at its start.
+Tracing the memory slows down the allocation of small objects, it can be
+switched off with ``trace_memory=False``. If :mod:`tracemalloc` is already
+tracing, its peak is reset at the start of each stage.
+
+Example
+-------
+::
+
+    view = colorview2d.View(data, instrumentation=Instrumentation(hooks=[print]))
+    view.add_Smooth(2, 2)
+    view.plot_pdf('Test.pdf')
+    view.last_run_stats.report()
+
+"""
+import collections
+import contextlib
+import time
+import tracemalloc
+
+# The record of a pipeline stage. mods are the titles of the mods,
+# start and stop the positions of the stage in the pipeline (stop excluded),
+# the times are in seconds and the allocated memory in bytes (None if not traced).
+StageStats = collections.namedtuple(
+    'StageStats', ['mods', 'start', 'stop', 'wall_time', 'cpu_time',
+                   'input_shape', 'input_dtype', 'output_shape', 'output_dtype',
+                   'allocated_bytes'])
+
+# The record of a rendering step, the times are in seconds.
+RenderStats = collections.namedtuple('RenderStats', ['step', 'wall_time', 'cpu_time'])
+
+
+class RunStats(object):
+    """
+    The records of the last application of the pipeline and the last rendering.
+
+    Attributes:
+        stages (list): The :class:`StageStats` of the applied stages.
+        cached_stages (int): The number of pipeline stages taken from a cache.
+        render (list): The :class:`RenderStats` of the rendering steps.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.cached_stages = 0
+        self.render = []
+
+    @property
+    def pipeline_time(self):
+        """The wall time of the applied stages in seconds."""
+        return sum(stats.wall_time for stats in self.stages)
+
+    @property
+    def render_time(self):
+        """The wall time of the rendering steps in seconds."""
+        return sum(stats.wall_time for stats in self.render)
+
+    def report(self):
+        """
+        Print a table of the records to the standard output.
+        """
+        print("Pipeline: {0} stages from cache, {1} applied in {2:.1f} ms.".format(
+            self.cached_stages, len(self.stages), 1e3 * self.pipeline_time))
+        for stats in self.stages:
+            allocated = ('-' if stats.allocated_bytes is None
+                         else '{0:.1f} MiB'.format(stats.allocated_bytes / 1024.**2))
+            print("  {0:>3}-{1:<3} {2:<30} {3:>10.1f} ms {4:>10.1f} ms cpu  "
+                  "{5} {6} -> {7} {8}  {9}".format(
+                      stats.start + 1, stats.stop, '+'.join(stats.mods),
+                      1e3 * stats.wall_time, 1e3 * stats.cpu_time,
+                      stats.input_shape, stats.input_dtype,
+                      stats.output_shape, stats.output_dtype, allocated))
+        print("Rendering: {0:.1f} ms.".format(1e3 * self.render_time))
+        for stats in self.render:
+            print("  {0:<38} {1:>10.1f} ms {2:>10.1f} ms cpu".format(
+                stats.step, 1e3 * stats.wall_time, 1e3 * stats.cpu_time))
+
+
+class Instrumentation(object):
+    """
+    Records the timing and the memory of the pipeline stages and the rendering.
+
+    Args:
+        trace_memory (bool): Trace the memory allocated by the stages.
+        hooks (list): Callables that are called with every record
+            (a :class:`StageStats` or a :class:`RenderStats`).
+    """
+
+    def __init__(self, trace_memory=True, hooks=None):
+        self.trace_memory = trace_memory
+        self.hooks = list(hooks or [])
+        self._stats = RunStats()
+        # The nesting depth of the renderings
+        self._rendering = 0
+
+    @property
+    def stats(self):
+        """The :class:`RunStats` of the last application of the pipeline and rendering."""
+        return self._stats
+
+    def start_pipeline(self, cached_stages):
+        """Discard the records of the previous application of the pipeline.
+
+        Args:
+            cached_stages (int): The number of stages taken from a cache.
+        """
+        self._stats.stages = []
+        self._stats.cached_stages = cached_stages
+
+    @contextlib.contextmanager
+    def stage(self, mods, start, stop, data):
+        """Measure the application of a pipeline stage to a :class:`colorview2d.Data`.
+
+        Args:
+            mods (list): The titles of the mods of the stage.
+            start (int): The position of the first mod in the pipeline.
+            stop (int): The position after the last mod in the pipeline.
+            data (colorview2d.Data): The data the stage is applied to (in-place).
+        """
+        input_shape, input_dtype = data.zdata.shape, data.zdata.dtype
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - wall_start
+            cpu_time = time.process_time() - cpu_start
+            allocated = None
+            if self.trace_memory:
+                allocated = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+            if started_tracing:
+                tracemalloc.stop()
+            stats = StageStats(tuple(mods), start, stop, wall_time, cpu_time,
+                               input_shape, input_dtype, data.zdata.shape, data.zdata.dtype,
+                               allocated)
+            self._stats.stages.append(stats)
+            self._call_hooks(stats)
+
+    @contextlib.contextmanager
+    def rendering(self):
+        """Group the rendering steps. The records of the previous rendering are
+        discarded when the outermost rendering starts."""
+        if not self._rendering:
+            self._stats.render = []
+        self._rendering += 1
+        try:
+            yield
+        finally:
+            self._rendering -= 1
+
+    @contextlib.contextmanager
+    def render_step(self, step):
+        """Measure a rendering step.
+
+        Args:
+            step (string): The name of the step, e.g. 'imshow'.
+        """
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats = RenderStats(step, time.perf_counter() - wall_start,
+                                time.process_time() - cpu_start)
+            self._stats.render.append(stats)
+            self._call_hooks(stats)
+
+    def _call_hooks(self, stats):
+        """Pass a record to the hooks."""
+        for hook in self.hooks:
+            hook(stats)
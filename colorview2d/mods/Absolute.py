@@ -9,9 +9,15 @@ class Absolute(imod.IMod):
     The mod class to calculate the absolute value of the data.
     """
 
+    elementwise = True
+
     def __init__(self):
         imod.IMod.__init__(self)
-        
+
     def do_apply(self, data, modargs):
         """Replace the array by its absolute valued version."""
-        data.zdata = np.absolute(data.zdata)
+        data.zdata = self.apply_array(data.zdata, modargs)
+
+    def apply_array(self, zdata, modargs, out=None):
+        """Calculate the absolute value of the array."""
+        return np.absolute(zdata, out=out)
@@ -12,17 +12,20 @@ import numpy as np
 import logging
 
 from colorview2d import imod
+from colorview2d import gaussian
+from colorview2d import rankfilter
 
-from skimage.filter import threshold_adaptive
-from skimage import img_as_float
+# The local statistics the threshold can be derived from
+METHODS = ('mean', 'gaussian', 'median')
 
 
 class Adaptive_Threshold(imod.IMod):
     """
     The mod class. The apply routine contains the logic for applying
     the adaptive threshold filter to the data.
-    
-    :ivar args: A tuple containing the blocksize and the offset.
+
+    :ivar args: A tuple containing the blocksize, the offset and
+        optionally the method ('mean', 'gaussian' or 'median').
     """
     def __init__(self):
         imod.IMod.__init__(self)
@@ -30,28 +33,40 @@ class Adaptive_Threshold(imod.IMod):
 
     def do_apply(self, data, modargs):
         """
-        To apply the mod we use the adaptive threshold routine of
-        the :module:`skimage.filter`.
+        To apply the mod we compare the absolute value of the data
+        with a local statistic of its neighbourhood (a block of
+        blocksize x blocksize values, 'reflect' mode at the boundaries).
         The threshold is calculated from
-        
+
         threshold = (1+offset)*mean
 
         where offset is the value defined via the widget.
+        Instead of the mean, the gaussian weighted mean (sigma = (blocksize - 1) / 6)
+        or the median can be used.
         Note that the result is a binary image with values
         0 and 1.
 
         Args
             data (colorview2d.Data): The data.
             modargs (tuple): First argument is the blocksize (integer), second
-                             argument ist the offset for the threshold (float)
+                             argument ist the offset for the threshold (float),
+                             the optional third argument is the method (default 'mean').
         """
+        blocksize, offset = int(modargs[0]), float(modargs[1])
+        method = modargs[2] if len(modargs) > 2 else 'mean'
+        if blocksize < 1 or method not in METHODS:
+            raise ValueError('Invalid blocksize %s or method %s.' % (blocksize, method))
+
+        absolute = np.abs(data.zdata).astype(float)
+        if method == 'mean':
+            statistic = _local_mean(absolute, blocksize)
+        elif method == 'gaussian':
+            statistic = gaussian.gaussian_filter(absolute, (blocksize - 1) / 6.)
+        else:
+            statistic = rankfilter.median_filter(absolute, (blocksize, blocksize))
+
+        newZ = (absolute > (1 + offset) * statistic).astype(float)
 
-        def func(arr):
-            return (1 + modargs[1]) * arr.mean()
-        
-        newZ = img_as_float(
-            threshold_adaptive(np.abs(data.zdata), modargs[0], method='generic', param=func))
-        
         # Only if the array contains at least two different values
         # we really apply the filter
         if newZ.min() != newZ.max():
@@ -60,3 +75,22 @@ class Adaptive_Threshold(imod.IMod):
             logging.info('Adaptive thresholding not applied, filter parameters blocksize %d'
                          ' and offset %d not sensitive to features in the data.', modargs[0], modargs[1])
 
+
+def _local_mean(zdata, blocksize):
+    """The mean of the blocksize x blocksize block around each value.
+
+    The block sums are taken from a summed-area table, the cost does not
+    depend on the blocksize. The array is extended like in the 'reflect' mode
+    of scipy.ndimage.
+    """
+    before, after = blocksize // 2, (blocksize - 1) // 2
+    padded = np.pad(zdata, ((before, after), (before, after)), mode='symmetric')
+
+    table = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1))
+    np.cumsum(padded, axis=0, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+
+    sums = table[blocksize:, blocksize:] - table[:-blocksize, blocksize:]
+    sums -= table[blocksize:, :-blocksize]
+    sums += table[:-blocksize, :-blocksize]
+    return sums / blocksize**2
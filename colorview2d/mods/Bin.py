@@ -0,0 +1,29 @@
+"""
+This mod reduces the size of the data by combining blocks of values
+(binning), e.g. to shrink a large map for display or analysis.
+"""
+from colorview2d import imod
+
+
+class Bin(imod.IMod):
+    """
+    The mod class to bin the data.
+
+    args = (yfactor, xfactor, method, edge):
+
+    - yfactor, xfactor (int): The size of the blocks along the axes.
+    - method (optional): The reduction of a block, 'mean' (default),
+      'sum', 'max' or 'min'.
+    - edge (optional): The incomplete blocks at the edges are dropped
+      ('trim', default) or reduced from the values available ('partial').
+
+    The axes bounds are set to the centers of the first and the last block,
+    see :meth:`colorview2d.Data.bin`.
+    """
+    def __init__(self):
+        imod.IMod.__init__(self)
+        self.default_args = (2, 2)
+
+    def do_apply(self, data, modargs):
+        """Replace the blocks of values by their reduction."""
+        data.bin(*modargs)
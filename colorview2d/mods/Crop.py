@@ -16,6 +16,8 @@ class Crop(imod.IMod):
     
     :ivar args: A 4-tuple containing the corners of the cropped region.
     """
+    geometric = True
+
     def __init__(self):
         imod.IMod.__init__(self)
         self.default_args = (0., 0., 0., 0.)
@@ -1,27 +1,135 @@
 """
-This mod performs a derivation of the data with respect to the y-axis.
+This mod performs a derivation of the data with respect to the y-axis,
+the x-axis or both.
 """
 import numpy as np
+from scipy.ndimage import convolve
+from scipy.signal import savgol_coeffs, savgol_filter
 
 from colorview2d import imod
 
+# The modes of the mod
+MODES = ('diff', 'y', 'x', 'gradient', 'curvature')
 
 
 class Derive(imod.IMod):
     """
-    The mod class to apply the derivative of the data array with respect
-    to the y-axis. The size of the data array along the y-axis is reduced by 1.
+    The mod class to apply the derivative of the data array.
+
+    args = (mode, window, polyorder, weight), all optional:
+
+    - 'diff' (default): The difference of adjacent rows. The size of the data
+      array along the y-axis is reduced by 1.
+    - 'y', 'x': The derivative with respect to the y- or the x-axis.
+    - 'gradient': The magnitude of the gradient.
+    - 'curvature': The 2d curvature (Zhang et al., Rev. Sci. Instrum. 82, 043712 (2011)).
+      The weight (default 1.) corresponds to the free parameter a of the 1d curvature,
+      smaller values sharpen the features.
+
+    The derivatives of all modes but 'diff' are scaled with the spacing of the axes
+    and keep the shape of the array. They are Savitzky-Golay derivatives of the given
+    window length (odd, default 3) and polynomial order (default 2). The default is equal
+    to central differences, larger windows smooth the data along the axis of the derivative.
     """
     def __init__(self):
         imod.IMod.__init__(self)
 
     def do_apply(self, data, modargs):
         """Apply the derivative to the data array and adjust the bounds."""
-        dy = data.dy
-        # diff
-        data.zdata = np.diff(data.zdata, axis=0)
-        # new bounds
-        data.yrange_bounds = (
-            data.yrange_bounds[0] + dy/2.,
-            data.yrange_bounds[1] - dy/2.)
+        mode = modargs[0] if modargs else 'diff'
+        if mode not in MODES:
+            raise ValueError('Unknown mode %s of the derivative.' % mode)
+
+        if mode == 'diff':
+            dy = data.dy
+            # diff
+            data.zdata = np.diff(data.zdata, axis=0)
+            # new bounds
+            data.yrange_bounds = (
+                data.yrange_bounds[0] + dy/2.,
+                data.yrange_bounds[1] - dy/2.)
+            return
+
+        window = int(modargs[1]) if len(modargs) > 1 else 3
+        polyorder = int(modargs[2]) if len(modargs) > 2 else 2
+        if min(data.zdata.shape) < max(window, 2):
+            raise ValueError('The data is smaller than the window of the derivative.')
+
+        def derivative(zdata, axis, deriv=1):
+            """The Savitzky-Golay derivative along an axis (0 is y)."""
+            delta = data.dy if axis == 0 else data.dx
+            return savgol_filter(zdata, window, polyorder, deriv=deriv,
+                                 delta=delta, axis=axis, mode='interp')
+
+        zdata = data.zdata.astype(float)
+        if mode == 'y':
+            data.zdata = derivative(zdata, 0)
+        elif mode == 'x':
+            data.zdata = derivative(zdata, 1)
+        elif mode == 'gradient':
+            data.zdata = np.hypot(derivative(zdata, 0), derivative(zdata, 1))
+        else:
+            weight = float(modargs[3]) if len(modargs) > 3 else 1.
+            zxy = _mixed_derivative(zdata, window, polyorder, (data.dy, data.dx))
+            data.zdata = _curvature(zdata, derivative, zxy, weight)
+
+
+def _mixed_derivative(zdata, window, polyorder, delta):
+    """The Savitzky-Golay derivative with respect to both axes in a single pass.
+
+    The interior is convolved once with the outer product of the 1d kernels. Only
+    the edges, where the polynomials are fitted to the last window of values, are
+    taken from the two 1d derivatives of strips of the array.
+
+    Args:
+        zdata (numpy.ndarray): The data.
+        window (int): The window length of the derivatives.
+        polyorder (int): The polynomial order of the derivatives.
+        delta (tuple): The spacing of the y- and the x-axis.
+
+    Returns:
+        A :class:`numpy.ndarray` of the shape of zdata.
+    """
+    kernel = np.outer(savgol_coeffs(window, polyorder, deriv=1, delta=delta[0]),
+                      savgol_coeffs(window, polyorder, deriv=1, delta=delta[1]))
+    zxy = convolve(zdata, kernel, mode='constant')
+
+    def nested(strip):
+        """The derivative along x, then along y, of a strip of the array."""
+        strip = savgol_filter(strip, window, polyorder, deriv=1, delta=delta[1],
+                              axis=1, mode='interp')
+        return savgol_filter(strip, window, polyorder, deriv=1, delta=delta[0],
+                             axis=0, mode='interp')
+
+    half = window // 2
+    if half:
+        zxy[:half] = nested(zdata[:window])[:half]
+        zxy[-half:] = nested(zdata[-window:])[-half:]
+        zxy[:, :half] = nested(zdata[:, :window])[:, :half]
+        zxy[:, -half:] = nested(zdata[:, -window:])[:, -half:]
+    return zxy
+
+
+def _curvature(zdata, derivative, zxy, weight):
+    """The 2d curvature of the array.
+
+    Args:
+        zdata (numpy.ndarray): The data.
+        derivative (callable): Returns the derivative of an array along an axis
+            (0 is y) of the order given by the third argument.
+        zxy (numpy.ndarray): The mixed derivative of the data.
+        weight (float): The free parameter a of the curvature.
+
+    Returns:
+        A :class:`numpy.ndarray` of the shape of zdata.
+    """
+    zx, zy = derivative(zdata, 1), derivative(zdata, 0)
+    zxx, zyy = derivative(zdata, 1, 2), derivative(zdata, 0, 2)
+
+    # The coefficient C_x = C_y = 1 / (a max(z_x^2 + z_y^2)), zero for constant data
+    slope = np.max(zx**2 + zy**2)
+    coefficient = 1. / (weight * slope) if slope > 0 else 0.
+    cx = cy = coefficient
 
+    return (((1 + cx * zx**2) * cy * zyy - 2 * cx * cy * zx * zy * zxy
+             + (1 + cy * zy**2) * cx * zxx) / (1 + cx * zx**2 + cy * zy**2)**1.5)
@@ -7,6 +7,8 @@ class Flip(imod.IMod):
     """
     The mod class to flip the data.
     """
+    geometric = True
+
     def __init__(self):
         imod.IMod.__init__(self)
         self.default_args = (True, )
@@ -12,6 +12,8 @@ class Log(imod.IMod):
     to the y-axis.
     """
 
+    elementwise = True
+
     def __init__(self):
         imod.IMod.__init__(self)
 
@@ -19,6 +21,10 @@ class Log(imod.IMod):
         """Calculate the natural logarithm of the data. Please make sure the
         data array does not contain negative values.
         """
-        data.zdata = np.log(data.zdata)
+        data.zdata = self.apply_array(data.zdata, modargs)
+
+    def apply_array(self, zdata, modargs, out=None):
+        """Calculate the natural logarithm of the array."""
+        return np.log(zdata, out=out)
 
 
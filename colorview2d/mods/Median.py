@@ -2,18 +2,34 @@
 This mod performs a median filter on the data. The window size for the
 filter is specified by wx.lib.masked.NumCtrl widgets.
 """
+import numpy as np
 from colorview2d import imod
+from colorview2d.rankfilter import median_filter
 
-from scipy.ndimage.filters import median_filter
 
+class Median(imod.IMod):
+    """Median filter class.
 
+    Large windows are filtered with a histogram algorithm, see
+    :mod:`colorview2d.rankfilter`. The result is identical to
+    :func:`scipy.ndimage.median_filter`.
+    """
+
+    tileable = True
 
-class Median(imod.IMod):
-    """Median filter class."""
     def __init__(self):
         imod.IMod.__init__(self)
         self.default_args = (0., 0.)
 
     def do_apply(self, data, modargs):
         """ Applies a median filter to the data."""
-        data.zdata = median_filter(data.zdata, size=modargs)
+        data.zdata = self.apply_array(data.zdata, modargs)
+
+    def apply_array(self, zdata, modargs, out=None):
+        """Apply the median filter to the array."""
+        return median_filter(zdata, modargs)
+
+    def halo(self, modargs):
+        """Half the window size along both axes."""
+        sizes = np.broadcast_to(np.asarray(modargs), (2,))
+        return tuple(int(size) // 2 for size in sizes)
@@ -9,10 +9,12 @@ class Rotate(imod.IMod):
     """
     The mod class to apply the rotation.
     """
+    geometric = True
+
 
     def __init__(self):
         imod.IMod.__init__(self)
-        self.args = self.default_args = True
+        self.default_args = True
 
     def do_apply(self, data, modargs):
         """Apply a clockwise or anti-clockwise rotation of the data.
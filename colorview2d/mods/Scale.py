@@ -1,4 +1,6 @@
 """A mod to scale the data."""
+import numpy as np
+
 from colorview2d import imod
 
 class Scale(imod.IMod):
@@ -8,9 +10,16 @@ class Scale(imod.IMod):
 
     args (float): The float that is multiplied with the data array.
     """
+
+    elementwise = True
+
     def __init__(self):
         imod.IMod.__init__(self)
-        self.args = self.default_args = 1.
+        self.default_args = 1.
 
     def do_apply(self, data, args):
-        data.zdata = data.zdata * args
+        data.zdata = self.apply_array(data.zdata, args)
+
+    def apply_array(self, zdata, args, out=None):
+        """Multiply the array with the float given in args."""
+        return np.multiply(zdata, args, out=out)
@@ -3,8 +3,9 @@ This mod performs a gaussian filter on the data. The window size for the
 filter is specified by wx.lib.masked.NumCtrl widgets.
 """
 
-from scipy.ndimage.filters import gaussian_filter
+import numpy as np
 from colorview2d import imod
+from colorview2d import gaussian
 
 
 class Smooth(imod.IMod):
@@ -14,12 +15,30 @@ class Smooth(imod.IMod):
     args = (xsize, ysize)
 
     with the data array.
+
+    Large widths are filtered via FFT, see :mod:`colorview2d.gaussian`.
     """
+
+    tileable = True
+
     def __init__(self):
         imod.IMod.__init__(self)
         self.default_args = (0., 0.)
 
     def do_apply(self, data, args):
-        data.zdata = gaussian_filter(data.zdata, args)
+        data.zdata = self.apply_array(data.zdata, args)
+
+    def apply_array(self, zdata, args, out=None):
+        """Apply the gaussian filter to the array."""
+        return gaussian.gaussian_filter(zdata, args)
+
+    def halo(self, args):
+        """The radius of the truncated gaussian kernel along both axes.
+        None if the FFT backend is used, the strips would not be
+        bit-identical to the whole array."""
+        sigmas = np.broadcast_to(np.asarray(args, dtype=float), (2,))
+        if any(gaussian.backend(sigma) == 'fft' for sigma in sigmas):
+            return None
+        return tuple(gaussian.radius(sigma) for sigma in sigmas)
 
 
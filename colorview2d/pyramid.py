@@ -0,0 +1,266 @@
+"""
+Multi-resolution pyramid of a 2d array for the display of large data.
+
+Level 0 of the pyramid is the array itself. Each further level halves
+the size of the previous level along both axes: a pixel of level ``k``
+covers a block of ``2**k x 2**k`` pixels of the array. For every pixel
+the minimum, the maximum and the mean of the block are kept, NaN values
+are ignored. The levels are computed when they are first needed and
+cached. For a memory-mapped array, a level is computed directly from the
+array in chunks of rows, the finer levels are not kept in memory.
+
+Displaying the mean of the blocks blurs narrow features (single lines,
+spikes) until they vanish. The ``'extrema'`` representation shows, for
+every block, the minimum or the maximum, whichever deviates more from
+the mean. This way a narrow feature survives the downsampling.
+
+Example
+-------
+::
+
+    pyramid = Pyramid(zdata)
+    level = pyramid.select_level(rows=20000, columns=20000, height=800, width=800)
+    image = pyramid.level(level, kind='extrema')
+
+"""
+import math
+import numpy as np
+
+# The number of array elements processed at once when a level is computed
+CHUNK_SIZE = 2**22
+
+# The representations of the blocks available in Pyramid.level
+KINDS = ('extrema', 'mean', 'min', 'max')
+
+
+class Pyramid(object):
+    """
+    A min/max/mean image pyramid of a 2d array.
+
+    Args:
+        zdata (numpy.ndarray): The 2d array. It is not copied and must not
+            be modified while the pyramid is in use.
+    """
+
+    def __init__(self, zdata):
+        self._zdata = zdata
+        # (min, max, mean, count) arrays of the levels >= 1
+        self._levels = {}
+        # The cached 'extrema' representations of the levels
+        self._extrema = {}
+
+    @property
+    def shape(self):
+        """The shape of the array (level 0)."""
+        return self._zdata.shape
+
+    @property
+    def nlevels(self):
+        """The number of levels, including level 0.
+        The last level consists of a single pixel."""
+        return int(math.ceil(math.log(max(self.shape), 2))) + 1 if max(self.shape) > 1 else 1
+
+    @property
+    def computed_levels(self):
+        """The levels >= 1 that have been computed so far."""
+        return sorted(self._levels)
+
+    def level_shape(self, level):
+        """The shape of the array of a level."""
+        factor = 2**level
+        return tuple(-(-size // factor) for size in self.shape)
+
+    def level(self, level, kind='extrema'):
+        """Return the array of a level.
+
+        Args:
+            level (int): The level, 0 is the array itself.
+            kind (string): The representation of the blocks: 'extrema', 'mean', 'min' or 'max'.
+
+        Returns:
+            The 2d :class:`numpy.ndarray` of the level. Do not modify the array.
+        """
+        assert kind in KINDS, 'Unknown kind %s of pyramid level.' % kind
+        assert 0 <= level < self.nlevels, 'Level %d not in the pyramid.' % level
+
+        if level == 0:
+            return self._zdata
+
+        levelmin, levelmax, levelmean, _ = self._get_level(level)
+        if kind == 'min':
+            return levelmin
+        elif kind == 'max':
+            return levelmax
+        elif kind == 'mean':
+            return levelmean
+
+        if level not in self._extrema:
+            with np.errstate(invalid='ignore'):
+                use_max = (levelmax - levelmean) > (levelmean - levelmin)
+            self._extrema[level] = np.where(use_max, levelmax, levelmin)
+        return self._extrema[level]
+
+    def select_level(self, rows, columns, height, width):
+        """Select the level that matches the resolution of the display.
+
+        The selected level is the coarsest level that still has
+        at least one pixel per display pixel along both axes.
+
+        Args:
+            rows (float): The number of rows of the array that are displayed.
+            columns (float): The number of columns of the array that are displayed.
+            height (float): The height of the display in pixels.
+            width (float): The width of the display in pixels.
+
+        Returns:
+            The level (int).
+        """
+        ratio = min(float(rows) / max(height, 1), float(columns) / max(width, 1))
+        if ratio < 2:
+            return 0
+        return min(int(math.floor(math.log(ratio, 2))), self.nlevels - 1)
+
+    def region(self, level, rows, columns, kind='extrema'):
+        """Return the part of a level that covers a region of the array.
+
+        Args:
+            level (int): The level.
+            rows (tuple): The first and the last+1 row of the region in the array.
+            columns (tuple): The first and the last+1 column of the region in the array.
+            kind (string): The representation of the blocks, see :meth:`Pyramid.level`.
+
+        Returns:
+            A tuple of the 2d :class:`numpy.ndarray` and the rows and the columns
+            of the array covered by it. The covered region contains the
+            requested one, it is aligned to the blocks of the level.
+        """
+        factor = 2**level
+        first_row, last_row = rows[0] // factor, -(-rows[1] // factor)
+        first_col, last_col = columns[0] // factor, -(-columns[1] // factor)
+        array = self.level(level, kind)[first_row:last_row, first_col:last_col]
+
+        covered_rows = (first_row * factor, min(last_row * factor, self.shape[0]))
+        covered_columns = (first_col * factor, min(last_col * factor, self.shape[1]))
+        return (array, covered_rows, covered_columns)
+
+    def _get_level(self, level):
+        """Return the (min, max, mean, count) arrays of a level >= 1.
+        The missing levels are computed from the finest computed level."""
+        if level not in self._levels:
+            if isinstance(self._zdata, np.memmap):
+                base = max([0] + [item for item in self._levels if item < level])
+                self._levels[level] = self._reduce_levels(base, level)
+            elif level == 1:
+                self._levels[level] = _reduce_level(self._zdata, self._zdata, self._zdata, None)
+            else:
+                self._levels[level] = _reduce_level(*self._get_level(level - 1))
+        return self._levels[level]
+
+    def _reduce_levels(self, base, level):
+        """Compute a level from a finer level without keeping the levels in between.
+
+        The base level is processed in chunks of rows that cover whole blocks of the level.
+
+        Args:
+            base (int): The finer level, 0 or a computed level.
+            level (int): The level to compute.
+
+        Returns:
+            A tuple of the min, max, mean and count arrays of the level.
+        """
+        if base == 0:
+            arrays = (self._zdata, self._zdata, self._zdata, None)
+        else:
+            arrays = self._levels[base]
+        height, width = arrays[0].shape
+        factor = 2**(level - base)
+        rows = max(1, CHUNK_SIZE // max(1, width * factor)) * factor
+
+        result = None
+        for start in range(0, height, rows):
+            chunk = tuple(None if array is None else array[start:start + rows]
+                          for array in arrays)
+            for _ in range(level - base):
+                chunk = _reduce_level(*chunk)
+            if result is None:
+                result = tuple(np.empty(self.level_shape(level), dtype=array.dtype)
+                               for array in chunk)
+            for target, array in zip(result, chunk):
+                target[start // factor:start // factor + len(array)] = array
+        return result
+
+
+def _reduce_level(levelmin, levelmax, levelmean, count):
+    """Compute the next level of the pyramid from a level.
+
+    Args:
+        levelmin (numpy.ndarray): The minimum of the blocks of the level.
+        levelmax (numpy.ndarray): The maximum of the blocks of the level.
+        levelmean (numpy.ndarray): The mean of the blocks of the level.
+        count (numpy.ndarray): The number of values (not NaN) in the blocks of the level.
+            None for level 0.
+
+    Returns:
+        A tuple of the min, max, mean and count arrays of the next level.
+    """
+    height, width = levelmin.shape
+    shape = (-(-height // 2), -(-width // 2))
+    floating = levelmean.dtype.kind in 'fc'
+
+    nextmin = np.empty(shape, dtype=levelmin.dtype)
+    nextmax = np.empty(shape, dtype=levelmax.dtype)
+    nextmean = np.empty(shape, dtype=np.result_type(levelmean.dtype, np.float32))
+    nextcount = np.empty(shape, dtype=np.int64)
+
+    # an even number of rows per chunk
+    rows = max(2, (CHUNK_SIZE // max(1, width)) // 2 * 2)
+    for start in range(0, height, rows):
+        block = slice(start, start + rows)
+        target = slice(start // 2, (start + rows) // 2)
+
+        nextmin[target] = _reduce_blocks(levelmin[block], np.fmin)
+        nextmax[target] = _reduce_blocks(levelmax[block], np.fmax)
+
+        # The mean of a block is the mean of the means of its
+        # sub-blocks, weighted with the number of values in the sub-blocks
+        if count is None:
+            if floating:
+                valid = ~np.isnan(levelmean[block])
+                weighted = np.where(valid, levelmean[block], 0)
+            else:
+                valid = np.ones(levelmean[block].shape, dtype=np.int64)
+                weighted = levelmean[block]
+            blockcount = _reduce_blocks(valid.astype(np.int64), np.add)
+        else:
+            weighted = np.where(count[block] > 0, levelmean[block] * count[block], 0)
+            blockcount = _reduce_blocks(count[block], np.add)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            nextmean[target] = _reduce_blocks(weighted, np.add) / blockcount
+        nextcount[target] = blockcount
+
+    return (nextmin, nextmax, nextmean, nextcount)
+
+
+def _reduce_blocks(array, ufunc):
+    """Combine the 2x2 blocks of an array with a binary ufunc.
+    An odd last row or column forms blocks of two (or one) values."""
+    height, width = array.shape
+    even_height, even_width = height - height % 2, width - width % 2
+
+    result = np.empty((-(-height // 2), -(-width // 2)),
+                      dtype=ufunc(array[:1, :1], array[:1, :1]).dtype)
+    result[:even_height // 2, :even_width // 2] = ufunc(
+        ufunc(array[0:even_height:2, 0:even_width:2], array[1:even_height:2, 0:even_width:2]),
+        ufunc(array[0:even_height:2, 1:even_width:2], array[1:even_height:2, 1:even_width:2]))
+
+    if height % 2:
+        result[-1, :even_width // 2] = ufunc(array[-1, 0:even_width:2],
+                                             array[-1, 1:even_width:2])
+    if width % 2:
+        result[:even_height // 2, -1] = ufunc(array[0:even_height:2, -1],
+                                              array[1:even_height:2, -1])
+    if height % 2 and width % 2:
+        result[-1, -1] = array[-1, -1]
+
+    return result
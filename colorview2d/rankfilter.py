@@ -0,0 +1,277 @@
+"""
+Median filter for large windows.
+
+:func:`scipy.ndimage.median_filter` selects the median from all values of
+the window at every pixel, its cost grows with the area of the window.
+:func:`median_filter` gives the identical result (boundary mode 'reflect')
+and chooses an algorithm depending on the window:
+
+- Small windows are left to :func:`scipy.ndimage.median_filter`.
+- Windows more than twice as large as the array along an axis reach
+  beyond the single reflection scipy provides (its result is undefined).
+  The array is padded by repeated reflection, ``d c b a | a b c d | d c b a | a b ...``,
+  and the padded array is filtered, so that the windows stay within it.
+- Separable windows (1xN or Nx1) are filtered line by line along the
+  window, scipy uses a sliding algorithm for one-dimensional arrays.
+- Large windows use a histogram of the data: the values are replaced by
+  their rank among the distinct values of the array, so that the data is
+  quantized without loss. The rank of the median is found digit by digit
+  (radix 16): for every digit, the number of window values in each of the
+  16 bins is obtained from integral images, at a cost independent of the
+  window size. The array is processed in tiles and within a tile in groups
+  of pixels with the same leading digits, restricted to the bounding box
+  of the group.
+  Once only a few values of a window share the leading digits of its
+  median, the refinement is exact: the candidate values are gathered
+  and the median is selected among them.
+
+Example
+-------
+::
+
+    from colorview2d.rankfilter import median_filter
+
+    despiked = median_filter(zdata, (31, 31))
+
+"""
+import operator
+import numpy as np
+import scipy.ndimage
+
+# The minimum window area for the histogram algorithm
+HISTOGRAM_MIN_SIZE = 64
+
+# The number of bits of the rank determined per histogram level
+RADIX_BITS = 4
+
+# The width and height of the tiles of the histogram algorithm.
+# The leading digits of the medians of a tile are mostly the same.
+TILE_SIZE = 256
+
+# A group of pixels is refined by gathering the candidates if there are
+# less than GATHER_RATIO candidates per element of its bounding box.
+GATHER_RATIO = 1
+
+
+def median_filter(zdata, size):
+    """Apply a median filter to a 2d array.
+
+    Args:
+        zdata (numpy.ndarray): The 2d array.
+        size (tuple): The size of the window (rows, columns) or a single int.
+
+    Returns:
+        A :class:`numpy.ndarray` identical to ``scipy.ndimage.median_filter(zdata, size=size)``
+        for windows up to twice the size of the array.
+    """
+    try:
+        sizes = tuple(operator.index(item) for item in np.broadcast_to(size, (2,)))
+    except TypeError:
+        # let scipy complain about the arguments
+        return scipy.ndimage.median_filter(zdata, size=size)
+
+    if (zdata.ndim != 2 or zdata.dtype.kind not in 'iuf' or min(sizes) < 1
+            or sizes[0] * sizes[1] == 1):
+        return scipy.ndimage.median_filter(zdata, size=size)
+
+    if sizes[0] > 2 * zdata.shape[0] or sizes[1] > 2 * zdata.shape[1]:
+        return _median_padded(zdata, sizes)
+
+    if 1 in sizes:
+        return _median_lines(zdata, max(sizes), axis=sizes.index(max(sizes)))
+
+    if (sizes[0] * sizes[1] < HISTOGRAM_MIN_SIZE or
+            (zdata.dtype.kind == 'f' and np.isnan(zdata).any())):
+        return scipy.ndimage.median_filter(zdata, size=size)
+
+    return _median_histogram(zdata, sizes)
+
+
+def _median_padded(zdata, sizes):
+    """Apply the median filter to the array padded by repeated reflection."""
+    height, width = sizes
+    # 'symmetric' in numpy is the 'reflect' mode of scipy.ndimage, repeated
+    padded = np.pad(zdata, ((height // 2, (height - 1) // 2), (width // 2, (width - 1) // 2)),
+                    mode='symmetric')
+    result = median_filter(padded, sizes)
+    return result[height // 2:height // 2 + zdata.shape[0],
+                  width // 2:width // 2 + zdata.shape[1]].copy()
+
+
+def _median_lines(zdata, size, axis):
+    """Apply a one-dimensional median filter along an axis, line by line."""
+    lines = zdata if axis == 1 else zdata.T
+    result = np.empty(lines.shape, dtype=zdata.dtype)
+    for index, line in enumerate(lines):
+        result[index] = scipy.ndimage.median_filter(np.ascontiguousarray(line), size=size)
+    return result if axis == 1 else result.T.copy()
+
+
+def _median_histogram(zdata, sizes):
+    """Apply the median filter with the histogram algorithm, tile by tile."""
+    height, width = sizes
+    values, codes = np.unique(zdata, return_inverse=True)
+    codes = codes.reshape(zdata.shape)
+    if len(values) < 2**31:
+        codes = codes.astype(np.int32)
+
+    # The window of the pixel (i, j) is padded[i:i + height, j:j + width]
+    # 'symmetric' in numpy is the 'reflect' mode of scipy.ndimage
+    padded = np.pad(codes, ((height // 2, (height - 1) // 2), (width // 2, (width - 1) // 2)),
+                    mode='symmetric')
+    del codes
+
+    nbits = max(1, int(len(values) - 1).bit_length())
+    topshift = -(-nbits // RADIX_BITS) * RADIX_BITS
+    rank = height * width // 2
+
+    result = np.empty(zdata.shape, dtype=zdata.dtype)
+    for top in range(0, zdata.shape[0], TILE_SIZE):
+        for left in range(0, zdata.shape[1], TILE_SIZE):
+            bottom = min(top + TILE_SIZE, zdata.shape[0])
+            right = min(left + TILE_SIZE, zdata.shape[1])
+            tile = padded[top:bottom + height - 1, left:right + width - 1]
+            medians = _select_ranks(tile, (bottom - top, right - left), sizes, rank, topshift)
+            result[top:bottom, left:right] = values[medians]
+
+    return result
+
+
+def _select_ranks(padded, shape, sizes, rank, topshift):
+    """Find the code of rank ``rank`` in the window of every pixel.
+
+    Args:
+        padded (numpy.ndarray): The padded codes.
+        shape (tuple): The shape of the output.
+        sizes (tuple): The shape of the window.
+        rank (int): The rank of the value selected within a window.
+        topshift (int): The number of bits of the codes, a multiple of RADIX_BITS.
+
+    Returns:
+        An integer :class:`numpy.ndarray` of the shape of the output.
+    """
+    prefix = np.zeros(shape, dtype=np.int64)
+    below = np.zeros(shape, dtype=np.int64)
+
+    # Groups of pixels with the same leading digits of their median code:
+    # (shift, value, (rows, columns)) where value are the bits of the code above shift
+    groups = [(topshift, 0, np.nonzero(np.ones(shape, dtype=bool)))]
+    while groups:
+        shift, value, (rows, columns) = groups.pop()
+        box = _bounding_box(rows, columns, sizes)
+        window = padded[box[0]:box[1], box[2]:box[3]]
+        rows, columns = rows - box[0], columns - box[2]
+
+        newshift = shift - RADIX_BITS
+        digits = (window >> newshift) - (value << RADIX_BITS)
+        counts = np.zeros(len(rows), dtype=np.int64)
+        residual = rank - below[rows + box[0], columns + box[2]]
+        found = np.full(len(rows), -1, dtype=np.int64)
+        incount = np.zeros(len(rows), dtype=np.int64)
+
+        for digit in range(2**RADIX_BITS):
+            pending = found < 0
+            if not pending.any():
+                break
+            bincount = _box_sums(digits == digit, rows, columns, sizes)
+            hit = pending & (counts + bincount > residual)
+            found[hit] = digit
+            incount[hit] = bincount[hit]
+            # the rank within the bin of the digit
+            residual[hit] -= counts[hit]
+            counts += bincount
+
+        absolute_rows, absolute_columns = rows + box[0], columns + box[2]
+        newprefix = (value << RADIX_BITS) + found
+        below[absolute_rows, absolute_columns] = rank - residual
+        prefix[absolute_rows, absolute_columns] = newprefix
+        if newshift == 0:
+            continue
+
+        for newvalue in np.unique(newprefix):
+            member = newprefix == newvalue
+            grouprows, groupcolumns = absolute_rows[member], absolute_columns[member]
+            groupbox = _bounding_box(grouprows, groupcolumns, sizes)
+            area = (groupbox[1] - groupbox[0]) * (groupbox[3] - groupbox[2])
+            if incount[member].sum() <= GATHER_RATIO * area:
+                prefix[grouprows, groupcolumns] = _gather_ranks(
+                    padded, groupbox, grouprows, groupcolumns, sizes, newshift, newvalue,
+                    rank - below[grouprows, groupcolumns])
+                below[grouprows, groupcolumns] = rank
+            else:
+                groups.append((newshift, newvalue, (grouprows, groupcolumns)))
+
+    return prefix
+
+
+def _bounding_box(rows, columns, sizes):
+    """The part of the padded array covered by the windows of the pixels."""
+    return (rows.min(), rows.max() + sizes[0], columns.min(), columns.max() + sizes[1])
+
+
+def _box_sums(mask, rows, columns, sizes):
+    """The number of True values in the windows of the pixels (rows, columns)."""
+    height, width = sizes
+    integral = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int32)
+    np.cumsum(mask, axis=0, dtype=np.int32, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+    sums = integral[height:, width:] - integral[:-height, width:]
+    sums -= integral[height:, :-width]
+    sums += integral[:-height, :-width]
+    return sums[rows, columns]
+
+
+def _gather_ranks(padded, box, rows, columns, sizes, shift, value, residual):
+    """Select the code of a rank among the window values with the given leading bits.
+
+    The values of the box with the leading bits are sorted into cells of the size
+    of the window, a window overlaps at most 2x2 cells.
+
+    Args:
+        padded (numpy.ndarray): The padded codes.
+        box (tuple): The bounding box of the windows in the padded array.
+        rows (numpy.ndarray): The rows of the pixels.
+        columns (numpy.ndarray): The columns of the pixels.
+        sizes (tuple): The shape of the window.
+        shift (int): The number of bits of the codes below the leading bits.
+        value (int): The leading bits.
+        residual (numpy.ndarray): The rank among the values with the leading bits
+            of the code selected for each pixel.
+
+    Returns:
+        An integer :class:`numpy.ndarray` of the selected codes.
+    """
+    height, width = sizes
+    window = padded[box[0]:box[1], box[2]:box[3]]
+    elementrows, elementcolumns = np.nonzero((window >> shift) == value)
+
+    ncells = (window.shape[1] + width - 1) // width + 1
+    cells = (elementrows // height) * ncells + elementcolumns // width
+    order = np.argsort(cells, kind='stable')
+    cells = cells[order]
+    elementrows, elementcolumns = elementrows[order], elementcolumns[order]
+    # The codes without the leading bits
+    elementcodes = window[elementrows, elementcolumns] - (value << shift)
+
+    # The 2x2 cells overlapped by each window
+    rows, columns = rows - box[0], columns - box[2]
+    corner = (rows // height) * ncells + columns // width
+    querycells = (corner[:, np.newaxis] + np.array([0, 1, ncells, ncells + 1])).ravel()
+    starts = np.searchsorted(cells, querycells, side='left')
+    lengths = np.searchsorted(cells, querycells, side='right') - starts
+
+    # The candidates: (pixel, element) pairs
+    ends = np.cumsum(lengths)
+    pixels = np.repeat(np.arange(len(querycells)) // 4, lengths)
+    elements = np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - lengths - starts, lengths)
+
+    candidaterows = elementrows[elements] - rows[pixels]
+    candidatecolumns = elementcolumns[elements] - columns[pixels]
+    inside = ((candidaterows >= 0) & (candidaterows < height) &
+              (candidatecolumns >= 0) & (candidatecolumns < width))
+
+    # Sort by pixel and code and pick the candidate of the residual rank.
+    # The pixels are already sorted.
+    keys = np.sort((pixels[inside] << shift) + elementcodes[elements[inside]])
+    first = np.searchsorted(keys, np.arange(len(rows)) << shift, side='left')
+    return (keys[first + residual] & ((1 << shift) - 1)) + (value << shift)
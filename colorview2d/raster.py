@@ -0,0 +1,288 @@
+"""
+Export of the colored 2d data as raster images.
+
+The data is colored with a lookup table (LUT) of 8 bit RGBA values
+built from a matplotlib colormap. The LUTs are cached per colormap.
+The data values are mapped to the LUT entries like
+:meth:`matplotlib.axes.Axes.imshow` does it, i.e., values below/above the
+colorbar limits get the under/over colors and NaN or infinite values get
+the bad color of the colormap. The PNG files are written directly from the numpy arrays,
+without matplotlib figures, axes or colorbars.
+
+Example
+-------
+::
+
+    from colorview2d import raster
+
+    raster.save_png('map.png', data.zdata, cmap='jet', vmin=0., vmax=1.)
+    raster.save_png_tiles('tiles', data.zdata, tilesize=256, cmap='jet')
+
+"""
+import os
+import struct
+import warnings
+import zlib
+import numpy as np
+import matplotlib
+import matplotlib.cm
+import matplotlib.colors
+
+# The LUTs of the colormaps by (name, number of colors)
+_LUT_CACHE = {}
+
+# The number of array elements processed at once
+CHUNK_SIZE = 2**20
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# The default zlib compression level of the PNG files.
+# Level 1 is several times faster than the zlib default 6
+# and the files are only slightly larger.
+DEFAULT_COMPRESSION = 1
+
+
+def _get_cmap(cmap):
+    """Return the matplotlib colormap for a colormap or its name."""
+    if isinstance(cmap, matplotlib.colors.Colormap):
+        return cmap
+    try:
+        return matplotlib.colormaps[cmap]
+    except AttributeError:
+        # matplotlib < 3.5
+        return matplotlib.cm.get_cmap(cmap)
+
+
+def colormap_lut(cmap='jet'):
+    """Return the 8 bit RGBA lookup table of a colormap.
+
+    The table has ``N + 3`` rows, where ``N`` is the number of colors of the colormap.
+    The last three rows are the under, over and bad colors (as in matplotlib).
+    The tables of colormaps given by name are cached.
+
+    Args:
+        cmap (string): The name of a matplotlib colormap or a
+            :class:`matplotlib.colors.Colormap`.
+
+    Returns:
+        A read-only ``(N + 3, 4)`` :class:`numpy.ndarray` of type uint8.
+    """
+    colormap = _get_cmap(cmap)
+    key = (colormap.name, colormap.N)
+    if not isinstance(cmap, matplotlib.colors.Colormap) and key in _LUT_CACHE:
+        return _LUT_CACHE[key]
+
+    lut = np.empty((colormap.N + 3, 4), dtype=np.uint8)
+    lut[:colormap.N] = colormap(np.arange(colormap.N), bytes=True)
+    lut[colormap.N] = colormap(-1, bytes=True)
+    lut[colormap.N + 1] = colormap(colormap.N, bytes=True)
+    lut[colormap.N + 2] = colormap(np.nan, bytes=True)
+    lut.flags.writeable = False
+
+    if not isinstance(cmap, matplotlib.colors.Colormap):
+        _LUT_CACHE[key] = lut
+    return lut
+
+
+def colorbar_limits(zdata, vmin=None, vmax=None):
+    """Resolve the colorbar limits.
+
+    Missing limits are the minimum/maximum of the data, ignoring NaN.
+    Limits that are NaN, i.e., of data without valid values, are 0
+    as in matplotlib. Such data gets the bad color only.
+
+    Args:
+        zdata (numpy.ndarray): The data.
+        vmin (float): The lower colorbar limit or None.
+        vmax (float): The upper colorbar limit or None.
+
+    Returns:
+        A tuple (vmin, vmax).
+    """
+    with warnings.catch_warnings():
+        # All-NaN data
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if vmin is None:
+            vmin = np.nanmin(zdata)
+        if vmax is None:
+            vmax = np.nanmax(zdata)
+    return (0. if np.isnan(vmin) else vmin, 0. if np.isnan(vmax) else vmax)
+
+
+def lut_indices(zdata, vmin, vmax, ncolors):
+    """Map the data values to the rows of a colormap lookup table.
+
+    Args:
+        zdata (numpy.ndarray): The data.
+        vmin (float): The data value mapped to the first color.
+        vmax (float): The data value mapped to the last color.
+        ncolors (int): The number of colors of the colormap.
+
+    Returns:
+        An integer :class:`numpy.ndarray` of the shape of zdata.
+        See :func:`colormap_lut` for the rows of the under, over and bad colors.
+    """
+    assert vmin <= vmax, 'The minimum %s is larger than the maximum %s.' % (vmin, vmax)
+
+    # The same sequence of operations as in matplotlib.colors.Normalize and
+    # matplotlib.colors.Colormap, to obtain identical colors
+    scaled = np.subtract(zdata, vmin, dtype=np.float64)
+    # imshow masks NaN and infinite values, they get the bad color
+    bad = ~np.isfinite(scaled)
+    scaled[bad] = 0.
+    if vmax > vmin:
+        scaled /= (vmax - vmin)
+    else:
+        # Normalize maps all values to 0 if the limits are equal
+        scaled.fill(0.)
+    scaled *= ncolors
+    scaled[scaled == ncolors] = ncolors - 1
+
+    under = scaled < 0
+    over = scaled >= ncolors
+
+    indices = scaled.astype(np.intp)
+    indices[under] = ncolors
+    indices[over] = ncolors + 1
+    indices[bad] = ncolors + 2
+    return indices
+
+
+def to_rgba(zdata, cmap='jet', vmin=None, vmax=None, out=None):
+    """Color the data with a colormap.
+
+    The data is processed in blocks of rows, the temporary arrays
+    do not grow with the size of the data.
+
+    Args:
+        zdata (numpy.ndarray): The 2d data.
+        cmap (string): The name of a matplotlib colormap or a
+            :class:`matplotlib.colors.Colormap`.
+        vmin (float): The lower colorbar limit. Defaults to the data minimum.
+        vmax (float): The upper colorbar limit. Defaults to the data maximum.
+            See :func:`colorbar_limits` for data without valid values.
+        out (numpy.ndarray): An optional uint8 array of shape ``zdata.shape + (4,)``
+            for the result.
+
+    Returns:
+        A uint8 :class:`numpy.ndarray` of shape ``zdata.shape + (4,)``.
+        The first row of zdata is the first row of the image.
+    """
+    vmin, vmax = colorbar_limits(zdata, vmin, vmax)
+
+    lut = colormap_lut(cmap)
+    ncolors = lut.shape[0] - 3
+
+    if out is None:
+        out = np.empty(zdata.shape + (4,), dtype=np.uint8)
+    assert out.shape == zdata.shape + (4,), 'The output array has the wrong shape.'
+
+    rows = max(1, CHUNK_SIZE // max(1, zdata.shape[1]))
+    for start in range(0, zdata.shape[0], rows):
+        indices = lut_indices(zdata[start:start + rows], vmin, vmax, ncolors)
+        np.take(lut, indices, axis=0, out=out[start:start + rows])
+
+    return out
+
+
+def write_png(filename, rgba, compression=DEFAULT_COMPRESSION):
+    """Write an 8 bit RGBA image to a PNG file.
+
+    The image is compressed in blocks of rows, each block is written
+    as a separate IDAT chunk.
+
+    Args:
+        filename (string): The path of the PNG file.
+        rgba (numpy.ndarray): A uint8 array of shape (height, width, 4).
+            The first row is the top row of the image.
+        compression (int): The zlib compression level (0-9).
+    """
+    assert rgba.ndim == 3 and rgba.shape[2] == 4, 'Provide an RGBA image.'
+    height, width = rgba.shape[:2]
+    rgba = rgba.astype(np.uint8, copy=False)
+
+    with open(filename, 'wb') as pngfile:
+        pngfile.write(PNG_SIGNATURE)
+        pngfile.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+
+        compressor = zlib.compressobj(compression)
+        rows = max(1, CHUNK_SIZE // max(1, 4 * width))
+        scanlines = np.zeros((min(rows, height), 4 * width + 1), dtype=np.uint8)
+        for start in range(0, height, rows):
+            block = rgba[start:start + rows]
+            # Each scanline starts with the filter type byte 0 (None)
+            scanlines[:len(block), 1:] = block.reshape(len(block), -1)
+            payload = compressor.compress(scanlines[:len(block)].tobytes())
+            if payload:
+                pngfile.write(_png_chunk(b'IDAT', payload))
+        pngfile.write(_png_chunk(b'IDAT', compressor.flush()))
+
+        pngfile.write(_png_chunk(b'IEND', b''))
+
+
+def _png_chunk(tag, payload):
+    """Return a PNG chunk with length and checksum."""
+    checksum = zlib.crc32(payload, zlib.crc32(tag)) & 0xffffffff
+    return struct.pack('>I', len(payload)) + tag + payload + struct.pack('>I', checksum)
+
+
+def save_png(filename, zdata, cmap='jet', vmin=None, vmax=None, origin='lower',
+             compression=DEFAULT_COMPRESSION):
+    """Color the data and write it to a PNG file.
+
+    Args:
+        filename (string): The path of the PNG file.
+        zdata (numpy.ndarray): The 2d data.
+        cmap (string): The name of a matplotlib colormap.
+        vmin (float): The lower colorbar limit. Defaults to the data minimum.
+        vmax (float): The upper colorbar limit. Defaults to the data maximum.
+        origin (string): 'lower' puts the first row of zdata at the bottom of the image
+            (as in the plots of :class:`colorview2d.View`), 'upper' at the top.
+        compression (int): The zlib compression level (0-9).
+    """
+    if origin == 'lower':
+        zdata = zdata[::-1]
+    write_png(filename, to_rgba(zdata, cmap, vmin, vmax), compression)
+
+
+def save_png_tiles(dirname, zdata, tilesize=256, cmap='jet', vmin=None, vmax=None,
+                   origin='lower', compression=DEFAULT_COMPRESSION):
+    """Color the data and write it to PNG tiles.
+
+    The tiles are named ``<row>_<column>.png``, where the tile in row 0 and
+    column 0 is the top left corner of the image. The tiles at the
+    right and bottom edges are smaller if the size of the image
+    is not a multiple of the tilesize.
+
+    Args:
+        dirname (string): The directory of the tiles. It is created if necessary.
+        zdata (numpy.ndarray): The 2d data.
+        tilesize (int): The width and height of the tiles in pixels.
+        cmap (string): The name of a matplotlib colormap.
+        vmin (float): The lower colorbar limit. Defaults to the data minimum.
+        vmax (float): The upper colorbar limit. Defaults to the data maximum.
+        origin (string): 'lower' puts the first row of zdata at the bottom of the image.
+        compression (int): The zlib compression level (0-9).
+
+    Returns:
+        A list of the paths of the tiles.
+    """
+    # The colorbar limits are common to all tiles
+    vmin, vmax = colorbar_limits(zdata, vmin, vmax)
+    if origin == 'lower':
+        zdata = zdata[::-1]
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+
+    filenames = []
+    rgba = np.empty((tilesize, tilesize, 4), dtype=np.uint8)
+    for row, top in enumerate(range(0, zdata.shape[0], tilesize)):
+        for column, left in enumerate(range(0, zdata.shape[1], tilesize)):
+            tile = zdata[top:top + tilesize, left:left + tilesize]
+            tile_rgba = to_rgba(tile, cmap, vmin, vmax,
+                                out=rgba[:tile.shape[0], :tile.shape[1]])
+            filename = os.path.join(dirname, '%d_%d.png' % (row, column))
+            write_png(filename, tile_rgba, compression)
+            filenames.append(filename)
+
+    return filenames
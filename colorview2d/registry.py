@@ -0,0 +1,259 @@
+"""
+Registry of the mods available to :class:`colorview2d.View`.
+
+The registry is built once per process from lightweight metadata:
+the sources of the modules in the ``colorview2d/mods`` package are parsed
+(not imported) to find the classes that inherit from
+:class:`colorview2d.IMod`. Mods can also be provided by other packages
+via the entry point group ``colorview2d.mods``, e.g.::
+
+    entry_points={'colorview2d.mods': ['Mymod = mypackage.mymod:Mymod']}
+
+A mod module is imported and the mod is instantiated the first time
+the mod is used. The mod instances are shared by all views.
+
+Example
+-------
+::
+
+    from colorview2d.registry import REGISTRY
+
+    'Smooth' in REGISTRY        # no import
+    REGISTRY['Smooth']          # imports the module, returns the mod
+
+"""
+import ast
+import importlib
+import inspect
+import logging
+import os
+import pkgutil
+
+# The entry point group for mods provided by other packages.
+ENTRY_POINT_GROUP = 'colorview2d.mods'
+
+
+class ModEntry(object):
+    """
+    The metadata of a mod and the lazily created mod instance.
+
+    Args:
+        name (string): The title of the mod, i.e., the name of the mod class.
+        loader (callable): Returns the mod class.
+        doc (string): The docstring of the ``do_apply`` method of the mod, if known.
+    """
+    def __init__(self, name, loader, doc=None):
+        self.name = name
+        self.doc = doc
+        self._loader = loader
+        self._instance = None
+        self._failed = False
+
+    @property
+    def loaded(self):
+        """Boolean. Has the mod been imported and instantiated?"""
+        return self._instance is not None
+
+    def instance(self):
+        """Import the mod and return its (shared) instance.
+
+        Returns:
+            The mod instance or None if the mod can not be imported.
+        """
+        if self._instance is None and not self._failed:
+            try:
+                modclass = self._loader()
+                self._instance = modclass()
+                if self.doc is None and hasattr(modclass, 'do_apply'):
+                    self.doc = modclass.do_apply.__doc__
+            except Exception as error:
+                logging.error('Can not import mod %s.', self.name)
+                logging.error('Error: %s.', error)
+                self._failed = True
+
+        return self._instance
+
+
+class ModRegistry(object):
+    """
+    A mapping of mod titles to mod instances.
+
+    The mods are found by parsing the sources of the modules of a package
+    and by the entry points of the group ``colorview2d.mods``.
+    If a mod is not found, the package is scanned again, so that mods
+    added to the package while the process is running are found as well.
+    The package is rescanned at most once per unknown title, unknown titles
+    are remembered until the next explicit :meth:`ModRegistry.refresh`.
+
+    Args:
+        package_name (string): The name of the package containing the mod modules.
+    """
+    def __init__(self, package_name='colorview2d.mods'):
+        self._package_name = package_name
+        self._entries = None
+        # (mtime, size, entries) of the scanned source files
+        self._scanned = {}
+        # The titles not found by a rescan
+        self._unknown = set()
+
+    def __getitem__(self, name):
+        """Return the mod instance for a title. The mod is imported on first use.
+
+        Returns:
+            The mod instance or None if the mod can not be imported.
+        """
+        return self.entry(name).instance()
+
+    def __contains__(self, name):
+        try:
+            self.entry(name)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def keys(self):
+        """The titles of all mods."""
+        return list(self.entries.keys())
+
+    @property
+    def entries(self):
+        """A dictionary of the :class:`ModEntry` objects of all mods."""
+        if self._entries is None:
+            self.refresh()
+        return self._entries
+
+    def entry(self, name):
+        """Return the :class:`ModEntry` for a title without importing the mod.
+        Rescans the package if the title is not known, once per title.
+        """
+        if name not in self.entries and name not in self._unknown:
+            self.refresh()
+            if name not in self._entries:
+                self._unknown.add(name)
+        return self._entries[name]
+
+    def refresh(self):
+        """Scan the package and the entry points for mods.
+        Only the modules that changed since the last scan are parsed again.
+        """
+        package = importlib.import_module(self._package_name)
+        entries = {}
+        scanned = {}
+
+        for path in package.__path__:
+            for _, modname, _ in pkgutil.iter_modules([path]):
+                source = os.path.join(path, modname + '.py')
+                if not os.path.isfile(source):
+                    # no source, e.g. in a frozen application
+                    entries.update(self._import_mods(modname))
+                    continue
+
+                stat = os.stat(source)
+                key = (stat.st_mtime, stat.st_size)
+                if source in self._scanned and self._scanned[source][0] == key:
+                    module_entries = self._scanned[source][1]
+                else:
+                    importlib.invalidate_caches()
+                    module_entries = self._parse_mods(source, modname)
+                scanned[source] = (key, module_entries)
+                entries.update(module_entries)
+
+        for name, loader in _entry_point_loaders():
+            if name not in entries:
+                entries[name] = ModEntry(name, loader)
+
+        # Keep the instances of the mods that are already loaded
+        if self._entries:
+            for name, entry in self._entries.items():
+                if name in entries and entry.loaded:
+                    entries[name] = entry
+
+        self._entries = entries
+        self._scanned = scanned
+        self._unknown = set()
+
+    def _module_loader(self, modname, classname):
+        """Return a function that imports the module and returns the mod class."""
+        def load():
+            module = importlib.import_module('%s.%s' % (self._package_name, modname))
+            return getattr(module, classname)
+        return load
+
+    def _parse_mods(self, source, modname):
+        """Find the mod classes in the source of a module.
+
+        A mod class is a class with a base class named ``IMod``,
+        e.g. ``imod.IMod`` or ``colorview2d.IMod``.
+
+        Returns:
+            A dictionary of :class:`ModEntry` objects.
+        """
+        entries = {}
+        try:
+            with open(source) as sourcefile:
+                tree = ast.parse(sourcefile.read(), source)
+        except (SyntaxError, IOError, UnicodeDecodeError) as error:
+            logging.error('Can not parse mod module %s.', modname)
+            logging.error('Error: %s.', error)
+            return entries
+
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            basenames = [base.attr if isinstance(base, ast.Attribute) else
+                         getattr(base, 'id', None) for base in node.bases]
+            if 'IMod' not in basenames:
+                continue
+            doc = None
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name == 'do_apply':
+                    doc = ast.get_docstring(item, clean=False)
+            entries[node.name] = ModEntry(
+                node.name, self._module_loader(modname, node.name), doc)
+
+        return entries
+
+    def _import_mods(self, modname):
+        """Import a module to find its mod classes.
+
+        Returns:
+            A dictionary of :class:`ModEntry` objects.
+        """
+        import colorview2d
+
+        entries = {}
+        try:
+            module = importlib.import_module('%s.%s' % (self._package_name, modname))
+        except Exception as error:
+            logging.error('Can not import mod %s.', modname)
+            logging.error('Error: %s.', error)
+            return entries
+
+        for name, obj in inspect.getmembers(module, inspect.isclass):
+            if issubclass(obj, colorview2d.IMod) and obj is not colorview2d.IMod:
+                entries[name] = ModEntry(name, lambda obj=obj: obj, obj.do_apply.__doc__)
+
+        return entries
+
+
+def _entry_point_loaders():
+    """Return the names and load functions of the mods registered as entry points."""
+    from importlib.metadata import entry_points
+
+    try:
+        points = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:
+        # Python < 3.10
+        points = entry_points().get(ENTRY_POINT_GROUP, [])
+
+    return [(point.name, point.load) for point in points]
+
+
+# The registry of the mods in colorview2d.mods, shared by all views.
+REGISTRY = ModRegistry()
@@ -2,10 +2,10 @@
 import os
 import sys
 import logging
+import contextlib
+import numpy as np
 import yaml
 
-import six
-
 def resource_path(relative_path):
     """Return the absolute path to a resource"""
     if getattr(sys, 'frozen', False):
@@ -17,6 +17,25 @@ def resource_path(relative_path):
 
     return os.path.join(application_path, relative_path)
 
+# The parsed default config file, see default_config
+_DEFAULT_CONFIG = {}
+
+def default_config():
+    """Return a copy of the parameters in the default config file.
+    The file is parsed only once per process.
+    """
+    path = resource_path('default.cv2d')
+    if path not in _DEFAULT_CONFIG:
+        with open(path) as cfgfile:
+            _DEFAULT_CONFIG[path] = yaml.load(cfgfile, Loader=yaml.SafeLoader)
+    return dict(_DEFAULT_CONFIG[path])
+
+def plain_values(mapping):
+    """Return a copy of a dict with numpy scalars converted to Python values,
+    as required by :func:`yaml.safe_dump`."""
+    return {key: value.item() if isinstance(value, np.generic) else value
+            for key, value in mapping.items()}
+
 class Config(yaml.YAMLObject):
     """A class to host the configuration of the :class:`colorview2d.View`
     class.
@@ -27,8 +46,10 @@ class Config(yaml.YAMLObject):
         """Read the default config file and update it with any given arguments.
         """
         self._default_config_file_path = resource_path('default.cv2d')
-        with open(self._default_config_file_path) as cfgfile:
-            self._dict = yaml.load(cfgfile, Loader=yaml.SafeLoader)
+        self._dict = default_config()
+        # The nesting depth of batch() and the keys changed in the batch
+        self._batch_depth = 0
+        self._batch_keys = []
 
 
         self.update(*args, **kwargs)
@@ -50,8 +71,36 @@ class Config(yaml.YAMLObject):
             raise KeyError('Not a valid configuration key %s.' % key)
 
         self._dict[key] = value
-        self.on_change(key, value)
-
+        if self._batch_depth:
+            if key not in self._batch_keys:
+                self._batch_keys.append(key)
+        else:
+            self.on_change(key, value)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """A context in which changes of parameters are collected.
+
+        The hook :meth:`Config.on_batch_change` is called once with all changed
+        keys when the (outermost) context exits, instead of calling
+        :meth:`Config.on_change` for each change.
+
+        Example::
+
+            with view.config.batch():
+                view.config['Font'] = 'Ubuntu'
+                view.config['Fontsize'] = 18
+            # the plot is redrawn once
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._batch_keys:
+                keys = self._batch_keys
+                self._batch_keys = []
+                self.on_batch_change(keys)
 
     def on_change(self, key, value):
         """Hook to react to a change in any parameter.
@@ -61,6 +110,16 @@ class Config(yaml.YAMLObject):
         """
         pass
 
+    def on_batch_change(self, keys):
+        """Hook to react to the changes of parameters in a batch, see :meth:`Config.batch`.
+        Calls :meth:`Config.on_change` for each key unless overwritten.
+
+        Args:
+            keys (list): The changed keys in the order of their first change.
+        """
+        for key in keys:
+            self.on_change(key, self._dict[key])
+
 
     def update_raw(self, *args, **kwargs):
         """Update the config dict without invoking the post update hook on_change().
@@ -80,16 +139,19 @@ class Config(yaml.YAMLObject):
 
     def update(self, *args, **kwargs):
         """Update the dict. Note that we call __setitem__ on each item
-        so that on_change is triggered, as opposed to update_raw."""
+        so that on_change is triggered, as opposed to update_raw.
+        The changes are applied as a batch, see :meth:`Config.batch`."""
         if args:
             if len(args) > 1:
                 raise TypeError("update expected at most 1 arguments, "
                                 "got %d" % len(args))
-            other = dict(args[0])
-            for key in other:
-                self.set(key, other[key])
-        for key in kwargs:
-            self.set(key, kwargs[key])
+        with self.batch():
+            if args:
+                other = dict(args[0])
+                for key in other:
+                    self.set(key, other[key])
+            for key in kwargs:
+                self.set(key, kwargs[key])
 
     @property
     def dict(self):
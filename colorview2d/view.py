@@ -2,12 +2,15 @@
 """
 The view module hosts the View class, the central object of cv2d.
 """
+import contextlib
+import copy
 import logging
 import os
-import sys
-import six
 import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.ticker import FormatStrFormatter
 from matplotlib.widgets import Slider, Button
     
@@ -15,8 +18,24 @@ from matplotlib.widgets import Slider, Button
 import yaml
 
 from colorview2d import Data
+from colorview2d.cache import DiskCache, StageCache, fingerprint
+from colorview2d.executor import Executor
+from colorview2d.instrument import Instrumentation
+from colorview2d import registry
+import colorview2d.fileloaders as fileloaders
+import colorview2d.raster as raster
 import colorview2d.utils as utils
 
+# The config keys that are applied without redrawing the plot
+_COLORBAR_KEYS = set(['Colormap', 'Cbmin', 'Cbmax'])
+_LABEL_KEYS = set(['Xlabel', 'Ylabel', 'Xtickformat', 'Ytickformat', 'Cblabel'])
+
+# The bytes per pixel of a pyramid level (min, max, mean, count and extrema)
+_PYRAMID_PIXEL_BYTES = 40
+
+# Used instead of the measurements if the View is not instrumented
+_NO_MEASUREMENT = contextlib.nullcontext()
+
 # setup logging
 
 LOGGER = logging.getLogger('colorview2d')
@@ -49,7 +68,7 @@ class View(object):
     :Undocumented methods:
 
         The class provides methods that are not documented
-        because they are generated on-init.
+        because they are generated on first use.
 
         - ``add_<Modname>(arg1, ...)`` and ``rm_<Modname>()``.
             There is one such method for each mod in ``modlist``.
@@ -67,15 +86,57 @@ class View(object):
         fig.add_Smooth(2, 2)
         fig.plot_pdf('Test.pdf')
 
+    :Headless mode:
+
+        A View created with ``headless=True`` renders to a non-interactive
+        Agg canvas. It does not create the colorbar control figure and does not
+        change the global state of :mod:`matplotlib.pyplot`: the figure is not
+        registered with pyplot and the font settings are only applied
+        while drawing and saving the plot. Use it for batch rendering,
+        e.g. ``colorview2d.View(data, headless=True).plot_pdf('Test.pdf')``.
+
+    :Out-of-core:
+
+        With a ``memory_budget`` (in bytes), arrays larger than the budget are
+        processed out-of-core. Open the data memory-mapped, e.g. with
+        ``colorview2d.fileloaders.load_cv2dfile(path, mmap_mode='r')``: the original
+        is not copied, the pipeline is applied chunk by chunk and the results are
+        written to memory-mapped temporary files (see :class:`colorview2d.executor.Executor`).
+        The interactive plot shows a level of the data pyramid that fits into the
+        budget, :meth:`View.plot_pdf` plots the data in full resolution.
+
+    :Persistent cache:
+
+        With a ``cache_dir``, the results of the pipeline are kept in that
+        directory across sessions (see :class:`colorview2d.cache.DiskCache`).
+        Reopening the same data with the same pipeline, e.g.
+        ``colorview2d.View(data, cfgfile='Nice.cv2d', cache_dir='~/.cache/colorview2d')``,
+        opens the stored result memory-mapped instead of applying the mods.
+        The result is stored when the pipeline is set as a whole (on creation,
+        by ``myview.pipeline = ...``, ``load_config`` and ``replace_data``) and by
+        :meth:`View.persist_result`. Adding and removing single mods does not
+        write to the disk.
+        The size limit can be configured via ``myview.disk_cache.max_bytes``.
+
+    :Instrumentation:
+
+        With ``instrumentation=True`` (or a :class:`colorview2d.instrument.Instrumentation`
+        with hooks), the wall time, the CPU time, the shapes and the allocated memory
+        of every pipeline stage and the time of the rendering steps are recorded,
+        see :attr:`View.last_run_stats`. Without, nothing is measured.
 
     """
+    # The mods are shared by all views, see colorview2d.registry
+    _modlist = registry.REGISTRY
+
     def __init__(self, data=None,
                  cfgfile=None,
                  config=None,
-                 pipeline=None):
-
-        self._modlist = {}
-        self._create_modlist()
+                 pipeline=None,
+                 headless=False,
+                 memory_budget=None,
+                 cache_dir=None,
+                 instrumentation=None):
 
         self._data = None
         
@@ -86,12 +147,25 @@ class View(object):
         else:
             raise ValueError("Provide a 2d numpy.ndarray or a colorview2d.Data"
                              "instance to create a View object.")
-        self._original_data = self._data.deep_copy()
+        # Applies runs of mods with capabilities (e.g. elementwise) efficiently
+        self._executor = Executor(memory_budget=memory_budget)
+        self._original_data = self._copy_original(self._data)
+
+        # The intermediate results of the pipeline stages
+        self._stage_cache = StageCache()
+        # The results of the pipeline kept across sessions
+        self._disk_cache = DiskCache(cache_dir) if cache_dir is not None else None
+        # The fingerprint of the original data, computed on first use of the disk cache
+        self._fingerprint = None
+        # Records the timing of the pipeline and the rendering, None if disabled
+        self._instrumentation = None
+        self.instrumentation = instrumentation
 
         self._config = utils.Config()
-        # overwrite the on_change hook of the Config class.
+        # overwrite the on_change hooks of the Config class.
         # this way we can react to changes in the config appropriately.
         self._config.on_change = self._on_config_change
+        self._config.on_batch_change = self._on_config_changes
             
         # The pipeline contains a dict of numbers and tuples with
         # strings that are unique to IMod objects
@@ -112,23 +186,33 @@ class View(object):
         # Matplotlib figure object, contains the actual plot
         # Generated upon retrieval by property accessor
         # Readonly, Initialized with one pixel
-        plt.ioff()
-        self._fig = plt.figure(1, dpi=self._config['Dpi'])
-        self._colorcontrolfigure = plt.figure(figsize=(9, 1))
+        self._headless = headless
+        # Display a level of the data pyramid matching the resolution of the axes
+        self._multiresolution = False
+        # Draw the data in full resolution, even out-of-core (plotting to a file)
+        self._full_resolution = False
+        if headless:
+            # The figure is not managed by pyplot and there are no colorbar controls
+            self._fig = Figure(dpi=self._config['Dpi'])
+            FigureCanvasAgg(self._fig)
+            self._colorcontrolfigure = None
+        else:
+            plt.ioff()
+            self._fig = plt.figure(1, dpi=self._config['Dpi'])
+            self._colorcontrolfigure = plt.figure(figsize=(9, 1))
 
         # We use the property setter to add the given pipeline.
         if pipeline is not None:
             self.pipeline = pipeline
 
         self._apply_pipeline()
-
-        # generate the config setters
-        self._generate_config_setter()
+        self.persist_result()
 
 
     @property
     def modlist(self):
-        """A (autogenerated) list of all mods that can be found in the mods/ subfolder."""
+        """A (autogenerated) mapping of the titles of all mods that can be found
+        in the mods/ subfolder to the mod objects. The mod objects are shared by all views."""
         return self._modlist
 
     @property
@@ -136,6 +220,55 @@ class View(object):
         """A :class:`colorview2d.Data`. It encapsulates the 2d data."""
         return self._data
 
+    @property
+    def headless(self):
+        """Boolean. Is the View rendering without pyplot and colorbar controls?"""
+        return self._headless
+
+    @property
+    def stage_cache(self):
+        """The :class:`colorview2d.cache.StageCache` holding the intermediate
+        results of the pipeline. Its budgets can be configured via
+        ``myview.stage_cache.max_bytes`` and ``myview.stage_cache.max_disk_bytes``
+        (memory-mapped, out-of-core results)."""
+        return self._stage_cache
+
+    @property
+    def disk_cache(self):
+        """The :class:`colorview2d.cache.DiskCache` holding the results of the
+        pipeline across sessions. None if the View was created without ``cache_dir``."""
+        return self._disk_cache
+
+    @property
+    def instrumentation(self):
+        """The :class:`colorview2d.instrument.Instrumentation` recording the timing
+        of the pipeline and the rendering, or None (default) if nothing is measured.
+        Set to True to create one, hooks can be added via
+        ``myview.instrumentation.hooks.append(callback)``."""
+        return self._instrumentation
+
+    @instrumentation.setter
+    def instrumentation(self, instrumentation):
+        """Enable (True or an Instrumentation) or disable (None or False) the instrumentation."""
+        if instrumentation is True:
+            instrumentation = Instrumentation()
+        self._instrumentation = instrumentation or None
+
+    @property
+    def last_run_stats(self):
+        """The :class:`colorview2d.instrument.RunStats` of the last application
+        of the pipeline and of the last rendering. None if the View is not instrumented."""
+        if self._instrumentation is None:
+            return None
+        return self._instrumentation.stats
+
+    @property
+    def executor(self):
+        """The :class:`colorview2d.executor.Executor` that applies the mods
+        of the pipeline. Its block size and memory budget can be configured via
+        ``myview.executor.block_size`` and ``myview.executor.memory_budget``."""
+        return self._executor
+
     @data.setter
     def data(self, data):
         """Sets the :class:`colorview2d.Data` of the View."""
@@ -151,18 +284,15 @@ class View(object):
         """
 
         if self.plotting:
-            self._plot.set_data(self._data.zdata)
-            self._plot.set_extent([self._data.xleft, self._data.xright,
-                                   self._data.ybottom, self._data.ytop])
             self._axes.set_xlim(self._data.xleft, self._data.xright)
             self._axes.set_ylim(self._data.ybottom, self._data.ytop)
+            self._update_plot_data()
 
             # we redraw the colorbar sliders to set the slider range correctly
-            if self._colorcontrolfigure.axes:
+            if self._colorcontrolfigure is not None and self._colorcontrolfigure.axes:
                 self._show_cbsliders()
             # re-setting the value triggers update of the plot
-            self._config['Cbmin'] = 'auto'
-            self._config['Cbmax'] = 'auto'
+            self._config.update({'Cbmin': 'auto', 'Cbmax': 'auto'})
 
         return
 
@@ -214,8 +344,8 @@ class View(object):
 
     @pipeline.setter
     def pipeline(self, pipeline):
-        """Overwrite the pipeline string. Note that this is used for initialization
-        and does not trigger any modifications to the data.
+        """Overwrite the pipeline string. The new pipeline is applied once
+        after all mods are added.
 
         Args:
             pipeline (list): A list of strings that are valid mod identifiers.
@@ -223,7 +353,9 @@ class View(object):
         self._pipeline = []
 
         for modstring in pipeline:
-            self.add_mod(modstring[0], modstring[1])
+            self.add_mod(modstring[0], modstring[1], do_apply=False)
+        self._apply_pipeline()
+        self.persist_result()
 
     @property
     def plotting(self):
@@ -249,29 +381,6 @@ class View(object):
     #     self.mainapp = mainapp.MainApp(self)
     #     self.mainapp.MainLoop()
 
-    def _generate_config_setter(self):
-        """Add a simplified interface to changing config values.
-
-        This interface makes it possible to change config values using
-        ``view.set_<config-parameter>(parameter)``.
-        """
-        def add_method_signature(parameter):
-            """Add set_<parameter> as a method signature to View class."""
-            def setme(args):
-                self.config[parameter] = args
-            setme.__name__ = "set_%s" % parameter
-            setme.__doc__ = "Set the parameter %s in the configuration." % parameter
-            setattr(self, setme.__name__, setme)
-            # def getme(*args):
-            #     return self.config[parameter]
-            # getme.__name__ = "get_%s" % parameter
-            # getme.__doc__ = "Get the parameter %s from the configuration." % parameter
-            # setattr(self, getme.__name__, getme)
-
-        for parameter in self._config.dict:
-            add_method_signature(parameter)
-
-
     def show_plt_fig(self):
         """Show two interactive :class:`matplotlib.pyplot.Figure` plots.
         The first displays the data with config and pipeline applied.
@@ -283,6 +392,10 @@ class View(object):
         # interactive figure, we have to
         # create a dummy figure and use its
         # manager to display "fig"
+        if self._headless:
+            logging.warning('A headless View can not show an interactive plot.')
+            return
+        self._multiresolution = True
 
         if not self._plt_fig_is_active():
             dummy_fig = plt.figure()
@@ -325,54 +438,42 @@ class View(object):
             delattr(self, '_fig_manager')
             plt._pylab_helpers.Gcf.destroy(self._fig_manager_colorctrls.num)
             delattr(self, '_fig_manager_colorctrls')
+        self._multiresolution = False
         # we delete _plot which indicates that we are not plotting
         if hasattr(self, '_plot'):
             delattr(self, '_plot')
 
-    def _create_modlist(self):
-        """
-        Creates the list of mods from the mods/ folder and adds them
-        to the private modlist attribute.
+    def __getattr__(self, name):
+        """Provide the shortcut methods ``add_<Modname>``, ``rm_<Modname>``
+        and ``set_<Parametername>``.
 
-        We check if the module (with arbitrary name) contains a class
-        which inherits from colorview2d.IMod
+        The methods are created once per name and stored in the View class,
+        i.e., subsequent lookups do not end up here.
+        Only called if the attribute is not found by the ordinary lookup.
         """
-        import pkgutil
-        import inspect
-
-        import colorview2d.mods
-
-        package = colorview2d.mods
-        for importer, modname, ispckg in pkgutil.iter_modules(package.__path__):
-            try:
-                mod = importer.find_module(modname).load_module(modname)
-                for name, obj in inspect.getmembers(mod):
-                    if inspect.isclass(obj):
-                        if issubclass(obj, colorview2d.IMod):
-                            self._modlist[name] = obj()
-            except:
-                error = sys.exc_info()[0]
-                logging.error('Can not import mod %s.', modname)
-                logging.error('Error: %s.', error)
-        # Now let us export functions of the form add_Modname and rm_Modname
-        # to the namespace of the View class
-
-        def add_func_signatures(modtitle):
-            def addme(*args):
-                self.add_mod(modtitle, args)
-            addme.__name__ = "add_%s" % modtitle
-            addme.__doc__ = self._modlist[modtitle].do_apply.__doc__
-            setattr(self, addme.__name__, addme)
-
-            def removeme():
-                self.remove_mod(modtitle)
-            removeme.__name__ = "rm_%s" % modtitle
-            removeme.__doc__ = "Remove mod %s from pipeline." % modtitle
-            setattr(self, removeme.__name__, removeme)
-            
-        
+        prefix, _, suffix = name.partition('_')
+        method = None
+        if prefix == 'add' and suffix in self._modlist:
+            method = _mod_adder(suffix, self._modlist.entry(suffix).doc)
+        elif prefix == 'rm' and suffix in self._modlist:
+            method = _mod_remover(suffix)
+        elif prefix == 'set' and '_config' in self.__dict__ and suffix in self._config.dict:
+            method = _config_setter(suffix)
+
+        if method is None:
+            raise AttributeError("'%s' object has no attribute '%s'" %
+                                 (self.__class__.__name__, name))
+
+        setattr(View, name, method)
+        return getattr(self, name)
+
+    def __dir__(self):
+        """List the generated shortcut methods along with the ordinary attributes."""
+        names = set(dir(self.__class__)) | set(self.__dict__)
         for modtitle in self._modlist:
-            add_func_signatures(modtitle)
+            names.update(['add_%s' % modtitle, 'rm_%s' % modtitle])
+        names.update(['set_%s' % parameter for parameter in self._config.dict])
+        return sorted(names)
 
     def add_mod(self, modname, modargs=(), pos=-1, do_apply=True):
         """Add a mod to the pipeline by its title string and its arguments either
@@ -442,31 +543,143 @@ class View(object):
         It is normally not necessary to manually call this function unless
         the pipeline string is not overwritten directly.
 
-        The data is first reverted to its original state,
-        then mods are applied in the order they were added.
+        The data is reverted to the result of the longest pipeline prefix
+        found in the stage cache (or to its original state),
+        then the remaining mods are applied in the order they were added.
+        Consecutive elementwise mods are applied in a single pass
+        by the executor, the result of such a run is cached as one stage.
         The plot panel is notified of the update in the data.
         The main panel is signalled to update the color controls.
         """
-
-        self._data = self._original_data.deep_copy()
-
-        for pos, modtuple in enumerate(self._pipeline):
-            mod = self._modlist[modtuple[0]]
-            if mod:
-                # if apply returns false, the application failed and the
-                # mod is removed from the pipeline
-                if not mod.apply(self._data, modtuple[1]):
-                    logging.warning(
-                        'Application of mod %s at position %d failed.'
-                        'Removing mod from pipeline.',
-                        mod.title,
-                        pos)
-                    self.remove_mod(pos)
-            else:
-                logging.warning('No mod candidate found for %s.', modtuple[0])
+        # The stages share their arrays (copy-on-write), mods
+        # that write to the array in-place copy it first.
+        start, data = self._cached_stage()
+        self._data = data.shallow_copy()
+        if self._instrumentation is not None:
+            self._instrumentation.start_pipeline(start)
+
+        pos = start
+        while pos < len(self._pipeline):
+            run = self._next_run(pos)
+            if not run:
+                logging.warning('No mod candidate found for %s.', self._pipeline[pos][0])
+                pos += 1
+                continue
+
+            with self._measure_stage(run, pos):
+                failed = self._apply_run(run)
+            if failed is not None:
+                # the application failed and the mod is removed from the pipeline
+                logging.warning(
+                    'Application of mod %s at position %d failed.'
+                    'Removing mod from pipeline.',
+                    run[failed][0].title,
+                    pos + failed)
+                # Removing the mod re-applies the pipeline.
+                self.remove_mod(pos=pos + failed + 1)
+                return
+
+            pos += len(run)
+            self._stage_cache.put(
+                StageCache.key(self._pipeline[:pos]), self._data.shallow_copy())
 
         self._data_changed()
 
+    def persist_result(self):
+        """Write the result of the pipeline to the disk cache.
+
+        Nothing is written if the View has no disk cache or the
+        result is already stored. It is called when the pipeline is
+        set as a whole, call it to keep the result of interactive edits.
+        """
+        if self._disk_cache is None or not self._pipeline:
+            return
+        key = self._disk_cache_key()
+        if key not in self._disk_cache:
+            self._disk_cache.put(key, self._data)
+
+    def _apply_run(self, run):
+        """Apply a run of mods to the data.
+
+        Args:
+            run (list): The (mod, modargs) tuples of the run.
+
+        Returns:
+            The position of the first mod in the run whose application failed,
+            None if all mods were applied.
+        """
+        if self._executor.execute(run, self._data):
+            return None
+        for offset, (mod, modargs) in enumerate(run):
+            # if apply returns false, the application failed
+            if not mod.apply(self._data, modargs):
+                return offset
+        return None
+
+    def _measure_stage(self, run, pos):
+        """A context measuring the application of a run of mods at a position."""
+        if self._instrumentation is None:
+            return _NO_MEASUREMENT
+        return self._instrumentation.stage(
+            [mod.title for mod, _ in run], pos, pos + len(run), self._data)
+
+    def _measure_render(self, step):
+        """A context measuring a rendering step."""
+        if self._instrumentation is None:
+            return _NO_MEASUREMENT
+        return self._instrumentation.render_step(step)
+
+    def _rendering(self):
+        """A context grouping the rendering steps."""
+        if self._instrumentation is None:
+            return _NO_MEASUREMENT
+        return self._instrumentation.rendering()
+
+    def _next_run(self, pos):
+        """Return the run of mods of the pipeline starting at a position.
+
+        A run is a sequence of consecutive elementwise mods
+        or a single mod of another kind.
+
+        Returns:
+            A list of (mod, modargs) tuples. Empty if the mod at the position is not found.
+        """
+        run = []
+        for title, modargs in self._pipeline[pos:]:
+            mod = self._modlist[title] if title in self._modlist else None
+            if not mod or (run and not (mod.elementwise and run[0][0].elementwise)):
+                break
+            run.append((mod, modargs))
+            if not mod.elementwise:
+                break
+        return run
+
+    def _cached_stage(self):
+        """Find the longest prefix of the pipeline with a cached result.
+
+        Returns:
+            A tuple of the number of pipeline stages covered and the
+            corresponding :class:`colorview2d.Data`.
+        """
+        for stages in range(len(self._pipeline), 0, -1):
+            data = self._stage_cache.get(StageCache.key(self._pipeline[:stages]))
+            if data is None and stages == len(self._pipeline) and self._disk_cache is not None:
+                data = self._disk_cache.get(self._disk_cache_key())
+                if data is not None:
+                    self._stage_cache.put(StageCache.key(self._pipeline), data)
+            if data is not None:
+                logging.info('Pipeline stages 1 to %d found in cache.', stages)
+                return (stages, data)
+
+        return (0, self._original_data)
+
+    def _disk_cache_key(self):
+        """The key of the result of the pipeline in the disk cache."""
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(self._original_data)
+        versions = [self._modlist[title].version if title in self._modlist else None
+                    for title, _ in self._pipeline]
+        return DiskCache.key(self._fingerprint, self._pipeline, versions)
 
     def get_arraydata(self):
         """Shortcut for the 2d data contained int the data.
@@ -488,37 +701,76 @@ class View(object):
             newdata (:class:`colorview2d.Data`): the new data.
         """
         self._data = newdata
-        self._original_data = newdata.deep_copy()
+        self._original_data = self._copy_original(newdata)
+        self._fingerprint = None
+        self._stage_cache.clear()
         self._apply_pipeline()
+        self.persist_result()
+
+    def _copy_original(self, data):
+        """Return the copy of the raw data.
+        Memory-mapped arrays are not copied, the copy holds a read-only view
+        of the array. The data passed in is not modified, note that writing to
+        a writable memory map changes the raw data of the View as well.
+        Data that is not loaded yet is not loaded."""
+        if getattr(data, 'loaded', True) and isinstance(data.zdata, np.memmap):
+            original = copy.copy(data)
+            original.zdata = data.zdata.view()
+            original.zdata.flags.writeable = False
+            return original
+        return data.deep_copy()
 
     def load_config(self, cfgpath):
         """Load the configuration and the pipeline from a config file
         specified in the YAML format.
 
+        The configuration and the pipeline can also be read from the header
+        of a binary colorview2d data file, see
+        :func:`colorview2d.fileloaders.save_cv2dfile`.
+
         Args:
             cfgpath (string): The path to a cv2d configuration file.
         """
         from ast import literal_eval
 
+        if fileloaders.is_cv2dfile(cfgpath):
+            header = fileloaders.read_cv2dheader(cfgpath)
+            self._load_config(header.get('config', {}), header.get('pipeline'))
+            return
+
         with open(cfgpath) as cfgfile:
-            doclist = yaml.load_all(cfgfile)
+            doclist = yaml.load_all(cfgfile, Loader=yaml.SafeLoader)
             # The config dict is the first yaml document
-
-            # Note that the advance_iterator does doclist.next()
-            # and is a 2to3 compatibility issue
-            self._config.update_raw(six.advance_iterator(doclist))
-            if self.plotting:
-                self.draw_plot()
+            config = next(doclist)
             # The pipeline string is the second. It is optional.
             try:
-                logging.info('Pipeline string found: %s', self.pipeline)
-                pipeline = literal_eval(six.advance_iterator(doclist))
-                # Note that the property setter is called
-                # applying the mods one by one
-                self.pipeline = pipeline
-
+                pipeline = literal_eval(next(doclist))
+                logging.info('Pipeline string found: %s', pipeline)
             except StopIteration:
                 logging.info('No pipeline string found.')
+                pipeline = None
+
+        self._load_config(config, pipeline)
+
+    def _load_config(self, config, pipeline=None):
+        """Apply a loaded configuration and pipeline.
+        An existing plot is updated once.
+
+        Args:
+            config (dict): The configuration parameters.
+            pipeline (list): The pipeline or None.
+        """
+        unknown = [key for key in config if key not in self._config.dict]
+        if unknown:
+            logging.warning('Ignoring unknown config parameters %s.', unknown)
+
+        with self._config.batch():
+            self._config.update(
+                dict((key, value) for key, value in config.items() if key not in unknown))
+            if pipeline is not None:
+                # Note that the property setter is called
+                # applying the mods
+                self.pipeline = pipeline
 
 
     def save_config(self, cfgpath):
@@ -529,55 +781,123 @@ class View(object):
         """
         with open(cfgpath, 'w') as stream:
             # We write first the config dict
-            yaml.dump(self._config.dict, stream, explicit_start=True)
+            yaml.safe_dump(utils.plain_values(self._config.dict), stream, explicit_start=True)
             # ... and second the pipeline string
-            yaml.dump(repr(self._pipeline), stream, explicit_start=True)
+            yaml.safe_dump(repr(self._pipeline), stream, explicit_start=True)
 
     def _on_config_change(self, key, value):
-        """Called when paramters in the utils.Config class are changed.
-        
+        """Called when paramters in the utils.Config class are changed."""
+        self._on_config_changes([key])
+
+    def _on_config_changes(self, keys):
+        """Called when one or several paramters in the utils.Config class are changed.
+
         We use different levels of severeness. When only colorbar settings
         are changed, this can be done easily, but changes to the font
-        require redrawing the whole plot.
+        require redrawing the whole plot. The cheapest update that
+        covers all changed keys is applied once.
+
+        Args:
+            keys (list): The changed keys.
         """
         # When there is no plot we do not care at the moment.
         if not self.plotting:
             return
 
+        keys = set(keys)
+        # If the font parameters, the ticksize or the format of the colorbar ticks
+        # is changed, we have to redraw the plot. The redraw applies all other changes.
+        if keys - _COLORBAR_KEYS - _LABEL_KEYS:
+            self.draw_plot()
+            return
+
         # For all changes to the colorbar we just have to call _plot.changed()
         # to redraw
-        if key == 'Colormap':
+        if 'Colormap' in keys:
             self._plot.set_cmap(self._config['Colormap'])
-        elif key in ['Cbmin', 'Cbmax']:
+        if keys & set(['Cbmin', 'Cbmax']):
             (cbmin, cbmax) = self._get_cblims()
             self._plot.set_clim(vmin=cbmin, vmax=cbmax)
             # update the slider
-            if self._colorcontrolfigure.axes:
+            if self._colorcontrolfigure is not None and self._colorcontrolfigure.axes:
                 self._min_slider.set_val(cbmin)
                 self._max_slider.set_val(cbmax)
-
-        if key in ['Colormap', 'Cbmin', 'Cbmax']:
+        if keys & _COLORBAR_KEYS:
             self._plot.changed()
-            return
 
-        # If config_dict only contains changes that do not need a redrawing
-        # of the plot we apply them and return
-        if key in ['Xlabel', 'Ylabel', 'Xtickformat', 'Ytickformat', 'Cblabel']:
+        # Changes that do not need a redrawing of the plot
+        if keys & _LABEL_KEYS:
             self._apply_config_post_plot()
-            return
-
-        # If the font parameters, the ticksize or the format of the colorbar ticks
-        # is changed, we have to redraw the plot
-        self.draw_plot()
 
     def plot_pdf(self, filename):
-        """Redraw the figure and plot it to a pdf file."""
+        """Redraw the figure and plot it to a pdf file.
+        The pdf contains the data in full resolution."""
+        multiresolution = self._multiresolution
+        self._multiresolution = False
+        self._full_resolution = True
+        with self._rendering():
+            try:
+                self._plot_pdf(filename)
+            finally:
+                self._multiresolution = multiresolution
+                self._full_resolution = False
+            if multiresolution:
+                self.draw_plot()
+
+    def _plot_pdf(self, filename):
+        """Redraw the figure and plot it to a pdf file, see :meth:`View.plot_pdf`."""
         self.draw_plot()
         # Note that the Width and Height parameters are *only* applied
         # when plotting to pdf.
         self._fig.set_size_inches(self._config['Width'], self._config['Height'])
-        self._fig.tight_layout()
-        self._fig.savefig(filename, dpi=self._config['Dpi'])
+        if self._headless:
+            # The tick labels are created while saving, the fonts have to be set
+            with matplotlib.rc_context(self._rc_params()):
+                self._save_fig(filename)
+        else:
+            self._save_fig(filename)
+
+    def _save_fig(self, filename):
+        """Apply the layout and save the figure to a file."""
+        with self._measure_render('tight_layout'):
+            self._fig.tight_layout()
+        with self._measure_render('savefig'):
+            self._fig.savefig(filename, dpi=self._config['Dpi'])
+
+    def plot_png(self, filename, compression=raster.DEFAULT_COMPRESSION):
+        """Plot the colored data to a png file.
+
+        The image has one pixel per data point and contains neither axes nor
+        colorbar. Only the Colormap, Cbmin and Cbmax parameters of the
+        config are applied. The image is created without matplotlib figures,
+        see :mod:`colorview2d.raster`.
+
+        Args:
+            filename (string): The path of the png file.
+            compression (int): The zlib compression level (0-9).
+        """
+        (cbmin, cbmax) = self._get_raster_cblims()
+        raster.save_png(filename, self._data.zdata, self._config['Colormap'],
+                        cbmin, cbmax, compression=compression)
+
+    def plot_png_tiles(self, dirname, tilesize=256, compression=raster.DEFAULT_COMPRESSION):
+        """Plot the colored data to png tiles.
+
+        Like :meth:`View.plot_png`, but the image is split into square tiles
+        named ``<row>_<column>.png``, with the top left tile ``0_0.png``.
+
+        Args:
+            dirname (string): The directory of the tiles.
+            tilesize (int): The width and height of the tiles in pixels.
+            compression (int): The zlib compression level (0-9).
+
+        Returns:
+            A list of the paths of the tiles.
+        """
+        (cbmin, cbmax) = self._get_raster_cblims()
+        return raster.save_png_tiles(dirname, self._data.zdata, tilesize,
+                                     self._config['Colormap'], cbmin, cbmax,
+                                     compression=compression)
 
     def draw_plot(self):
         """(Re-)draw the :class:`matplotlib.pyplot.figure`.
@@ -589,6 +909,16 @@ class View(object):
         2d color plot with labels, ticks and colorbar as specified in the
         config dictionary.
         """
+        with self._rendering():
+            if self._headless:
+                # The font settings are applied to this plot only
+                with matplotlib.rc_context(self._rc_params()):
+                    self._draw_plot()
+            else:
+                self._draw_plot()
+
+    def _draw_plot(self):
+        """Draw the plot, see :meth:`View.draw_plot`."""
         # clean the stage
         self._fig.clear()
         # for attr in ['_axes', '_plot', '_colorbar']:
@@ -599,21 +929,21 @@ class View(object):
         self._axes = self._fig.add_subplot(111)
         self._apply_config_pre_plot()
 
-        self._plot = self._axes.imshow(self.get_arraydata(),
-            extent=[self.data.xleft,
-                    self.data.xright,
-                    self.data.ybottom,
-                    self.data.ytop],
-            aspect='auto',
-            origin='lower',
-            interpolation="nearest")
-
-        if not self._config['Cbtickformat'] == 'auto':
-            self._colorbar = self._fig.colorbar(
-                self._plot,
-                format=FormatStrFormatter(self._config['Cbtickformat']))
-        else:
-            self._colorbar = self._fig.colorbar(self._plot)
+        (zdata, extent) = self._displayed_data()
+        with self._measure_render('imshow'):
+            self._plot = self._axes.imshow(zdata,
+                extent=extent,
+                aspect='auto',
+                origin='lower',
+                interpolation="nearest")
+
+        with self._measure_render('colorbar'):
+            if not self._config['Cbtickformat'] == 'auto':
+                self._colorbar = self._fig.colorbar(
+                    self._plot,
+                    format=FormatStrFormatter(self._config['Cbtickformat']))
+            else:
+                self._colorbar = self._fig.colorbar(self._plot)
 
         # we set the correct colorbar settings
         # this call seems redundant but invokes the update
@@ -623,7 +953,75 @@ class View(object):
         self._apply_config_post_plot()
 
         self._plot.changed()
-        self._fig.tight_layout()
+        with self._measure_render('tight_layout'):
+            self._fig.tight_layout()
+
+        if self._multiresolution:
+            # The limits are fixed, otherwise showing a part of the
+            # data would zoom the axes to that part
+            self._axes.set_autoscale_on(False)
+            self._axes.callbacks.connect('xlim_changed', self._on_lims_changed)
+            self._axes.callbacks.connect('ylim_changed', self._on_lims_changed)
+            # the size of the axes is known after the layout
+            self._update_plot_data()
+
+    def _on_lims_changed(self, axes):
+        """Refine the displayed data when the plot is zoomed or panned."""
+        if self.plotting and self._multiresolution:
+            self._update_plot_data()
+
+    def _update_plot_data(self):
+        """Pass the data to be displayed in the current axes limits to the plot."""
+        (zdata, extent) = self._displayed_data(self._axes.get_xlim(), self._axes.get_ylim())
+        self._plot.set_data(zdata)
+        self._plot.set_extent(extent)
+
+    def _displayed_data(self, xlim=None, ylim=None):
+        """Obtain the array to be displayed and its extent.
+
+        For the interactive plot, the part of the data within the axes limits is
+        taken from the level of the data pyramid (see :attr:`colorview2d.Data.pyramid`)
+        that matches the size of the axes in pixels.
+        Otherwise, the data is displayed in full resolution, unless it
+        exceeds the memory budget of the executor. Then the finest level
+        of the pyramid within the budget is displayed. Files are always
+        plotted in full resolution.
+
+        Args:
+            xlim (tuple): The limits of the x-axis. Defaults to the data bounds.
+            ylim (tuple): The limits of the y-axis. Defaults to the data bounds.
+
+        Returns:
+            A tuple of the 2d :class:`numpy.ndarray` and the extent
+            ``[left, right, bottom, top]``.
+        """
+        data = self._data
+        extent = [data.xleft, data.xright, data.ybottom, data.ytop]
+        if not self._multiresolution:
+            if self._full_resolution or not self._executor.out_of_core(data.zdata.nbytes):
+                return (data.zdata, extent)
+            level = 1
+            while level < data.pyramid.nlevels - 1 and self._executor.out_of_core(
+                    np.prod(data.pyramid.level_shape(level)) * _PYRAMID_PIXEL_BYTES):
+                level += 1
+            logging.info('Displaying level %d of the data pyramid within the memory budget.', level)
+            return (data.pyramid.level(level), extent)
+
+        (nrows, ncolumns) = data.shape
+        columns = _index_range(xlim or extent[:2], data.xleft, data.xright, ncolumns)
+        rows = _index_range(ylim or extent[2:], data.ybottom, data.ytop, nrows)
+
+        bbox = self._axes.get_window_extent()
+        level = data.pyramid.select_level(rows[1] - rows[0], columns[1] - columns[0],
+                                          bbox.height, bbox.width)
+        (zdata, rows, columns) = data.pyramid.region(level, rows, columns)
+        logging.debug('Displaying level %d of the data pyramid, shape %s.', level, zdata.shape)
+
+        extent = [_index_value(columns[0], data.xleft, data.xright, ncolumns),
+                  _index_value(columns[1], data.xleft, data.xright, ncolumns),
+                  _index_value(rows[0], data.ybottom, data.ytop, nrows),
+                  _index_value(rows[1], data.ybottom, data.ytop, nrows)]
+        return (zdata, extent)
 
     def _show_cbsliders(self):
         """Add sliders for the width and the center of the colorbar."""
@@ -640,14 +1038,14 @@ class View(object):
 
         self._max_slider = Slider(axmax,
                                   label='Colorbar max',
-                                  valmin=self.data.zmin,
-                                  valmax=self.data.zmax,
+                                  valmin=self.data.znanmin,
+                                  valmax=self.data.znanmax,
                                   valinit=cbmax,
                                   valfmt='%.3e')
         self._min_slider = Slider(axmin,
                                   label='Colorbar min',
-                                  valmin=self.data.zmin,
-                                  valmax=self.data.zmax,
+                                  valmin=self.data.znanmin,
+                                  valmax=self.data.znanmax,
                                   valfmt='%.3e',
                                   valinit=cbmin)
         self._max_slider.slidermin = self._min_slider
@@ -658,7 +1056,8 @@ class View(object):
             # do the setup of the colorbar limits manually
             # (set_val is called by _on_config_change)
             self._plot.set_clim(self._min_slider.val, self._max_slider.val)
-            self.config.update_raw({'Cbmax': self._max_slider.val, 'Cbmin': self._min_slider.val})
+            self.config.update_raw({'Cbmax': float(self._max_slider.val),
+                                    'Cbmin': float(self._min_slider.val)})
             self._fig.show()
 
         self._max_slider.on_changed(update)
@@ -683,16 +1082,24 @@ class View(object):
         # If the colorbar is set to auto
         # we use zmin/zmax
         if self.config['Cbmax'] == 'auto':
-            cbmax = self.data.zmax
+            cbmax = self.data.znanmax
         else:
             cbmax = self.config['Cbmax']
         if self.config['Cbmin'] == 'auto':
-            cbmin = self.data.zmin
+            cbmin = self.data.znanmin
         else:
             cbmin = self.config['Cbmin']
 
         return (cbmin, cbmax)
 
+    def _get_raster_cblims(self):
+        """Obtain the colorbar limits for :mod:`colorview2d.raster`.
+
+        'auto' is resolved to the minimum/maximum ignoring NaN
+        from the statistics of the data, which are kept between the plots.
+        """
+        return raster.colorbar_limits(self._data.zdata, *self._get_cblims())
+
         
     def _apply_config_post_plot(self):
         """
@@ -722,12 +1129,81 @@ class View(object):
 
         logging.info("Font now %s", self._config['Font'])
 
+        # A headless View applies the settings via rc_context in draw_plot
+        if self._headless:
+            return
+
         if self._config['Font'] == 'default':
             plt.rcdefaults()
+        plt.rcParams.update(self._rc_params())
+
+    def _rc_params(self):
+        """The matplotlib rc parameters for the font and the ticks in the config.
+
+        Returns:
+            A dictionary of rc parameters.
+        """
+        if self._config['Font'] == 'default':
+            font = matplotlib.rcParamsDefault['font.family']
         else:
-            plt.rcParams['font.family'] = self._config['Font']
-        plt.rcParams['font.size'] = self._config['Fontsize']
-        plt.rcParams['xtick.major.size'] = self._config['Xticklength']
-        plt.rcParams['ytick.major.size'] = self._config['Yticklength']
+            font = self._config['Font']
+
+        return {'font.family': font,
+                'font.size': self._config['Fontsize'],
+                'xtick.major.size': self._config['Xticklength'],
+                'ytick.major.size': self._config['Yticklength']}
 
     
+
+
+def _mod_adder(modtitle, doc):
+    """Create the method add_<modtitle> of the View class."""
+    def addme(self, *args):
+        self.add_mod(modtitle, args)
+    addme.__name__ = "add_%s" % modtitle
+    addme.__doc__ = doc
+    return addme
+
+
+def _mod_remover(modtitle):
+    """Create the method rm_<modtitle> of the View class."""
+    def removeme(self):
+        self.remove_mod(modtitle)
+    removeme.__name__ = "rm_%s" % modtitle
+    removeme.__doc__ = "Remove mod %s from pipeline." % modtitle
+    return removeme
+
+
+def _config_setter(parameter):
+    """Create the method set_<parameter> of the View class."""
+    def setme(self, args):
+        self.config[parameter] = args
+    setme.__name__ = "set_%s" % parameter
+    setme.__doc__ = "Set the parameter %s in the configuration." % parameter
+    return setme
+
+
+def _index_range(lims, first, last, size):
+    """The indices of the pixels of an image with the given extent
+    that are visible within the axis limits.
+
+    Args:
+        lims (tuple): The axis limits.
+        first (float): The position of the edge of the first pixel.
+        last (float): The position of the edge of the last pixel.
+        size (int): The number of pixels.
+
+    Returns:
+        A tuple of the first and the last+1 index.
+    """
+    if first == last:
+        return (0, size)
+    positions = [(lim - first) / (last - first) * size for lim in lims]
+    start = int(min(max(np.floor(min(positions)), 0), size - 1))
+    stop = int(max(min(np.ceil(max(positions)), size), start + 1))
+    return (start, stop)
+
+
+def _index_value(index, first, last, size):
+    """The position of the edge of a pixel, see _index_range."""
+    return first + (last - first) * float(index) / size
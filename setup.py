@@ -15,7 +15,8 @@ setup(name='colorview2d',
       packages=['colorview2d', 'test', 'colorview2d.mods'],
       package_data={'':['default.cv2d'], },
       include_package_data=True,
-      install_requires=['pyyaml', 'scikit-image', 'matplotlib', 'numpy'],
+      python_requires='>=3.9',
+      install_requires=['pyyaml', 'scipy', 'matplotlib', 'numpy'],
       keywords=['plotting', 'colorplot', 'scientific', 'numpy', 'matplotlib'],
       classifiers=[],)
 
@@ -0,0 +1,306 @@
+"""
+cache_test
+----------
+
+Module to test the caches for the results of the mod pipeline.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import colorview2d
+from colorview2d.cache import DiskCache, StageCache, fingerprint
+
+
+class StageCacheTest(unittest.TestCase):
+    """Test the LRU behaviour of the stage cache."""
+    def setUp(self):
+        """Create a cache with room for two 10x10 float arrays."""
+        self.cache = StageCache(max_bytes=2 * 10 * 10 * 8)
+
+    def test_key(self):
+        """Pipelines with equal mods and arguments have equal keys."""
+        self.assertEqual(StageCache.key([('Smooth', (1, 1))]),
+                         StageCache.key([['Smooth', (1, 1)]]))
+        self.assertNotEqual(StageCache.key([('Smooth', (1, 1))]),
+                            StageCache.key([('Smooth', (1, 2))]))
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first."""
+        for key in ['a', 'b']:
+            self.cache.put(key, colorview2d.Data(np.random.random((10, 10))))
+        # touch a, so that b is the least recently used entry
+        self.assertIsNotNone(self.cache.get('a'))
+        self.cache.put('c', colorview2d.Data(np.random.random((10, 10))))
+
+        self.assertTrue('a' in self.cache)
+        self.assertFalse('b' in self.cache)
+        self.assertTrue('c' in self.cache)
+        self.assertEqual(self.cache.nbytes, 2 * 10 * 10 * 8)
+
+    def test_budget(self):
+        """Entries larger than the budget are not cached, shrinking the budget evicts."""
+        self.cache.put('large', colorview2d.Data(np.random.random((20, 20))))
+        self.assertEqual(len(self.cache), 0)
+
+        self.cache.put('small', colorview2d.Data(np.random.random((10, 10))))
+        self.cache.max_bytes = 0
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.nbytes, 0)
+
+    def test_disk_budget(self):
+        """Memory-mapped arrays count against the disk budget and are evicted."""
+        self.cache.max_disk_bytes = 2 * 10 * 10 * 8
+        with tempfile.TemporaryFile() as fhand:
+            for key in ['a', 'b', 'c']:
+                zdata = np.memmap(fhand, dtype=np.float64, mode='w+', shape=(10, 10))
+                self.cache.put(key, colorview2d.Data(zdata))
+            self.assertEqual(self.cache.nbytes, 0)
+            self.assertEqual(self.cache.disk_nbytes, 2 * 10 * 10 * 8)
+            self.assertFalse('a' in self.cache)
+            self.assertTrue('c' in self.cache)
+
+            # in-memory entries are not evicted by memory-mapped ones
+            self.cache.put('d', colorview2d.Data(np.random.random((10, 10))))
+            self.cache.put('e', colorview2d.Data(np.memmap(
+                fhand, dtype=np.float64, mode='w+', shape=(10, 10))))
+            self.assertTrue('d' in self.cache)
+            self.assertFalse('b' in self.cache)
+
+            self.cache.max_disk_bytes = 0
+            self.assertEqual(len(self.cache), 1)
+            self.assertTrue('d' in self.cache)
+            self.assertEqual(self.cache.disk_nbytes, 0)
+
+
+class PipelineCacheTest(unittest.TestCase):
+    """Test the incremental re-evaluation of the pipeline."""
+    def setUp(self):
+        """Create a View and count the applications of the Smooth mod."""
+        self.view = colorview2d.View(np.random.random((50, 50)))
+        self.smooth_calls = []
+
+        mod = self.view.modlist['Smooth']
+        do_apply = mod.do_apply
+
+        def counting_do_apply(data, modargs):
+            self.smooth_calls.append(modargs)
+            do_apply(data, modargs)
+        mod.do_apply = counting_do_apply
+
+    def tearDown(self):
+        """Remove the counting hook from the mod."""
+        del self.view.modlist['Smooth'].do_apply
+
+    def test_append_mod(self):
+        """Appending a mod does not re-run the upstream stages."""
+        self.view.add_Smooth(2, 2)
+        smoothed = self.view.data.zdata.copy()
+        self.view.add_Scale(2.)
+
+        self.assertEqual(len(self.smooth_calls), 1)
+        np.testing.assert_array_equal(self.view.data.zdata, 2. * smoothed)
+
+    def test_remove_mod(self):
+        """Removing the last mod restores the cached stage."""
+        self.view.add_Smooth(2, 2)
+        smoothed = self.view.data.zdata.copy()
+        self.view.add_Scale(2.)
+        self.view.remove_mod('Scale')
+
+        self.assertEqual(len(self.smooth_calls), 1)
+        np.testing.assert_array_equal(self.view.data.zdata, smoothed)
+
+    def test_edit_upstream(self):
+        """Changing an upstream mod re-runs the downstream stages."""
+        self.view.add_Smooth(2, 2)
+        self.view.add_Scale(2.)
+        self.view.pipeline = [('Smooth', (3, 3)), ('Scale', (2.,))]
+
+        self.assertEqual(self.smooth_calls, [(2, 2), (3, 3)])
+
+    def test_copy_on_write(self):
+        """Geometric mods do not copy the original array."""
+        self.view.add_Rotate(True)
+        self.view.add_Flip(True)
+
+        self.assertTrue(np.shares_memory(self.view.data.zdata,
+                                         self.view._original_data.zdata))
+
+    def test_replace_data(self):
+        """Replacing the data invalidates the cache."""
+        self.view.add_Smooth(2, 2)
+        self.view.replace_data(colorview2d.Data(np.random.random((30, 30))))
+
+        self.assertEqual(len(self.smooth_calls), 2)
+        self.assertEqual(self.view.data.zdata.shape, (30, 30))
+
+
+
+class DiskCacheTest(unittest.TestCase):
+    """Test the persistent cache directory."""
+    def setUp(self):
+        """Create a cache with room for two 10x10 float arrays (and the headers)."""
+        self.tempdir = tempfile.mkdtemp()
+        self.cache = DiskCache(os.path.join(self.tempdir, 'cache'), max_bytes=2 * 5000)
+        self.data = colorview2d.Data(np.random.random((10, 10)), ((0., 1.), (2., 3.)))
+
+    def tearDown(self):
+        """Remove the cache directory."""
+        shutil.rmtree(self.tempdir)
+
+    def test_fingerprint(self):
+        """The fingerprint depends on the values, the type and the bounds."""
+        copy = self.data.deep_copy()
+        self.assertEqual(fingerprint(copy), fingerprint(self.data))
+        copy.rotate_cw()
+        copy.rotate_ccw()
+        self.assertEqual(fingerprint(copy), fingerprint(self.data))
+
+        copy.writable_zdata()[0, 0] += 1.
+        self.assertNotEqual(fingerprint(copy), fingerprint(self.data))
+        self.assertNotEqual(fingerprint(colorview2d.Data(self.data.zdata.astype(np.float32))),
+                            fingerprint(colorview2d.Data(self.data.zdata)))
+        self.assertNotEqual(fingerprint(colorview2d.Data(self.data.zdata, ((0., 1.), (2., 4.)))),
+                            fingerprint(self.data))
+
+    def test_key(self):
+        """The key depends on the pipeline and the versions of the mods."""
+        key = DiskCache.key('a', [('Smooth', (1, 1))], [0])
+        self.assertEqual(key, DiskCache.key('a', [['Smooth', (1, 1)]], [0]))
+        self.assertNotEqual(key, DiskCache.key('b', [('Smooth', (1, 1))], [0]))
+        self.assertNotEqual(key, DiskCache.key('a', [('Smooth', (1, 2))], [0]))
+        self.assertNotEqual(key, DiskCache.key('a', [('Smooth', (1, 1))], [1]))
+
+    def test_get(self):
+        """The entries are returned memory-mapped."""
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.put('a', self.data)
+        self.assertTrue('a' in self.cache)
+
+        data = self.cache.get('a')
+        self.assertIsInstance(data.zdata, np.memmap)
+        np.testing.assert_array_equal(data.zdata, self.data.zdata)
+        self.assertEqual(data.xrange_bounds, (2., 3.))
+
+        # The entries are found by a new cache object
+        self.assertTrue('a' in DiskCache(self.cache.path))
+
+    def test_lru_eviction(self):
+        """The least recently used entry is removed first."""
+        for mtime, key in enumerate(['a', 'b']):
+            self.cache.put(key, self.data)
+            os.utime(os.path.join(self.cache.path, key + '.cv2d'), (mtime, mtime))
+        # use a, so that b is the least recently used entry
+        self.assertIsNotNone(self.cache.get('a'))
+        self.cache.put('c', self.data)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertTrue('a' in self.cache)
+        self.assertFalse('b' in self.cache)
+
+        self.cache.max_bytes = 0
+        self.assertEqual(len(self.cache), 0)
+        self.cache.put('a', self.data)
+        self.assertEqual(self.cache.nbytes, 0)
+
+    def test_corrupt(self):
+        """Unreadable files are removed."""
+        with open(os.path.join(self.cache.path, 'a.cv2d'), 'wb') as fhand:
+            fhand.write(b'garbage')
+        self.assertIsNone(self.cache.get('a'))
+        self.assertFalse('a' in self.cache)
+
+
+class PipelineDiskCacheTest(unittest.TestCase):
+    """Test the reuse of pipeline results across views."""
+    def setUp(self):
+        """Count the applications of the Smooth mod."""
+        self.tempdir = tempfile.mkdtemp()
+        self.data = colorview2d.Data(np.random.random((50, 40)), ((0., 1.), (0., 1.)))
+        self.pipeline = [('Smooth', (2, 2)), ('Scale', (2.,))]
+        self.smooth_calls = []
+
+        mod = colorview2d.View._modlist['Smooth']
+        do_apply = mod.do_apply
+
+        def counting_do_apply(data, modargs):
+            self.smooth_calls.append(modargs)
+            do_apply(data, modargs)
+        mod.do_apply = counting_do_apply
+
+    def tearDown(self):
+        """Remove the counting hook from the mod and the cache directory."""
+        del colorview2d.View._modlist['Smooth'].do_apply
+        shutil.rmtree(self.tempdir)
+
+    def view(self, data):
+        """Create a view with the pipeline and the cache directory."""
+        return colorview2d.View(data, pipeline=self.pipeline, cache_dir=self.tempdir,
+                                headless=True)
+
+    def test_reopen(self):
+        """A new view of the same data reads the result from the cache."""
+        expected = self.view(self.data).data.zdata
+        self.assertEqual(len(self.smooth_calls), 1)
+
+        view = self.view(self.data.deep_copy())
+        self.assertEqual(len(self.smooth_calls), 1)
+        self.assertIsInstance(view.data.zdata, np.memmap)
+        np.testing.assert_array_equal(view.data.zdata, expected)
+
+        # Appending a mod starts from the cached result
+        view.add_Scale(3.)
+        self.assertEqual(len(self.smooth_calls), 1)
+        np.testing.assert_allclose(view.data.zdata, 3. * expected)
+
+    def test_writes(self):
+        """The result is written when the pipeline is set as a whole, not on single edits."""
+        writes = []
+        put = DiskCache.put
+
+        def counting_put(cache, key, data):
+            writes.append(key)
+            put(cache, key, data)
+        DiskCache.put = counting_put
+        try:
+            view = self.view(self.data)
+            self.assertEqual(len(writes), 1)
+
+            view.add_Scale(3.)
+            view.add_Log()
+            view.remove_mod('Log')
+            view.set_Colormap('gray')
+            self.assertEqual(len(writes), 1)
+
+            view.persist_result()
+            view.persist_result()
+            self.assertEqual(len(writes), 2)
+
+            view.pipeline = self.pipeline
+            self.assertEqual(len(writes), 2)
+            view.pipeline = [('Scale', (4.,))]
+            self.assertEqual(len(writes), 3)
+        finally:
+            DiskCache.put = put
+        self.assertEqual(len(view.disk_cache), 3)
+
+    def test_invalidation(self):
+        """Other data and new mod versions miss the cache."""
+        self.view(self.data)
+        self.view(colorview2d.Data(self.data.zdata + 1., ((0., 1.), (0., 1.))))
+        self.assertEqual(len(self.smooth_calls), 2)
+
+        mod = colorview2d.View._modlist['Smooth']
+        mod.version = 1
+        try:
+            self.view(self.data)
+        finally:
+            del mod.version
+        self.assertEqual(len(self.smooth_calls), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -63,6 +63,33 @@ class DataTest(unittest.TestCase):
         self.assertEqual(self.data.xwidth, old_width - diff_width)
         self.assertEqual(self.data.ywidth, old_height - diff_height)
 
+    def test_shallow_copy(self):
+        """A shallow copy shares the array until it is written to."""
+        copied = self.data.shallow_copy()
+        self.assertTrue(np.shares_memory(copied.zdata, self.data.zdata))
+
+        # geometric operations are views
+        copied.rotate_cw()
+        copied.flip_lr()
+        self.assertTrue(np.shares_memory(copied.zdata, self.data.zdata))
+
+        # shared arrays are read-only
+        with self.assertRaises(ValueError):
+            copied.zdata[0, 0] = 1.
+
+        # writing copies the array
+        copied.writable_zdata()[0, 0] = 2.
+        self.assertFalse(np.shares_memory(copied.zdata, self.data.zdata))
+        self.assertEqual(copied.zdata[0, 0], 2.)
+        self.assertNotEqual(self.data.zdata[-1, 0], 2.)
+
+    def test_deep_copy(self):
+        """A deep copy does not share the array."""
+        copied = self.data.deep_copy()
+        self.assertFalse(np.shares_memory(copied.zdata, self.data.zdata))
+        self.assertTrue(np.all(copied.zdata == self.data.zdata))
+        self.assertEqual(copied.xrange_bounds, self.data.xrange_bounds)
+
     def test_ylinetrace(self):
         """Extract a linecut along the y-axis."""
 
@@ -136,6 +163,51 @@ class DataTest(unittest.TestCase):
         self.assertEqual(self.data.x_range.tolist(), result_array_x[-1].tolist())
         self.assertEqual(self.data.y_range.tolist(), result_array_y[-1].tolist())
         
+    def test_linetrace_series_interval(self):
+        """Every second linecut of a series equals the single linecut."""
+        x_first = self.data.x_range[-1]
+        x_last = self.data.x_range[np.random.randint(self.data.xwidth - 1)]
+        # the x-axis range is given by the indices
+        number = int(x_first - x_last) // 2 + 1
+        out = np.empty((number + 1, self.data.ywidth))
+
+        result_array = self.data.extract_ylinetrace_series(
+            x_first, x_last, 2, self.data.ytop, self.data.ybottom, out=out)
+
+        self.assertTrue(result_array is out)
+        for num, row in enumerate(result_array[:-1]):
+            self.assertEqual(
+                row.tolist(),
+                self.data.extract_ylinetrace(
+                    x_first - 2 * num, self.data.ytop, self.data.ybottom)[0].tolist())
+        self.assertEqual(result_array[-1].tolist(), self.data.y_range[::-1].tolist())
+
+    def test_linetrace_series_flipped(self):
+        """On reversed axes, a series equals the single linecuts at the values of the axes."""
+        zdata = np.random.random((20, 30))
+        data = colorview2d.Data(zdata, ((0., 19.), (0., 29.)))
+        data.flip_lr()
+        data.flip_ud()
+        for (first, last, start, stop) in [(2., 16., 3., 20.), (16., 2., 20., 3.),
+                                           (3., 14., 1., 28.)]:
+            series = data.extract_xlinetrace_series(first, last, 2., start, stop)
+            values = first + np.arange(series.shape[0] - 1) * 2. * np.sign(last - first)
+            self.assertEqual(len(values), int(abs(last - first) / 2.) + 1)
+            for row, value in zip(series[:-1], values):
+                single = data.extract_xlinetrace(value, start, stop)
+                self.assertEqual(row.tolist(), single[0].tolist())
+                self.assertEqual(series[-1].tolist(), single[1].tolist())
+                # the index on the original axis is the value
+                index = int(round(value))
+                self.assertEqual(row[0], zdata[index, int(round(start))])
+
+            series = data.extract_ylinetrace_series(start, stop, 2., first, last)
+            for num, row in enumerate(series[:-1]):
+                value = start + 2. * num * np.sign(stop - start)
+                self.assertEqual(
+                    row.tolist(), data.extract_ylinetrace(value, first, last)[0].tolist())
+                self.assertEqual(row[-1], zdata[int(round(last)), int(round(value))])
+
     def test_linetrace_arbitrary(self):
         """Extract a linetrace between two arbitrary points in the data."""
 
@@ -166,6 +238,38 @@ class DataTest(unittest.TestCase):
         self.assertEqual(self.data.zdata[idx_one], linetrace[0])
         self.assertEqual(self.data.zdata[idx_two], linetrace[-1])
 
+    def test_linetraces_interpolation(self):
+        """Sample linetraces from a linear function with all interpolation methods."""
+        y_grid, x_grid = np.mgrid[0:self.data.ywidth, 0:self.data.xwidth]
+        data = colorview2d.Data(2. * y_grid - 3. * x_grid, ((0., 1.), (-1., 0.)))
+
+        segments = np.random.random((5, 2, 2))
+        segments[:, :, 1] -= 1.
+        num = np.random.randint(2, 50)
+
+        steps = np.linspace(0., 1., num)
+        # the distance to the edges, where the edge values affect the samples
+        for interpolation, margin in [('bilinear', 2), ('cubic', 12)]:
+            for width in [1, 3]:
+                linetraces = data.extract_arbitrary_linetraces(
+                    segments, num=num, interpolation=interpolation, width=width)
+                self.assertEqual(linetraces.shape, (5, num))
+                for linetrace, segment in zip(linetraces, segments):
+                    yidx = (segment[0, 0] + (segment[1, 0] - segment[0, 0]) * steps) / data.dy
+                    xidx = (segment[0, 1] + 1. + (segment[1, 1] - segment[0, 1]) * steps) / data.dx
+                    # near the edges the samples are clamped
+                    inside = ((yidx > margin) & (yidx < data.ywidth - 1 - margin) &
+                              (xidx > margin) & (xidx < data.xwidth - 1 - margin))
+                    np.testing.assert_allclose(
+                        linetrace[inside], 2. * yidx[inside] - 3. * xidx[inside], atol=1e-6)
+
+        # a single segment gives the same result
+        linetrace = data.extract_arbitrary_linetrace(
+            segments[0, 0], segments[0, 1], num=num, interpolation='bilinear')
+        np.testing.assert_array_equal(
+            linetrace,
+            data.extract_arbitrary_linetraces(segments, num=num, interpolation='bilinear')[0])
+
     def test_resize(self):
         """Interpolate the array to a new size of up to double the old size."""
         new_xwidth = self.data.xwidth + np.random.randint(self.data.xwidth)
@@ -193,6 +297,118 @@ class DataTest(unittest.TestCase):
         self.assertEqual(old_zbottom, (self.data.zdata[0, 0], self.data.zdata[0, -1]))
         self.assertEqual(old_ztop, (self.data.zdata[-1, 0], self.data.zdata[-1, -1]))
 
+    def test_resize_integer(self):
+        """Shrinking by integer factors averages the blocks of values."""
+        data = colorview2d.Data(np.arange(24.).reshape(4, 6), ((0., 3.), (0., 10.)))
+        data.resize(2, 3)
+        np.testing.assert_array_equal(data.zdata, [[3.5, 5.5, 7.5], [15.5, 17.5, 19.5]])
+        self.assertEqual(data.yrange_bounds, (0.5, 2.5))
+        self.assertEqual(data.xrange_bounds, (1., 9.))
+
+    def test_statistics(self):
+        """The cached statistics agree with numpy."""
+        zdata = self.data.zdata
+        self.assertEqual(self.data.zmin, np.amin(zdata))
+        self.assertEqual(self.data.zmax, np.amax(zdata))
+        self.assertAlmostEqual(self.data.zmean, np.mean(zdata))
+        self.assertEqual(self.data.nan_count, 0)
+        np.testing.assert_array_equal(self.data.zpercentile([5, 50]),
+                                      np.percentile(zdata, [5, 50]))
+        self.assertTrue(self.data.statistics is self.data.statistics)
+
+        zdata = np.array(zdata)
+        zdata[0, :] = np.nan
+        self.data.zdata = zdata
+        self.assertTrue(np.isnan(self.data.zmin))
+        self.assertTrue(np.isnan(self.data.zmean))
+        self.assertEqual(self.data.znanmin, np.nanmin(zdata))
+        self.assertEqual(self.data.znanmax, np.nanmax(zdata))
+        self.assertAlmostEqual(self.data.znanmean, np.nanmean(zdata))
+        self.assertEqual(self.data.nan_count, zdata.shape[1])
+        self.assertEqual(self.data.zpercentile(90, ignore_nan=True),
+                         np.nanpercentile(zdata, 90))
+
+    def test_statistics_invalidation(self):
+        """The statistics are updated when the array changes."""
+        self.data = colorview2d.Data(np.arange(12.).reshape(3, 4), ((0., 2.), (0., 3.)))
+        self.assertEqual(self.data.zmax, 11.)
+
+        self.data.writable_zdata()[0, 0] = 20.
+        self.assertEqual(self.data.zmax, 20.)
+
+        self.data.crop((0., 1., 0., 1.))
+        self.assertEqual((self.data.zmin, self.data.zmax), (1., 20.))
+
+        self.data.rotate_cw()
+        self.data.resize(4, 4, order=0)
+        self.assertEqual(self.data.zmax, 20.)
+
+        self.data.zdata = self.data.zdata * 2
+        self.assertEqual(self.data.zmax, 40.)
+        self.assertEqual(self.data.zpercentile(100), 40.)
+
+class LazyDataTest(unittest.TestCase):
+    """Test the deferred loading of the array."""
+    fname = 'testdata.cv2d'
+
+    def setUp(self):
+        """Create a loader that counts its calls."""
+        self.array = np.random.random((np.random.randint(2, 50), np.random.randint(2, 50)))
+        self.calls = 0
+
+    def tearDown(self):
+        """Delete the data file if created."""
+        if os.path.exists(self.fname):
+            os.remove(self.fname)
+
+    def loader(self):
+        """Return the array."""
+        self.calls += 1
+        return self.array
+
+    def test_loader(self):
+        """The loader is called on first access of the array only."""
+        data = colorview2d.LazyData(self.loader, self.array.shape, ((0., 1.), (2., 3.)))
+        copied = data.deep_copy()
+
+        self.assertEqual((data.ywidth, data.xwidth), self.array.shape)
+        self.assertEqual(data.dx, 1. / (self.array.shape[1] - 1))
+        self.assertEqual(data.xrange_bounds, (2., 3.))
+        self.assertEqual(self.calls, 0)
+
+        self.assertTrue(np.all(copied.zdata == self.array))
+        self.assertTrue(np.all(data.zdata == self.array))
+        self.assertTrue(data.loaded)
+        self.assertEqual(self.calls, 1)
+
+    def test_bounds(self):
+        """Bounds that are not specified are obtained by loading."""
+        data = colorview2d.LazyData(self.loader)
+
+        self.assertEqual(data.yrange_bounds, (0., self.array.shape[0] - 1.))
+        self.assertEqual(self.calls, 1)
+
+    def test_cv2dfile(self):
+        """Shape and bounds are read from the header of a binary data file."""
+        fl.save_cv2dfile(self.fname, colorview2d.Data(self.array, ((-1., 1.), (5., 6.))))
+        data = colorview2d.LazyData(self.fname)
+
+        self.assertFalse(data.loaded)
+        self.assertEqual(data.shape, self.array.shape)
+        self.assertEqual(data.yrange_bounds, (-1., 1.))
+        self.assertFalse(data.loaded)
+        self.assertTrue(np.all(data.zdata == self.array))
+
+    def test_view(self):
+        """Creating a view does not load the data, applying a mod does."""
+        view = colorview2d.View(colorview2d.LazyData(self.loader, self.array.shape))
+        self.assertEqual(self.calls, 0)
+
+        view.add_Scale(2.)
+        self.assertTrue(np.all(view.data.zdata == 2. * self.array))
+        self.assertEqual(self.calls, 1)
+
+
 class FileloaderTest(unittest.TestCase):
     """Test methods of the fileloader module."""
     fname = 'testdata.dat'
@@ -246,6 +462,24 @@ class FileloaderTest(unittest.TestCase):
         self.assertTrue(np.all(data.x_range == testdata[:, 0]))
         self.assertEqual(data.y_range[0], testdata[0, 1])
 
+    def test_gpfile_roundtrip(self):
+        """Save a data to a gnuplot-style file and load it again."""
+        data = colorview2d.Data(np.random.random((7, 5)), ((-1., 2.), (0.5, 4.5)))
+        fl.save_gpfile(self.fname, data, comment='first line\nsecond line')
+
+        with open(self.fname) as fhand:
+            self.assertEqual(fhand.readline(), '# first line\n')
+        loaded = fl.load_gpfile(self.fname)
+        np.testing.assert_allclose(loaded.zdata, data.zdata, rtol=1e-15)
+        self.assertEqual(loaded.yrange_bounds, (-1., 2.))
+        self.assertEqual(loaded.xrange_bounds, (0.5, 4.5))
+
+        # without a comment, the data starts in the first line
+        fl.save_gpfile(self.fname, data)
+        with open(self.fname) as fhand:
+            self.assertEqual([float(value) for value in fhand.readline().split()],
+                             [0.5, -1., data.zdata[0, 0]])
+
     def test_gpfile_twoline_broken(self):
         """Create a twoline gnuplot-style file and load
         it with the load_gpfile method. 
@@ -263,6 +497,110 @@ class FileloaderTest(unittest.TestCase):
         with self.assertRaises(AssertionError):
             data = fl.load_gpfile(self.fname)
 
+    def _write_blocks(self, zdata, x_range, y_range):
+        """Write a gnuplot-style file with one block per column of zdata."""
+        with open(self.fname, 'w') as testfile:
+            testfile.write('# x y z\n')
+            for xidx, xval in enumerate(x_range):
+                np.savetxt(testfile, np.vstack(
+                    (xval * np.ones_like(y_range), y_range, zdata[:, xidx])).T)
+                testfile.write('\n')
+
+    def test_gpfile_blocks(self):
+        """Load a file with many blocks in several chunks."""
+        zdata = np.random.random((np.random.randint(2, 50), np.random.randint(2, 50)))
+        x_range = np.linspace(-1., 1., zdata.shape[1])
+        y_range = np.linspace(2., 3., zdata.shape[0])
+        self._write_blocks(zdata, x_range, y_range)
+
+        chunk_bytes = fl.GP_CHUNK_BYTES
+        fl.GP_CHUNK_BYTES = 100
+        try:
+            data = fl.load_gpfile(self.fname)
+        finally:
+            fl.GP_CHUNK_BYTES = chunk_bytes
+
+        self.assertTrue(np.all(data.zdata == zdata))
+        self.assertEqual(data.xrange_bounds, (-1., 1.))
+        self.assertEqual(data.yrange_bounds, (2., 3.))
+
+    def test_gpfile_blocks_unseparated(self):
+        """Load a file without blank lines between the blocks in chunks."""
+        zdata = np.random.random((30, 20))
+        x_range = np.linspace(-1., 1., zdata.shape[1])
+        y_range = np.linspace(2., 3., zdata.shape[0])
+        with open(self.fname, 'w') as testfile:
+            np.savetxt(testfile, np.vstack((np.repeat(x_range, zdata.shape[0]),
+                                            np.tile(y_range, zdata.shape[1]),
+                                            zdata.T.ravel())).T)
+
+        parsed = []
+        parse_gplines = fl._parse_gplines
+
+        def recording_parse_gplines(lines, columns):
+            parsed.append(len(lines))
+            return parse_gplines(lines, columns)
+        chunk_bytes = fl.GP_CHUNK_BYTES
+        fl.GP_CHUNK_BYTES = 200
+        fl._parse_gplines = recording_parse_gplines
+        try:
+            data = fl.load_gpfile(self.fname)
+        finally:
+            fl.GP_CHUNK_BYTES = chunk_bytes
+            fl._parse_gplines = parse_gplines
+
+        np.testing.assert_array_equal(data.zdata, zdata)
+        self.assertEqual(data.xrange_bounds, (-1., 1.))
+        # the lines are parsed in chunks, not held as text
+        self.assertTrue(max(parsed) < zdata.shape[0])
+
+    def test_gpfile_blocks_broken(self):
+        """A block with a different y-range is detected."""
+        zdata = np.random.random((10, 10))
+        y_range = np.linspace(0., 1., 10)
+        self._write_blocks(zdata, np.arange(10.), y_range)
+        with open(self.fname, 'a') as testfile:
+            np.savetxt(testfile, np.vstack((10. * np.ones(10), y_range[::-1], zdata[:, 0])).T)
+
+        with self.assertRaises(AssertionError):
+            fl.load_gpfile(self.fname)
+
+    def test_cv2dfile(self):
+        """Save and load a binary colorview2d data file."""
+        data = colorview2d.Data(np.random.random((np.random.randint(1, 100),
+                                                  np.random.randint(1, 100))),
+                                ((-1., 2.), (3., 5.)))
+        fl.save_cv2dfile(self.fname, data)
+
+        loaded = fl.load_cv2dfile(self.fname)
+
+        self.assertTrue(isinstance(loaded.zdata, np.memmap))
+        self.assertTrue(np.all(loaded.zdata == data.zdata))
+        self.assertEqual(loaded.xrange_bounds, data.xrange_bounds)
+        self.assertEqual(loaded.yrange_bounds, data.yrange_bounds)
+        self.assertEqual(fl.read_cv2dheader(self.fname)['offset'] % fl.CV2D_ALIGN, 0)
+        del loaded
+
+    def test_cv2dfile_config(self):
+        """Store the config and the pipeline of a view in a binary data file."""
+        view = colorview2d.View(np.random.random((20, 30)))
+        view.config['Xlabel'] = 'foo'
+        view.config['Cbmin'] = np.float64(0.1)
+        view.add_Scale(2.)
+        fl.save_cv2dfile(self.fname, view.data.deep_copy(), view.config.dict, view.pipeline)
+
+        self.assertTrue(fl.is_cv2dfile(self.fname))
+        header = fl.read_cv2dheader(self.fname)
+        self.assertEqual(header['pipeline'], [('Scale', (2.,))])
+        self.assertEqual(header['config']['Xlabel'], 'foo')
+        self.assertEqual(header['config']['Cbmin'], 0.1)
+
+        newview = colorview2d.View(fl.load_cv2dfile(self.fname, mmap_mode=None),
+                                   cfgfile=self.fname)
+        self.assertEqual(newview.pipeline, [('Scale', (2.,))])
+        self.assertEqual(newview.config['Xlabel'], 'foo')
+        self.assertEqual(newview.config['Cbmin'], 0.1)
+
 
 if __name__ == "__main__":
     unittest.main()
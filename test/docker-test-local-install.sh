@@ -13,4 +13,4 @@ docker run -ti \
         -v ~/git/colorview2d/Makefile:/home/cvuser/Makefile \
         -v ~/git/colorview2d/test:/home/cvuser/test \
 	colorview2d /bin/bash \
-	-c "cd colorview2d;python setup.py install --user;cd;make testlocal"
+	-c "cd colorview2d;python3 setup.py install --user;cd;make testlocal"
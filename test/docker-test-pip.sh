@@ -13,5 +13,5 @@ docker run -ti \
 	-v /home/al/git/colorview2d/test:/home/cvuser/test \
 	-v /home/al/git/colorview2d/:/colorview2d/ \
 	colorview2d /bin/bash \
-	-c "pip install --upgrade pip;pip install --upgrade --user --index-url https://testpypi.python.org/pypi/ colorview2d;cd;make testpip"
+	-c "pip3 install --upgrade pip;pip3 install --upgrade --user --index-url https://testpypi.python.org/pypi/ colorview2d;cd;make testpip"
 
@@ -0,0 +1,241 @@
+"""
+executor_test
+-------------
+
+Module to test the fused application of elementwise mods.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+import colorview2d
+import colorview2d.fileloaders as fl
+from colorview2d.executor import Executor
+from colorview2d.cache import StageCache
+
+
+class ExecutorTest(unittest.TestCase):
+    """Test the blockwise pass over runs of elementwise mods."""
+    def setUp(self):
+        """Create a data object and an executor with small blocks."""
+        self.data = colorview2d.Data(np.random.random((37, 23)) - 0.5)
+        self.data.zdata.flags.writeable = False
+        self.executor = Executor(block_size=100)
+        self.modlist = colorview2d.View._modlist
+
+    def run_of(self, *mods):
+        """Return the run of (mod, modargs) tuples for pairs of titles and arguments."""
+        return [(self.modlist[title], modargs) for title, modargs in mods]
+
+    def test_fused_equals_unfused(self):
+        """The fused pass gives the result of the mods applied one by one."""
+        run = self.run_of(('Scale', 3.), ('Absolute', ()), ('Log', ()))
+        expected = self.data.deep_copy()
+        for mod, modargs in run:
+            self.assertTrue(mod.apply(expected, modargs))
+
+        original = self.data.zdata
+        self.assertTrue(self.executor.execute(run, self.data))
+        np.testing.assert_array_equal(self.data.zdata, expected.zdata)
+        # the input array is not modified
+        self.assertFalse(np.shares_memory(original, self.data.zdata))
+
+    def test_dtype(self):
+        """The type of the result follows the mods, not the input."""
+        self.data.zdata = np.arange(12).reshape(3, 4)
+        run = self.run_of(('Absolute', ()), ('Scale', 0.5))
+        self.assertTrue(self.executor.execute(run, self.data))
+        self.assertEqual(self.data.zdata.dtype, np.float64)
+        np.testing.assert_array_equal(self.data.zdata, np.arange(12).reshape(3, 4) * 0.5)
+
+    def test_not_elementwise(self):
+        """Runs containing other mods are left to the mods."""
+        original = self.data.zdata
+        run = self.run_of(('Scale', 2.), ('Smooth', (1., 1.)))
+        self.assertFalse(self.executor.execute(run, self.data))
+        self.assertIs(self.data.zdata, original)
+
+    def test_failure(self):
+        """Unusable arguments leave the data unchanged."""
+        original = self.data.zdata
+        self.assertFalse(self.executor.execute(self.run_of(('Scale', 'a')), self.data))
+        self.assertIs(self.data.zdata, original)
+
+
+class TiledExecutorTest(unittest.TestCase):
+    """Test the application of tileable mods to strips of the array."""
+    def setUp(self):
+        """Create a data object and an executor splitting into many strips."""
+        self.zdata = np.random.random((301, 47))
+        self.zdata.flags.writeable = False
+        self.executor = Executor(max_workers=4, tile_size=1000)
+        self.modlist = colorview2d.View._modlist
+
+    def assert_identical(self, title, modargs):
+        """The tiled result is bit-identical to the result for the whole array."""
+        mod = self.modlist[title]
+        data = colorview2d.Data(self.zdata)
+        self.assertTrue(self.executor.execute([(mod, modargs)], data))
+        np.testing.assert_array_equal(data.zdata, mod.apply_array(self.zdata, modargs))
+
+    def test_smooth(self):
+        """Smooth with different widths along the axes."""
+        self.assert_identical('Smooth', (3.3, 1.))
+        self.assert_identical('Smooth', (0., 2.))
+
+    def test_median(self):
+        """Median with odd and even window sizes."""
+        self.assert_identical('Median', (5, 3))
+        self.assert_identical('Median', (4, 4))
+
+    def test_halo(self):
+        """The halo covers the truncated kernel and the window."""
+        self.assertEqual(self.modlist['Smooth'].halo((2., 0.5)), (8, 2))
+        self.assertEqual(self.modlist['Median'].halo((5, 4)), (2, 2))
+        self.assertEqual(self.modlist['Scale'].halo(2.), (0, 0))
+
+    def test_small(self):
+        """Small arrays and single workers are not split."""
+        self.assertEqual(self.executor._strips((10, 10), 1), ([], 1))
+        self.assertEqual(Executor(max_workers=1, tile_size=1)._strips((100, 100), 1), ([], 1))
+        strips, workers = self.executor._strips(self.zdata.shape, 2)
+        self.assertEqual(workers, 4)
+        self.assertEqual(len(strips), 4)
+        self.assertEqual(strips[0][0], 0)
+        self.assertEqual(strips[-1][1], self.zdata.shape[0])
+
+    def test_failure(self):
+        """Unusable arguments leave the data unchanged."""
+        data = colorview2d.Data(self.zdata)
+        self.assertFalse(self.executor.execute([(self.modlist['Median'], (2.5, 2.5))], data))
+        self.assertIs(data.zdata, self.zdata)
+
+
+class OutOfCoreTest(unittest.TestCase):
+    """Test the out-of-core application of the pipeline to memory-mapped data."""
+    def setUp(self):
+        """Save an array to a binary file and open it memory-mapped."""
+        self.tempdir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.tempdir, 'outofcore.cv2d')
+        self.array = np.random.random((203, 61)) + 0.1
+        fl.save_cv2dfile(self.fname, colorview2d.Data(self.array, ((0., 2.), (0., 6.))))
+        self.data = fl.load_cv2dfile(self.fname, mmap_mode='r')
+        # The array needs about 100 kB
+        self.executor = Executor(max_workers=2, memory_budget=20000, tempdir=self.tempdir)
+        self.modlist = colorview2d.View._modlist
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        del self.data
+        shutil.rmtree(self.tempdir)
+
+    def assert_out_of_core(self, title, modargs):
+        """The result is memory-mapped and identical to the in-memory result."""
+        mod = self.modlist[title]
+        data = self.data.shallow_copy()
+        self.assertTrue(self.executor.execute([(mod, modargs)], data))
+        self.assertIsInstance(data.zdata, np.memmap)
+        expected = colorview2d.Data(self.array)
+        self.assertTrue(mod.apply(expected, modargs))
+        np.testing.assert_array_equal(data.zdata, expected.zdata)
+
+    def test_elementwise(self):
+        """Elementwise mods are applied blockwise into a memory-mapped array."""
+        self.assert_out_of_core('Scale', 3.)
+        self.assert_out_of_core('Log', ())
+
+    def test_tiled(self):
+        """Neighbourhood filters are applied to strips that fit into the budget."""
+        self.assert_out_of_core('Smooth', (2., 1.))
+        self.assert_out_of_core('Median', (5, 5))
+
+    def test_strips(self):
+        """The strips and their halo fit into the budget, even with a single worker."""
+        strips, workers = self.executor._strips((203, 61), 2)
+        self.assertEqual(workers, 2)
+        self.assertEqual(strips[-1][1], 203)
+        rows = strips[0][1] - strips[0][0]
+        self.assertTrue(workers * 4 * 61 * 8 * (rows + 4) <= 20000)
+
+        strips, workers = Executor(max_workers=1, memory_budget=20000)._strips((203, 61), 2)
+        self.assertEqual(workers, 1)
+        self.assertTrue(len(strips) > 1)
+
+    def test_geometric(self):
+        """Geometric mods only remap the indices of the memory-mapped array."""
+        self.assertTrue(all(self.modlist[title].geometric for title in ('Rotate', 'Flip', 'Crop')))
+        data = self.data.shallow_copy()
+        self.modlist['Rotate'].apply(data, True)
+        self.modlist['Flip'].apply(data, True)
+        self.assertIsInstance(data.zdata, np.memmap)
+        np.testing.assert_array_equal(data.zdata, np.fliplr(np.rot90(self.array)))
+
+    def test_view(self):
+        """The original is not copied and the pipeline results are memory-mapped."""
+        view = colorview2d.View(self.data, headless=True, memory_budget=20000)
+        self.assertTrue(np.shares_memory(view._original_data.zdata, self.data.zdata))
+        view.executor.tempdir = self.tempdir
+
+        view.pipeline = [('Flip', True), ('Scale', 2.), ('Smooth', (1., 1.))]
+        self.assertIsInstance(view.data.zdata, np.memmap)
+        np.testing.assert_allclose(view.data.zdata,
+                                   gaussian_filter(np.fliplr(self.array) * 2., (1., 1.)))
+
+        zdata, _ = view._displayed_data()
+        self.assertTrue(zdata.nbytes * 5 <= 20000)
+        del view, zdata
+
+    def test_caller_data(self):
+        """The data passed to the View is not modified."""
+        data = fl.load_cv2dfile(self.fname, mmap_mode='r+')
+        zdata = data.zdata
+        view = colorview2d.View(data, headless=True, memory_budget=20000)
+        self.assertTrue(data.zdata is zdata)
+        self.assertTrue(zdata.flags.writeable)
+        self.assertFalse(view._original_data.zdata.flags.writeable)
+        self.assertIsInstance(view._original_data.zdata, np.memmap)
+        del view, data, zdata
+
+    def test_plot_pdf(self):
+        """The pdf contains the data in full resolution, the plot a pyramid level."""
+        view = colorview2d.View(self.data, headless=True, memory_budget=20000)
+        saved_shapes = []
+        savefig = view.fig.savefig
+
+        def recording_savefig(*args, **kwargs):
+            saved_shapes.append(view._plot.get_array().shape)
+            savefig(*args, **kwargs)
+        view.fig.savefig = recording_savefig
+
+        view.plot_pdf(os.path.join(self.tempdir, 'outofcore.pdf'))
+        self.assertEqual(saved_shapes, [(203, 61)])
+        view.draw_plot()
+        self.assertTrue(view._plot.get_array().shape[0] < 203)
+        del view
+
+
+class PipelineRunTest(unittest.TestCase):
+    """Test the application of the pipeline in runs."""
+    def setUp(self):
+        """Create a View."""
+        self.view = colorview2d.View(np.random.random((40, 30)) + 0.1, headless=True)
+
+    def test_pipeline(self):
+        """The run of elementwise mods is applied and cached as one stage."""
+        self.view.pipeline = [('Scale', 2.), ('Absolute', ()), ('Log', ()), ('Smooth', (1., 1.))]
+        expected = gaussian_filter(np.log(np.abs(self.view._original_data.zdata * 2.)), (1., 1.))
+        np.testing.assert_allclose(self.view.data.zdata, expected)
+
+        self.assertFalse(StageCache.key(self.view.pipeline[:1]) in self.view.stage_cache)
+        self.assertTrue(StageCache.key(self.view.pipeline[:3]) in self.view.stage_cache)
+        self.assertTrue(StageCache.key(self.view.pipeline) in self.view.stage_cache)
+
+    def test_failing_mod(self):
+        """A mod failing in a run is removed from the pipeline."""
+        self.view.pipeline = [('Scale', 2.), ('Scale', 'a'), ('Absolute', ())]
+        self.assertEqual(self.view.pipeline, [('Scale', 2.), ('Absolute', ())])
+        np.testing.assert_array_equal(
+            self.view.data.zdata, np.abs(self.view._original_data.zdata * 2.))
@@ -0,0 +1,60 @@
+"""
+gaussian_test
+-------------
+
+Module to test the gaussian filter with the FFT backend.
+"""
+import unittest
+import numpy as np
+import scipy.ndimage
+
+import colorview2d
+from colorview2d import gaussian
+
+
+class GaussianFilterTest(unittest.TestCase):
+    """Compare the gaussian filter with scipy.ndimage.gaussian_filter."""
+    def setUp(self):
+        """Create random data."""
+        self.zdata = np.random.RandomState(5).random_sample((120, 90))
+
+    def assert_accurate(self, zdata, sigma, rtol=1e-12):
+        """The result agrees with scipy up to rounding errors."""
+        result = gaussian.gaussian_filter(zdata, sigma)
+        expected = scipy.ndimage.gaussian_filter(zdata, sigma)
+        self.assertEqual(result.dtype, expected.dtype)
+        self.assertEqual(result.shape, expected.shape)
+        np.testing.assert_allclose(result, expected, rtol=rtol, atol=rtol)
+
+    def test_backend(self):
+        """The FFT backend is used for large standard deviations."""
+        self.assertEqual(gaussian.backend(1.), 'direct')
+        self.assertEqual(gaussian.backend(gaussian.FFT_MIN_SIGMA), 'fft')
+        self.assertEqual(gaussian.radius(2.), 8)
+
+    def test_accuracy(self):
+        """Large and mixed standard deviations, also larger than the array."""
+        for sigma in [(12., 12.), (40., 2.), (0., 15.), (200., 200.)]:
+            self.assert_accurate(self.zdata, sigma)
+        self.assert_accurate(self.zdata.astype(np.float32), (20., 20.), rtol=1e-6)
+
+    def test_chunks(self):
+        """The lines are processed in chunks."""
+        chunk_size = gaussian.CHUNK_SIZE
+        gaussian.CHUNK_SIZE = 1000
+        try:
+            self.assert_accurate(self.zdata, (15., 25.))
+        finally:
+            gaussian.CHUNK_SIZE = chunk_size
+
+    def test_integer(self):
+        """Integer arrays are left to scipy."""
+        zdata = (self.zdata * 100).astype(np.int32)
+        np.testing.assert_array_equal(gaussian.gaussian_filter(zdata, (20., 20.)),
+                                      scipy.ndimage.gaussian_filter(zdata, (20., 20.)))
+
+    def test_smooth_mod(self):
+        """The Smooth mod is not tiled with the FFT backend."""
+        smooth = colorview2d.View._modlist['Smooth']
+        self.assertEqual(smooth.halo((2., 1.)), (8, 4))
+        self.assertIsNone(smooth.halo((2., 50.)))
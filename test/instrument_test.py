@@ -0,0 +1,96 @@
+"""
+instrument_test
+---------------
+
+Module to test the instrumentation of the pipeline and the rendering.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import colorview2d
+from colorview2d.instrument import Instrumentation, RenderStats, StageStats
+
+
+class InstrumentationTest(unittest.TestCase):
+    """Test the records of the pipeline stages and the rendering steps."""
+    def setUp(self):
+        """Create an instrumented headless View and collect the records passed to a hook."""
+        self.records = []
+        self.view = colorview2d.View(
+            np.random.random((60, 50)) + 0.1, headless=True,
+            instrumentation=Instrumentation(hooks=[self.records.append]))
+
+    def test_disabled(self):
+        """Without instrumentation, nothing is recorded."""
+        view = colorview2d.View(np.random.random((10, 10)), headless=True)
+        self.assertIsNone(view.last_run_stats)
+        view.add_Scale(2.)
+        self.assertIsNone(view.last_run_stats)
+
+        view.instrumentation = True
+        view.add_Scale(3.)
+        self.assertEqual(len(view.last_run_stats.stages), 1)
+
+    def test_stages(self):
+        """Every applied stage is recorded with the shapes and types."""
+        self.view.pipeline = [('Scale', 2.), ('Log', ()), ('Derive', ()), ('Smooth', (1., 1.))]
+        stats = self.view.last_run_stats
+
+        self.assertEqual(stats.cached_stages, 0)
+        self.assertEqual([stage.mods for stage in stats.stages],
+                         [('Scale', 'Log'), ('Derive',), ('Smooth',)])
+        self.assertEqual([(stage.start, stage.stop) for stage in stats.stages],
+                         [(0, 2), (2, 3), (3, 4)])
+        derive = stats.stages[1]
+        self.assertEqual((derive.input_shape, derive.output_shape), ((60, 50), (59, 50)))
+        self.assertEqual(derive.output_dtype, np.float64)
+        for stage in stats.stages:
+            self.assertTrue(stage.wall_time >= 0 and stage.cpu_time >= 0)
+            self.assertTrue(stage.allocated_bytes >= 0)
+        self.assertTrue(stats.stages[2].allocated_bytes >= 59 * 50 * 8)
+        self.assertEqual([record for record in self.records if isinstance(record, StageStats)],
+                         stats.stages)
+
+    def test_cached_stages(self):
+        """Only the stages that are applied are recorded."""
+        self.view.add_Smooth(1., 1.)
+        self.view.add_Scale(2.)
+        stats = self.view.last_run_stats
+        self.assertEqual(stats.cached_stages, 1)
+        self.assertEqual([stage.mods for stage in stats.stages], [('Scale',)])
+
+    def test_failing_mod(self):
+        """The records of a pipeline with a failing mod are those of the re-applied pipeline."""
+        self.view.pipeline = [('Scale', 2.), ('Median', (2.5, 2.5))]
+        self.assertEqual(self.view.pipeline, [('Scale', 2.)])
+        self.assertEqual([stage.mods for stage in self.view.last_run_stats.stages], [])
+        self.assertEqual(self.view.last_run_stats.cached_stages, 1)
+
+    def test_no_memory_tracing(self):
+        """The memory is not traced if switched off."""
+        self.view.instrumentation = Instrumentation(trace_memory=False)
+        self.view.add_Scale(2.)
+        self.assertIsNone(self.view.last_run_stats.stages[0].allocated_bytes)
+
+    def test_rendering(self):
+        """The rendering steps are recorded, plot_pdf adds the saving."""
+        self.view.draw_plot()
+        self.assertEqual([stats.step for stats in self.view.last_run_stats.render],
+                         ['imshow', 'colorbar', 'tight_layout'])
+
+        tempdir = tempfile.mkdtemp()
+        try:
+            self.view.plot_pdf(os.path.join(tempdir, 'instrument.pdf'))
+        finally:
+            shutil.rmtree(tempdir)
+        self.assertEqual([stats.step for stats in self.view.last_run_stats.render],
+                         ['imshow', 'colorbar', 'tight_layout', 'tight_layout', 'savefig'])
+        self.assertTrue(self.view.last_run_stats.render_time > 0)
+        self.assertTrue(any(isinstance(record, RenderStats) for record in self.records))
+
+
+if __name__ == "__main__":
+    unittest.main()
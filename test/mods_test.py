@@ -11,8 +11,10 @@ import random
 import string
 import os
 import numpy as np
+import scipy.ndimage
 
 import colorview2d
+from colorview2d.registry import ModRegistry
 
 class ModTest(unittest.TestCase):
     """Class with mod tests."""
@@ -136,6 +138,10 @@ class ModTest(unittest.TestCase):
 
         self.fig.add_mod('Adaptive_Threshold', (blocksize, threshold))
 
+    def test_bin(self):
+        """Test of the bin mod."""
+        self.fig.add_mod('Bin', (2, 2, random.choice(['mean', 'sum', 'max', 'min'])))
+
     def test_multiple(self):
         """Tests a sequence of 5 randomly selected mods. The setUp routine is supressed so that
         all mods are applied to the same test case.
@@ -189,3 +195,207 @@ class ModFrameworkTest(unittest.TestCase):
         self.assertTrue(fig.modlist[self.modname])
 
 
+
+
+class ModRegistryTest(unittest.TestCase):
+    """Test the lazy registry of the mods."""
+    def test_lazy_import(self):
+        """The mods are found without importing them, imported on first use."""
+        modlist = ModRegistry()
+
+        self.assertTrue('Smooth' in modlist)
+        self.assertFalse(modlist.entry('Smooth').loaded)
+        self.assertTrue(modlist.entry('Median').doc)
+
+        self.assertTrue(isinstance(modlist['Smooth'], colorview2d.IMod))
+        self.assertTrue(modlist.entry('Smooth').loaded)
+
+    def test_unknown_titles(self):
+        """An unknown title triggers a single rescan, an explicit refresh forgets it."""
+        modlist = ModRegistry()
+        modlist.keys()
+        refresh = modlist.refresh
+        calls = []
+
+        def counting_refresh():
+            calls.append(None)
+            refresh()
+        modlist.refresh = counting_refresh
+
+        for _ in range(3):
+            self.assertFalse('Nomod' in modlist)
+            self.assertRaises(KeyError, modlist.entry, 'Nomod')
+        self.assertEqual(len(calls), 1)
+
+        refresh()
+        self.assertFalse('Nomod' in modlist)
+        self.assertEqual(len(calls), 2)
+
+    def test_shared_instances(self):
+        """All views share the mod instances."""
+        fig1 = colorview2d.View(np.random.random((10, 10)))
+        fig2 = colorview2d.View(np.random.random((10, 10)))
+
+        self.assertTrue(fig1.modlist['Scale'] is fig2.modlist['Scale'])
+
+    def test_generated_methods(self):
+        """The add_, rm_ and set_ methods are defined by the View class."""
+        fig = colorview2d.View(np.random.random((10, 10)))
+
+        fig.add_Scale(2.)
+        fig.set_Xlabel('x')
+        self.assertTrue('add_Scale' in dir(fig))
+        self.assertFalse('add_Scale' in vars(fig))
+        self.assertTrue(hasattr(colorview2d.View, 'add_Scale'))
+        self.assertEqual(fig.pipeline, [('Scale', (2.,))])
+        self.assertEqual(fig.config['Xlabel'], 'x')
+
+        fig.rm_Scale()
+        self.assertEqual(fig.pipeline, [])
+        self.assertRaises(AttributeError, getattr, fig, 'add_Nomod')
+
+
+class DeriveTest(unittest.TestCase):
+    """Test the modes of the Derive mod on polynomials."""
+    def setUp(self):
+        """Create the coordinates of the data."""
+        self.y, self.x = np.mgrid[0.:2.:41j, -1.:1.:31j]
+        self.mod = colorview2d.View._modlist['Derive']
+
+    def derive(self, zdata, modargs):
+        """Apply the mod to the data and return the array."""
+        data = colorview2d.Data(zdata, ((0., 2.), (-1., 1.)))
+        self.assertTrue(self.mod.apply(data, modargs))
+        self.assertEqual(data.zdata.shape, zdata.shape)
+        return data.zdata
+
+    def test_axes(self):
+        """Derivatives along both axes are scaled with the spacing."""
+        zdata = 3. * self.x**2 + 2. * self.y
+        np.testing.assert_allclose(self.derive(zdata, ('x',)), 6. * self.x, atol=1e-10)
+        np.testing.assert_allclose(self.derive(zdata, ('y',)), 2., atol=1e-10)
+        # The smoothed derivative is exact for polynomials
+        np.testing.assert_allclose(self.derive(zdata, ('x', 7, 3)), 6. * self.x, atol=1e-10)
+
+    def test_gradient(self):
+        """The magnitude of the gradient of a plane."""
+        zdata = 3. * self.x + 4. * self.y
+        np.testing.assert_allclose(self.derive(zdata, ('gradient',)), 5., atol=1e-10)
+
+    def test_curvature(self):
+        """The curvature of a plane vanishes, a parabola gives the 1d curvature."""
+        np.testing.assert_allclose(
+            self.derive(3. * self.x + 4. * self.y, ('curvature',)), 0., atol=1e-10)
+
+        zdata = self.x**2
+        # 1d curvature z''/(C0 + z'^2)^(3/2) with C0 = a max(z'^2), times C0^(3/2)
+        expected = 2. / (1. + 4. * self.x**2 / 4.)**1.5 / 4.
+        np.testing.assert_allclose(self.derive(zdata, ('curvature',)), expected, atol=1e-10)
+
+    def test_mixed_derivative(self):
+        """The single pass equals the derivatives along x and y one after the other."""
+        from colorview2d.mods.Derive import _mixed_derivative
+        from scipy.signal import savgol_filter
+        zdata = np.random.RandomState(5).random_sample(self.x.shape)
+        for window, polyorder in ((3, 2), (4, 2), (7, 3)):
+            expected = savgol_filter(
+                savgol_filter(zdata, window, polyorder, deriv=1, delta=0.3, axis=1),
+                window, polyorder, deriv=1, delta=-0.7, axis=0)
+            np.testing.assert_allclose(
+                _mixed_derivative(zdata, window, polyorder, (-0.7, 0.3)), expected, atol=1e-10)
+
+    def test_invalid(self):
+        """Unknown modes and windows larger than the data fail."""
+        data = colorview2d.Data(self.x, ((0., 2.), (-1., 1.)))
+        self.assertFalse(self.mod.apply(data, ('z',)))
+        self.assertFalse(self.mod.apply(data, ('x', 51)))
+
+
+class BinTest(unittest.TestCase):
+    """Compare the Bin mod with the reductions of the blocks."""
+    def setUp(self):
+        """Create data with ragged edges for blocks of 3 x 4."""
+        self.zdata = np.random.RandomState(3).random_sample((11, 14))
+        self.mod = colorview2d.View._modlist['Bin']
+
+    def bin(self, modargs):
+        """Apply the mod to the data and return the Data object."""
+        data = colorview2d.Data(self.zdata, ((0., 10.), (14., 1.)))
+        self.assertTrue(self.mod.apply(data, modargs))
+        return data
+
+    def expected(self, func, nrows, ncolumns):
+        """The reduction of the blocks of 3 x 4 values, computed block by block."""
+        return [[func(self.zdata[row:row + 3, column:column + 4])
+                 for column in range(0, 4 * ncolumns, 4)]
+                for row in range(0, 3 * nrows, 3)]
+
+    def test_trim(self):
+        """The incomplete blocks are dropped, the bounds are the block centers."""
+        for method, func in [('mean', np.mean), ('sum', np.sum), ('max', np.max), ('min', np.min)]:
+            data = self.bin((3, 4, method))
+            np.testing.assert_allclose(data.zdata, self.expected(func, 3, 3))
+        self.assertEqual(data.yrange_bounds, (1., 7.))
+        self.assertEqual(data.xrange_bounds, (12.5, 4.5))
+
+    def test_partial(self):
+        """The incomplete blocks are reduced from the values available."""
+        data = self.bin((3, 4, 'mean', 'partial'))
+        np.testing.assert_allclose(data.zdata, self.expected(np.mean, 4, 4))
+        self.assertEqual(data.yrange_bounds, (1., 10.))
+        self.assertEqual(data.xrange_bounds, (12.5, 0.5))
+
+    def test_chunks(self):
+        """The result does not depend on the chunks of rows."""
+        chunk_size = colorview2d.data._BIN_CHUNK_SIZE
+        colorview2d.data._BIN_CHUNK_SIZE = 20
+        try:
+            np.testing.assert_array_equal(self.bin((3, 4, 'max', 'partial')).zdata,
+                                          self.expected(np.max, 4, 4))
+        finally:
+            colorview2d.data._BIN_CHUNK_SIZE = chunk_size
+
+    def test_invalid(self):
+        """Unknown methods and blocks larger than the data fail."""
+        data = colorview2d.Data(self.zdata)
+        self.assertFalse(self.mod.apply(data, (2, 2, 'median')))
+        self.assertFalse(self.mod.apply(data, (2, 2, 'mean', 'pad')))
+        self.assertFalse(self.mod.apply(data, (12, 2)))
+        self.assertFalse(self.mod.apply(data, (0, 2)))
+
+
+class AdaptiveThresholdTest(unittest.TestCase):
+    """Compare the adaptive threshold with the local statistics of scipy.ndimage."""
+    def setUp(self):
+        """Create random data with a few peaks."""
+        zdata = np.random.RandomState(7).random_sample((40, 50))
+        zdata[10, 20] = zdata[30, 5] = 10.
+        self.data = colorview2d.Data(zdata, ((0., 1.), (0., 1.)))
+        self.mod = colorview2d.View._modlist['Adaptive_Threshold']
+
+    def threshold(self, modargs):
+        """Apply the mod to a copy of the data."""
+        data = self.data.deep_copy()
+        self.assertTrue(self.mod.apply(data, modargs))
+        return data.zdata
+
+    def test_mean(self):
+        """The threshold is (1 + offset) times the local mean."""
+        for blocksize in [3, 4, 15]:
+            mean = scipy.ndimage.generic_filter(self.data.zdata, np.mean, blocksize)
+            np.testing.assert_array_equal(self.threshold((blocksize, 0.5)),
+                                          self.data.zdata > 1.5 * mean)
+
+    def test_methods(self):
+        """Gaussian weighted mean and median."""
+        gaussian = scipy.ndimage.gaussian_filter(self.data.zdata, 2.)
+        np.testing.assert_array_equal(self.threshold((13, 0.2, 'gaussian')),
+                                      self.data.zdata > 1.2 * gaussian)
+        median = scipy.ndimage.median_filter(self.data.zdata, 9)
+        np.testing.assert_array_equal(self.threshold((9, 0.2, 'median')),
+                                      self.data.zdata > 1.2 * median)
+
+    def test_invalid(self):
+        """Invalid blocksizes and methods fail."""
+        self.assertFalse(self.mod.apply(self.data.deep_copy(), (0, 0.)))
+        self.assertFalse(self.mod.apply(self.data.deep_copy(), (3, 0., 'max')))
@@ -0,0 +1,102 @@
+"""
+pyramid_test
+------------
+
+Module to test the multi-resolution pyramid of the data.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import colorview2d
+from colorview2d import pyramid
+from colorview2d.pyramid import Pyramid
+
+
+class PyramidTest(unittest.TestCase):
+    """Test the levels of the pyramid."""
+    def setUp(self):
+        """Create an array with odd dimensions and some NaN."""
+        self.zdata = np.random.random((37, 23))
+        self.zdata[3, 4] = np.nan
+        self.zdata[5, :] = np.nan
+        self.pyramid = Pyramid(self.zdata)
+
+    def test_levels(self):
+        """The levels contain the min, max and mean of the blocks, ignoring NaN."""
+        self.assertEqual(self.pyramid.nlevels, 7)
+        for level in range(1, self.pyramid.nlevels):
+            factor = 2**level
+            self.assertEqual(self.pyramid.level(level).shape, self.pyramid.level_shape(level))
+            for kind, func in [('min', np.nanmin), ('max', np.nanmax), ('mean', np.nanmean)]:
+                expected = [[func(self.zdata[row:row + factor, column:column + factor])
+                             for column in range(0, 23, factor)]
+                            for row in range(0, 37, factor)]
+                np.testing.assert_allclose(self.pyramid.level(level, kind), expected)
+
+    def test_lazy(self):
+        """The levels are computed on demand."""
+        self.assertEqual(self.pyramid.computed_levels, [])
+        self.pyramid.level(2)
+        self.assertEqual(self.pyramid.computed_levels, [1, 2])
+
+    def test_narrow_feature(self):
+        """A line of a single pixel width is visible on all levels."""
+        zdata = np.zeros((64, 64))
+        zdata[33, :] = 1.
+        zdata[:, 17] = -1.
+        pyramid = Pyramid(zdata)
+        for level in range(1, pyramid.nlevels - 1):
+            image = pyramid.level(level)
+            self.assertEqual(image.max(), 1.)
+            self.assertEqual(image.min(), -1.)
+
+    def test_select_level(self):
+        """The selected level has at least one pixel per display pixel."""
+        pyramid = Pyramid(np.zeros((20000, 10000)))
+        self.assertEqual(pyramid.select_level(20000, 10000, 800, 800), 3)
+        self.assertEqual(pyramid.select_level(500, 500, 800, 800), 0)
+
+        array, rows, columns = pyramid.region(3, (100, 200), (0, 10000))
+        self.assertEqual(array.shape, (13, 1250))
+        self.assertEqual(rows, (96, 200))
+        self.assertEqual(columns, (0, 10000))
+
+    def test_data(self):
+        """The pyramid of a Data object is discarded when the array changes."""
+        data = colorview2d.Data(self.zdata)
+        pyramid = data.pyramid
+        self.assertTrue(data.pyramid is pyramid)
+
+        data.writable_zdata()[0, 0] = 5.
+        self.assertFalse(data.pyramid is pyramid)
+
+        pyramid = data.pyramid
+        data.zdata = data.zdata * 2
+        self.assertFalse(data.pyramid is pyramid)
+
+    def test_memmap(self):
+        """The levels of a memory-mapped array are computed directly and in chunks."""
+        tempdir = tempfile.mkdtemp()
+        chunk_size = pyramid.CHUNK_SIZE
+        pyramid.CHUNK_SIZE = 50
+        try:
+            zdata = np.memmap(os.path.join(tempdir, 'pyramid.dat'), dtype=float,
+                              mode='w+', shape=self.zdata.shape)
+            zdata[:] = self.zdata
+            mapped = Pyramid(zdata)
+            for level in (3, 1, 2, 5):
+                for kind in ('min', 'max', 'mean', 'extrema'):
+                    np.testing.assert_array_equal(mapped.level(level, kind),
+                                                  self.pyramid.level(level, kind))
+            self.assertEqual(mapped.computed_levels, [1, 2, 3, 5])
+            del zdata, mapped
+        finally:
+            pyramid.CHUNK_SIZE = chunk_size
+            shutil.rmtree(tempdir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+rankfilter_test
+---------------
+
+Module to test the median filter for large windows.
+"""
+import unittest
+import numpy as np
+import scipy.ndimage
+
+import colorview2d.rankfilter as rankfilter
+
+
+class MedianFilterTest(unittest.TestCase):
+    """Compare the median filter with scipy.ndimage.median_filter."""
+    def setUp(self):
+        """Use small tiles to cover the boundaries of the tiles."""
+        self.random = np.random.RandomState(3)
+        self.tile_size = rankfilter.TILE_SIZE
+        rankfilter.TILE_SIZE = 16
+
+    def tearDown(self):
+        """Restore the tile size."""
+        rankfilter.TILE_SIZE = self.tile_size
+
+    def assert_identical(self, zdata, size):
+        """The result and its type are identical to the result of scipy."""
+        result = rankfilter.median_filter(zdata, size)
+        expected = scipy.ndimage.median_filter(zdata, size=size)
+        self.assertEqual(result.dtype, expected.dtype)
+        np.testing.assert_array_equal(result, expected)
+
+    def test_float(self):
+        """Random and smooth float data with odd and even windows."""
+        noise = self.random.random_sample((40, 33))
+        smooth = np.add.outer(np.linspace(0., 1., 40), np.linspace(0., 1., 33)) + noise * 1e-3
+        for zdata in [noise, smooth, noise.astype(np.float32)]:
+            for size in [(9, 9), (8, 11), (25, 25)]:
+                self.assert_identical(zdata, size)
+
+    def test_integer(self):
+        """Integer data with few distinct values."""
+        self.assert_identical(self.random.randint(0, 4, (30, 35)), (9, 9))
+        self.assert_identical(self.random.randint(-500, 500, (30, 35)).astype(np.int16), (10, 7))
+        self.assert_identical(np.zeros((20, 20), dtype=np.uint8), (9, 9))
+
+    def test_refinement(self):
+        """The results of the histogram levels and of the gathered candidates agree."""
+        zdata = self.random.random_sample((30, 30))
+        ratio = rankfilter.GATHER_RATIO
+        try:
+            for rankfilter.GATHER_RATIO in [0, 1000]:
+                self.assert_identical(zdata, (9, 9))
+        finally:
+            rankfilter.GATHER_RATIO = ratio
+
+    def test_separable(self):
+        """Windows along one axis."""
+        zdata = self.random.random_sample((30, 40))
+        for size in [(1, 31), (30, 1), (1, 4)]:
+            self.assert_identical(zdata, size)
+
+    def test_fallback(self):
+        """Small windows, NaN values and windows larger than the array."""
+        zdata = self.random.random_sample((12, 9))
+        self.assert_identical(zdata, (3, 3))
+        self.assert_identical(zdata, (20, 15))
+        zdata[3, 4] = np.nan
+        self.assert_identical(zdata, (9, 9))
+
+    def test_flat_array(self):
+        """Windows much larger than the array along an axis, the reflection is repeated."""
+        for shape, size in [((2, 39), (23, 8)), ((3, 50), (24, 9)), ((3, 50), (40, 9)),
+                            ((50, 3), (9, 40)), ((2, 39), (23, 2)), ((12, 9), (20, 20))]:
+            zdata = self.random.random_sample(shape)
+            height, width = size
+            padded = np.pad(zdata, ((height // 2, (height - 1) // 2), (width // 2, (width - 1) // 2)),
+                            mode='symmetric')
+            windows = np.lib.stride_tricks.sliding_window_view(padded, size)
+            expected = np.sort(windows.reshape(shape + (-1,)), axis=-1)[..., height * width // 2]
+            np.testing.assert_array_equal(rankfilter.median_filter(zdata, size), expected)
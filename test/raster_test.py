@@ -0,0 +1,103 @@
+"""
+raster_test
+-----------
+
+Module to test the export of the colored data as raster images.
+"""
+import unittest
+import os
+import shutil
+import numpy as np
+import matplotlib
+import matplotlib.image
+
+import colorview2d
+from colorview2d import raster
+
+
+def read_png(filename):
+    """Read a png file with matplotlib and return the 8 bit RGBA values."""
+    return np.round(matplotlib.image.imread(filename) * 255).astype(np.uint8)
+
+
+class RasterTest(unittest.TestCase):
+    """Test the colormap lookup tables and the png writer."""
+    def setUp(self):
+        """Create random data with some values out of range and NaN."""
+        self.zdata = np.random.random((37, 53))
+        self.zdata[0, :5] = [-1., 2., np.nan, 0.1, 0.9]
+        self.fname = 'rastertest.png'
+        self.dirname = 'rastertest_tiles'
+
+    def tearDown(self):
+        """Remove the png files."""
+        if os.path.exists(self.fname):
+            os.remove(self.fname)
+        shutil.rmtree(self.dirname, ignore_errors=True)
+
+    def test_to_rgba(self):
+        """The colors are identical to the ones of matplotlib."""
+        cmap = matplotlib.colormaps['viridis']
+        expected = cmap(matplotlib.colors.Normalize(0.1, 0.9)(self.zdata), bytes=True)
+
+        np.testing.assert_array_equal(raster.to_rgba(self.zdata, 'viridis', 0.1, 0.9),
+                                      expected)
+        self.assertTrue(raster.colormap_lut('viridis') is raster.colormap_lut('viridis'))
+
+    def test_invalid_values(self):
+        """NaN and infinite values get the bad color as in imshow, also for equal limits."""
+        zdata = np.array([[0.5, np.nan, np.inf, -np.inf, -1., 2.]])
+        cmap = matplotlib.colormaps['viridis']
+        for vmin, vmax in ((0., 1.), (0.5, 0.5)):
+            expected = cmap(matplotlib.colors.Normalize(vmin, vmax)(
+                np.ma.masked_invalid(zdata)), bytes=True)
+            np.testing.assert_array_equal(raster.to_rgba(zdata, cmap, vmin, vmax), expected)
+
+    def test_all_nan(self):
+        """Data without valid values is transparent."""
+        zdata = np.full((3, 4), np.nan)
+        np.testing.assert_array_equal(raster.to_rgba(zdata, 'viridis'), 0)
+
+        view = colorview2d.View(zdata, headless=True)
+        view.plot_png(self.fname)
+        np.testing.assert_array_equal(read_png(self.fname), 0)
+
+    def test_view_statistics(self):
+        """The automatic limits of the View are the statistics of the data."""
+        view = colorview2d.View(self.zdata, headless=True)
+        view.data.statistics.update({'nanmin': 0.2, 'nanmax': 0.8})
+        view.plot_png(self.fname)
+        np.testing.assert_array_equal(read_png(self.fname)[::-1],
+                                      raster.to_rgba(self.zdata, 'jet', 0.2, 0.8))
+
+    def test_png(self):
+        """Write a png and read it with matplotlib."""
+        rgba = raster.to_rgba(self.zdata, 'jet', 0., 1.)
+        raster.save_png(self.fname, self.zdata, 'jet', 0., 1., origin='upper')
+
+        np.testing.assert_array_equal(read_png(self.fname), rgba)
+
+    def test_view_png(self):
+        """The first row of the data is the bottom row of the image."""
+        view = colorview2d.View(self.zdata, headless=True)
+        view.config.update({'Colormap': 'gray', 'Cbmin': 0., 'Cbmax': 1.})
+        view.plot_png(self.fname)
+
+        image = read_png(self.fname)
+        self.assertEqual(image.shape, self.zdata.shape + (4,))
+        np.testing.assert_array_equal(image[::-1], raster.to_rgba(self.zdata, 'gray', 0., 1.))
+
+    def test_tiles(self):
+        """The tiles cover the image."""
+        view = colorview2d.View(self.zdata, headless=True)
+        filenames = view.plot_png_tiles(self.dirname, tilesize=16)
+
+        self.assertEqual(len(filenames), 3 * 4)
+        image = np.concatenate(
+            [np.concatenate([read_png(os.path.join(self.dirname, '%d_%d.png' % (row, column)))
+                             for column in range(4)], axis=1) for row in range(3)], axis=0)
+        np.testing.assert_array_equal(image[::-1], raster.to_rgba(self.zdata, 'jet'))
+
+
+if __name__ == "__main__":
+    unittest.main()
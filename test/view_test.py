@@ -142,3 +142,155 @@ class PltFigTest(unittest.TestCase):
                   "fontsize 8 (Ubuntu).")
 
 
+
+class HeadlessTest(unittest.TestCase):
+    """Render a View without pyplot."""
+
+    def setUp(self):
+        """Create a headless View object."""
+        self.fig = colorview2d.View(np.random.random((100, 100)), headless=True)
+        self.filename = 'headlesstest.pdf'
+
+    def tearDown(self):
+        """Remove the pdf file."""
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def test_plot_pdf(self):
+        """Plot to pdf without touching the pyplot figures and rcParams."""
+        import matplotlib
+        import matplotlib.pyplot as plt
+
+        fignums = plt.get_fignums()
+        fontsize = matplotlib.rcParams['font.size']
+
+        self.fig.config.update({'Fontsize': fontsize + 4, 'Ylabel': 'foo'})
+        self.fig.add_mod('Smooth', (1., 1.))
+        self.fig.plot_pdf(self.filename)
+
+        self.assertTrue(os.path.isfile(self.filename))
+        self.assertEqual(self.fig.fig.axes[0].get_ylabel(), 'foo')
+        self.assertEqual(self.fig.fig.axes[0].yaxis.label.get_size(), fontsize + 4)
+        self.assertEqual(plt.get_fignums(), fignums)
+        self.assertEqual(matplotlib.rcParams['font.size'], fontsize)
+
+    def test_data_changed(self):
+        """Modify the data and the colorbar limits of a drawn plot."""
+        self.fig.draw_plot()
+        self.fig.add_mod('Scale', (2.,))
+        self.fig.config['Cbmin'] = 0.5
+
+        self.assertEqual(self.fig._plot.get_clim()[0], 0.5)
+        self.assertEqual(self.fig._plot.get_array().max(), self.fig.data.zmax)
+
+        # there is no interactive plot
+        self.fig.show_plt_fig()
+        self.assertFalse(self.fig._plt_fig_is_active())
+
+
+class MultiresolutionTest(unittest.TestCase):
+    """Display large data with the data pyramid."""
+
+    def setUp(self):
+        """We create a View object of a large array and show it."""
+        zdata = np.random.random((3000, 2000))
+        zdata[1500, :] = 10.
+        self.fig = colorview2d.View(colorview2d.Data(zdata, ((0., 3.), (0., 2.))))
+        self.fig.show_plt_fig()
+
+    def tearDown(self):
+        """Hide the interactive plotting window."""
+        self.fig.hide_plt_fig()
+
+    def test_zoom(self):
+        """The displayed resolution is refined when zooming in."""
+        displayed = self.fig._plot.get_array()
+        self.assertTrue(displayed.shape[0] < 3000 and displayed.shape[1] < 2000)
+        # the narrow line survives the downsampling
+        self.assertEqual(displayed.max(), 10.)
+
+        self.fig._axes.set_xlim(0.5, 0.6)
+        self.fig._axes.set_ylim(1., 1.1)
+        self.assertEqual(self.fig._plot.get_array().shape, (100, 100))
+        self.assertEqual(list(self.fig._plot.get_extent()), [0.5, 0.6, 1., 1.1])
+
+    def test_plot_pdf(self):
+        """The pdf contains the data in full resolution."""
+        saved_shapes = []
+        savefig = self.fig._fig.savefig
+
+        def recording_savefig(*args, **kwargs):
+            saved_shapes.append(self.fig._plot.get_array().shape)
+            savefig(*args, **kwargs)
+        self.fig._fig.savefig = recording_savefig
+
+        filename = 'multiresolutiontest.pdf'
+        self.fig.plot_pdf(filename)
+        os.remove(filename)
+
+        self.assertEqual(saved_shapes, [(3000, 2000)])
+        self.assertTrue(self.fig._plot.get_array().shape[0] < 3000)
+
+
+class ConfigBatchTest(unittest.TestCase):
+    """Changes of the config are applied with the cheapest sufficient update."""
+
+    def setUp(self):
+        """Create a plot and count the redraws."""
+        self.fig = colorview2d.View(np.random.random((100, 100)), headless=True)
+        self.fig.draw_plot()
+        self.redraws = []
+        draw_plot = self.fig.draw_plot
+
+        def counting_draw_plot():
+            self.redraws.append(1)
+            draw_plot()
+        self.fig.draw_plot = counting_draw_plot
+
+    def test_update(self):
+        """Updating several layout parameters redraws the plot once."""
+        self.fig.config.update({'Fontsize': 18, 'Xticklength': 8, 'Yticklength': 8,
+                                'Cbtickformat': '%.2f', 'Xlabel': 'foo'})
+
+        self.assertEqual(len(self.redraws), 1)
+        self.assertEqual(self.fig._axes.get_xlabel(), 'foo')
+
+    def test_batch(self):
+        """Colorbar and label changes in a batch do not redraw the plot."""
+        with self.fig.config.batch():
+            self.fig.config['Cbmin'] = 0.2
+            self.fig.set_Cbmax(0.8)
+            self.fig.set_Ylabel('bar')
+            # nothing is applied within the batch
+            self.assertNotEqual(self.fig._plot.get_clim(), (0.2, 0.8))
+
+        self.assertEqual(len(self.redraws), 0)
+        self.assertEqual(self.fig._plot.get_clim(), (0.2, 0.8))
+        self.assertEqual(self.fig._axes.get_ylabel(), 'bar')
+
+    def test_save_numpy_limits(self):
+        """Colorbar limits set from numpy values survive saving and loading the config."""
+        filename = 'numpytest.cv2d'
+        self.fig.config.update_raw({'Cbmin': np.float64(0.2), 'Cbmax': np.float32(0.5)})
+        self.fig.save_config(filename)
+        with open(filename) as cfgfile:
+            self.assertNotIn('!!python', cfgfile.read())
+        other = colorview2d.View(np.random.random((10, 10)), headless=True, cfgfile=filename)
+        os.remove(filename)
+
+        self.assertEqual(other.config['Cbmin'], 0.2)
+        self.assertEqual(other.config['Cbmax'], 0.5)
+
+    def test_load_config(self):
+        """Loading a config and a pipeline redraws the plot once."""
+        filename = 'batchtest.cv2d'
+        other = colorview2d.View(np.random.random((100, 100)), headless=True,
+                                 config={'Font': 'DejaVu Sans', 'Fontsize': 16},
+                                 pipeline=[('Smooth', (1, 1)), ('Scale', (2.,))])
+        other.save_config(filename)
+        self.fig.load_config(filename)
+        os.remove(filename)
+
+        self.assertEqual(len(self.redraws), 1)
+        self.assertEqual(self.fig.pipeline, other.pipeline)
+        self.assertEqual(self.fig.config['Fontsize'], 16)